@@ -0,0 +1,33 @@
+import os
+
+DATA_DIR = os.path.join(os.path.expanduser("~"), ".journal_project")
+
+DEFAULTS = {
+    # "mysql" (MySQL metadata + MongoDB content) or "sqlite" (one file)
+    "backend": "mysql",
+    "sqlite_path": os.path.join(DATA_DIR, "journal.db"),
+    "mysql_host": "localhost",
+    "mysql_user": "root",
+    "mysql_password": "root",
+    "mysql_database": "journal_db",
+    "mongo_uri": "mongodb://localhost:27017",
+    "mongo_database": "journal",
+    # "1" records call timings for the performance panel from start-up
+    "metrics": "0",
+    # Requests a second whole-journal translation may send; "0" is no limit
+    "translate_rate": "5",
+    # "zlib" or "lzma" compresses MongoDB bodies and translations of at
+    # least compression_threshold characters; "" stores plain text
+    "compression": "",
+    "compression_threshold": "16384",
+    # Saved bodies are kept as deltas, with a full copy this often
+    "revision_snapshot_every": "20",
+}
+
+
+def load_config():
+    """Settings from JOURNAL_<NAME> environment variables over DEFAULTS."""
+    return {
+        name: os.environ.get(f"JOURNAL_{name.upper()}", default)
+        for name, default in DEFAULTS.items()
+    }
@@ -0,0 +1,159 @@
+import functools
+import json
+import threading
+import time
+
+# Upper bounds of the latency histogram buckets, in milliseconds
+BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+HISTOGRAM_LABELS = tuple(f"<={bound}ms" for bound in BUCKETS_MS) + (
+    f">{BUCKETS_MS[-1]}ms",
+)
+
+
+def text_size(value):
+    """UTF-8 bytes of the strings in value (nested dicts/lists too)."""
+    if isinstance(value, str):
+        return len(value.encode("utf-8", "surrogatepass"))
+    if isinstance(value, dict):
+        return sum(text_size(v) for v in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(text_size(v) for v in value)
+    return 0
+
+
+class _Stat:
+    __slots__ = ("calls", "errors", "total", "max", "bytes", "buckets",
+                 "last_error")
+
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.bytes = 0
+        self.buckets = [0] * (len(BUCKETS_MS) + 1)
+        self.last_error = None
+
+    def percentile(self, q):
+        # Upper bound of the bucket holding the q-th call
+        rank = q * self.calls
+        seen = 0
+        for bound, count in zip(BUCKETS_MS, self.buckets):
+            seen += count
+            if seen >= rank:
+                return float(bound)
+        return round(self.max * 1000, 3)
+
+
+class Metrics:
+    """Call counts, latency histograms, bytes moved and errors per name.
+
+    Recording is off until `enabled` is set; while it is off an
+    instrumented call costs one attribute check.
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self._stats = {}
+            self.since = time.time()
+
+    def _stat(self, name):
+        stat = self._stats.get(name)
+        if stat is None:
+            stat = self._stats[name] = _Stat()
+        return stat
+
+    def record(self, name, seconds, nbytes=0, error=None):
+        """Adds one call of `seconds`; error is an exception or message."""
+        if not self.enabled:
+            return
+        ms = seconds * 1000
+        index = len(BUCKETS_MS)
+        for i, bound in enumerate(BUCKETS_MS):
+            if ms <= bound:
+                index = i
+                break
+        with self._lock:
+            stat = self._stat(name)
+            stat.calls += 1
+            stat.total += seconds
+            stat.max = max(stat.max, seconds)
+            stat.bytes += nbytes
+            stat.buckets[index] += 1
+            if error is not None:
+                stat.errors += 1
+                stat.last_error = str(error)
+
+    def error(self, name, error):
+        """Counts a failure that was handled without raising."""
+        if not self.enabled:
+            return
+        with self._lock:
+            stat = self._stat(name)
+            stat.errors += 1
+            stat.last_error = str(error)
+
+    def snapshot(self):
+        """{"since", "metrics": {name: {...}}} sorted by name."""
+        with self._lock:
+            items = sorted(self._stats.items())
+            result = {}
+            for name, stat in items:
+                result[name] = {
+                    "calls": stat.calls,
+                    "errors": stat.errors,
+                    "total_ms": round(stat.total * 1000, 3),
+                    "mean_ms": round(stat.total * 1000 / stat.calls, 3)
+                    if stat.calls else 0.0,
+                    "p50_ms": stat.percentile(0.5) if stat.calls else 0.0,
+                    "p95_ms": stat.percentile(0.95) if stat.calls else 0.0,
+                    "max_ms": round(stat.max * 1000, 3),
+                    "bytes": stat.bytes,
+                    "histogram": dict(zip(HISTOGRAM_LABELS, stat.buckets)),
+                    "last_error": stat.last_error,
+                }
+            return {"since": self.since, "metrics": result}
+
+    def export_json(self, path):
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.snapshot(), f, indent=2, ensure_ascii=False)
+
+
+# The application's registry; JOURNAL_METRICS=1 turns it on at start-up
+metrics = Metrics()
+
+
+def instrumented(name, size=None):
+    """Records each call of the decorated function under `name`.
+
+    size(result, *args, **kwargs) returns the bytes the call moved.
+    Exceptions are counted as errors and re-raised; functions that
+    handle their own failures report them with metrics.error.
+    """
+    def decorate(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            if not metrics.enabled:
+                return fn(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                metrics.record(name, time.perf_counter() - start, error=e)
+                raise
+            elapsed = time.perf_counter() - start
+            nbytes = 0
+            if size is not None:
+                try:
+                    nbytes = size(result, *args, **kwargs)
+                except Exception:
+                    nbytes = 0
+            metrics.record(name, elapsed, nbytes)
+            return result
+        return wrapper
+    return decorate
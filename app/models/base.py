@@ -2,6 +2,14 @@ from abc import ABC, abstractmethod
 
 
 class BaseEntry(ABC):
+    # Entries are built by the thousand during imports and exports;
+    # slots keep each one to a few machine words
+    __slots__ = ()
+
+    @property
+    def base(self):
+        """The innermost entry, under any feature wrappers."""
+        return self
 
     @abstractmethod
     def get_content(self) -> str:
@@ -0,0 +1,65 @@
+import re
+import zlib
+
+CHUNK_CHARS = 4500  # under GoogleTranslator's 5000-character request limit
+CUT_EVERY = 8  # on average, a piece ends after this many paragraphs
+
+_PARAGRAPH_BREAK = re.compile(r"\n[ \t]*\n\s*")
+_SENTENCE_END = re.compile(r"(?<=[.!?؟。])\s+")
+_SPACE = re.compile(r"\s+")
+
+
+def _units(text, separator):
+    """text cut after every match of `separator`, which stays attached."""
+    units = []
+    start = 0
+    for match in separator.finditer(text):
+        units.append(text[start:match.end()])
+        start = match.end()
+    if start < len(text):
+        units.append(text[start:])
+    return units
+
+
+def _is_cut_point(unit):
+    return zlib.crc32(unit.encode("utf-8", "surrogatepass")) % CUT_EVERY == 0
+
+
+def split_text(text, limit=CHUNK_CHARS):
+    """Splits text into pieces of at most `limit` characters.
+
+    Pieces end at paragraph breaks, or at sentence then word breaks for
+    paragraphs over the limit, and "".join(pieces) == text. Where a piece
+    ends depends on the paragraph's own content rather than on its
+    position, so editing one paragraph changes one piece and leaves the
+    others, and their cached translations, as they were.
+    """
+    if len(text) <= limit:
+        return [text] if text else []
+    units = []
+    for paragraph in _units(text, _PARAGRAPH_BREAK):
+        if len(paragraph) <= limit:
+            units.append(paragraph)
+            continue
+        for sentence in _units(paragraph, _SENTENCE_END):
+            if len(sentence) <= limit:
+                units.append(sentence)
+                continue
+            for word in _units(sentence, _SPACE):
+                units.extend(
+                    word[i:i + limit] for i in range(0, len(word), limit)
+                )
+
+    pieces = []
+    current = ""
+    for unit in units:
+        if current and len(current) + len(unit) > limit:
+            pieces.append(current)
+            current = ""
+        current += unit
+        if _is_cut_point(unit):
+            pieces.append(current)
+            current = ""
+    if current:
+        pieces.append(current)
+    return pieces
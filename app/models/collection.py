@@ -0,0 +1,99 @@
+from array import array
+from .concrete import TextEntry
+
+TYPES = ("TEXT", "FILE")
+
+
+class EntryCollection:
+    """Metadata of many entries in flat arrays instead of one dict each.
+
+    Ids live in an array of 64-bit integers and all titles in one UTF-8
+    buffer with an offsets array, so 100k rows cost a few megabytes
+    rather than a dict and two Python objects per row. Password hashes
+    and linked file paths are rare and kept in side dicts.
+
+    Indexing returns {"id", "title"} dicts, built on demand, like the
+    rows of DatabaseService.get_titles_page; metadata(position) adds
+    type, password_hash and file_path.
+    """
+
+    __slots__ = ("ids", "types", "_titles", "_offsets", "_password_hashes",
+                 "_file_paths", "_positions")
+
+    def __init__(self, rows=()):
+        self.ids = array("q")
+        self.types = bytearray()
+        self._titles = bytearray()
+        self._offsets = array("Q", [0])
+        self._password_hashes = {}
+        self._file_paths = {}
+        self._positions = None
+        self.extend(rows)
+
+    def append(self, note_id, title, entry_type="TEXT", password_hash=None,
+               file_path=None):
+        position = len(self.ids)
+        self.ids.append(note_id)
+        self.types.append(TYPES.index(entry_type))
+        self._titles += title.encode("utf-8", "surrogatepass")
+        self._offsets.append(len(self._titles))
+        if password_hash:
+            self._password_hashes[position] = password_hash
+        if file_path:
+            self._file_paths[position] = file_path
+        if self._positions is not None:
+            self._positions[note_id] = position
+
+    def extend(self, rows):
+        """Appends {"id", "title", ...} rows such as get_titles_page's."""
+        for row in rows:
+            self.append(
+                row["id"], row["title"], row.get("type") or "TEXT",
+                row.get("password_hash"), row.get("file_path"),
+            )
+
+    def __len__(self):
+        return len(self.ids)
+
+    def title(self, position):
+        start, end = self._offsets[position], self._offsets[position + 1]
+        return self._titles[start:end].decode("utf-8", "surrogatepass")
+
+    def row(self, position):
+        return {"id": self.ids[position], "title": self.title(position)}
+
+    def metadata(self, position):
+        return dict(
+            self.row(position),
+            type=TYPES[self.types[position]],
+            password_hash=self._password_hashes.get(position),
+            file_path=self._file_paths.get(position),
+        )
+
+    def __getitem__(self, key):
+        if isinstance(key, slice):
+            return [self.row(i) for i in range(*key.indices(len(self)))]
+        if key < 0:
+            key += len(self)
+        if not 0 <= key < len(self):
+            raise IndexError("EntryCollection index out of range")
+        return self.row(key)
+
+    def __iter__(self):
+        for position in range(len(self)):
+            yield self.row(position)
+
+    def index_of(self, note_id):
+        """Position of note_id; the lookup table is built on first use."""
+        if self._positions is None:
+            self._positions = {
+                note_id: i for i, note_id in enumerate(self.ids)
+            }
+        try:
+            return self._positions[note_id]
+        except KeyError:
+            raise ValueError(f"{note_id} is not in the collection")
+
+    def entry(self, position, body=""):
+        """A TextEntry for the row, e.g. to export it."""
+        return TextEntry(self.title(position), body)
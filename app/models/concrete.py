@@ -3,6 +3,8 @@ from .base import BaseEntry
 
 
 class TextEntry(BaseEntry):
+    __slots__ = ("title", "body")
+
     def __init__(self, title: str, body: str):
         self.title = title
         self.body = body
@@ -21,6 +23,8 @@ class TextEntry(BaseEntry):
 
 
 class FileEntry(BaseEntry):
+    __slots__ = ("path", "body")
+
     def __init__(self, path: str):
         self.path = path
         # Restriction: Only allow text-based "suited" files
@@ -0,0 +1,94 @@
+import json
+from difflib import SequenceMatcher
+
+
+def _lines(text):
+    lines = text.splitlines(keepends=True)
+    offsets = [0]
+    for line in lines:
+        offsets.append(offsets[-1] + len(line))
+    return lines, offsets
+
+
+def make_delta(old, new):
+    """Instructions that rebuild `new` from `old`.
+
+    A delta is a list of [offset, length] pairs, which copy that slice of
+    `old`, and strings, which are inserted as they are. Lines are matched
+    first (after skipping the lines both texts start and end with, so an
+    edit in a long note only compares the lines around it), then each
+    changed block keeps the characters it shares with the old one at
+    either end: its size follows the edit, not the note.
+    """
+    old_lines, old_offsets = _lines(old)
+    new_lines, _ = _lines(new)
+    head = 0
+    limit = min(len(old_lines), len(new_lines))
+    while head < limit and old_lines[head] == new_lines[head]:
+        head += 1
+    tail = 0
+    while tail < limit - head \
+            and old_lines[-1 - tail] == new_lines[-1 - tail]:
+        tail += 1
+
+    delta = []
+
+    def copy(start, stop):
+        if stop <= start:
+            return
+        if delta and isinstance(delta[-1], list) \
+                and sum(delta[-1]) == start:
+            delta[-1][1] += stop - start
+        else:
+            delta.append([start, stop - start])
+
+    def insert(text):
+        if not text:
+            return
+        if delta and isinstance(delta[-1], str):
+            delta[-1] += text
+        else:
+            delta.append(text)
+
+    copy(0, old_offsets[head])
+    matcher = SequenceMatcher(
+        None, old_lines[head:len(old_lines) - tail],
+        new_lines[head:len(new_lines) - tail], autojunk=False,
+    )
+    for op, i1, i2, j1, j2 in matcher.get_opcodes():
+        start, stop = old_offsets[head + i1], old_offsets[head + i2]
+        if op == "equal":
+            copy(start, stop)
+            continue
+        removed = old[start:stop]
+        added = "".join(new_lines[head + j1:head + j2])
+        # Characters the old and new blocks share at either end
+        prefix = 0
+        shortest = min(len(removed), len(added))
+        while prefix < shortest and removed[prefix] == added[prefix]:
+            prefix += 1
+        suffix = 0
+        while suffix < shortest - prefix \
+                and removed[-1 - suffix] == added[-1 - suffix]:
+            suffix += 1
+        copy(start, start + prefix)
+        insert(added[prefix:len(added) - suffix])
+        copy(stop - suffix, stop)
+    copy(old_offsets[len(old_lines) - tail], len(old))
+    return delta
+
+
+def apply_delta(old, delta):
+    """The text `delta` (from make_delta) builds out of `old`."""
+    return "".join(
+        old[op[0]:op[0] + op[1]] if isinstance(op, list) else op
+        for op in delta
+    )
+
+
+def dump_delta(delta):
+    return json.dumps(delta, ensure_ascii=False, separators=(",", ":"))
+
+
+def load_delta(data):
+    return json.loads(data)
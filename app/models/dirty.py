@@ -0,0 +1,65 @@
+METADATA_FIELDS = ("title", "password_hash", "file_path")
+
+
+class DirtyTracker:
+    """Remembers what a note looked like when it was last saved.
+
+    A state is a dict with title, body, translations, password_hash and
+    file_path. `changes(state)` compares it with the saved one so a save
+    only writes the parts that differ.
+    """
+
+    def __init__(self, saved=None):
+        # None: the note has never been saved, so everything is dirty
+        self.saved = self._snapshot(saved) if saved is not None else None
+
+    @staticmethod
+    def _snapshot(state):
+        return dict(state, translations=dict(state.get("translations") or {}))
+
+    def mark_saved(self, state):
+        self.saved = self._snapshot(state)
+
+    def mark_loaded(self, translations):
+        """Translations fetched after the note was opened are stored
+        already; adding them to the editor must not make it dirty."""
+        if self.saved is not None:
+            self.saved["translations"].update(translations)
+
+    def changes(self, state):
+        """What differs from the saved state.
+
+        Returns {"new": bool, "metadata": bool, "body": bool,
+        "translations": {lang: text} added or changed,
+        "removed": [lang, ...]}.
+        """
+        current = state.get("translations") or {}
+        if self.saved is None:
+            return {
+                "new": True,
+                "metadata": True,
+                "body": True,
+                "translations": dict(current),
+                "removed": [],
+            }
+        saved = self.saved["translations"]
+        return {
+            "new": False,
+            "metadata": any(
+                state.get(field) != self.saved.get(field)
+                for field in METADATA_FIELDS
+            ),
+            "body": state.get("body") != self.saved.get("body"),
+            "translations": {
+                lang: text for lang, text in current.items()
+                if saved.get(lang) != text
+            },
+            "removed": [lang for lang in saved if lang not in current],
+        }
+
+    def is_dirty(self, state):
+        changes = self.changes(state)
+        return bool(
+            changes["new"] or changes["metadata"] or changes["body"]
+            or changes["translations"] or changes["removed"]
+        )
@@ -0,0 +1,122 @@
+from array import array
+from bisect import bisect_right
+
+ORIGINAL, EDITED = 0, 1
+
+
+class LargeDocument:
+    """A long body shown in an editor, and which of its lines were edited.
+
+    `offsets` holds where each line of the loaded text starts, so line
+    and character positions convert with a bisect instead of a scan.
+    `segments` describes the editor's current lines, in order, as
+    [kind, first original line, line count] runs: ORIGINAL runs are
+    still the loaded text, EDITED runs must be read back from the editor.
+    Lines are counted from 0 and include their trailing newline.
+    """
+
+    __slots__ = ("text", "offsets", "segments")
+
+    def __init__(self, text):
+        self.text = text
+        self.offsets = array("Q", [0])
+        find = text.find
+        position = find("\n")
+        while position != -1:
+            self.offsets.append(position + 1)
+            position = find("\n", position + 1)
+        self.segments = [[ORIGINAL, 0, len(self.offsets)]]
+
+    @property
+    def line_count(self):
+        """Lines in the editor now, edits included."""
+        return sum(count for _, _, count in self.segments)
+
+    def line_of(self, offset):
+        """(line, column) of a character offset in the loaded text."""
+        line = bisect_right(self.offsets, offset) - 1
+        return line, offset - self.offsets[line]
+
+    def span(self, first, count):
+        """Original lines [first, first + count) as one string."""
+        end = first + count
+        stop = self.offsets[end] if end < len(self.offsets) else None
+        return self.text[self.offsets[first]:stop]
+
+    def chunks(self, size):
+        """The loaded text in pieces of about `size` characters, cut at
+        line ends where a line is shorter than that."""
+        start = 0
+        while start < len(self.text):
+            stop = start + size
+            if stop < len(self.text):
+                line_start = self.offsets[self.line_of(stop)[0]]
+                if line_start > start:
+                    stop = line_start
+            yield self.text[start:stop]
+            start = stop
+
+    def current_line(self, line):
+        """Where original `line` is in the editor now; None once edited."""
+        position = 0
+        for kind, first, count in self.segments:
+            if kind == ORIGINAL and first <= line < first + count:
+                return position + line - first
+            position += count
+        return None
+
+    # ----------------------
+    # Edits
+    # ----------------------
+    def _split(self, line):
+        """Index of the segment starting at current `line`, cutting the
+        segment that spans it in two if needed."""
+        position = 0
+        for i, (kind, first, count) in enumerate(self.segments):
+            if position == line:
+                return i
+            if position + count > line:
+                cut = line - position
+                self.segments[i:i + 1] = [
+                    [kind, first, cut], [kind, first + cut, count - cut]
+                ]
+                return i + 1
+            position += count
+        return len(self.segments)
+
+    def edit(self, line, old_count, new_count):
+        """Current lines [line, line + old_count) were replaced by
+        `new_count` lines typed, pasted or deleted in the editor."""
+        start = self._split(line)
+        stop = self._split(line + old_count)
+        self.segments[start:stop] = [[EDITED, 0, new_count]]
+        # Merge with edited neighbours so runs stay few and long
+        merged = []
+        for segment in self.segments:
+            if segment[2] == 0 and segment[0] == EDITED:
+                continue
+            if merged and merged[-1][0] == EDITED == segment[0]:
+                merged[-1][2] += segment[2]
+            else:
+                merged.append(segment)
+        self.segments = merged
+
+    def is_edited(self):
+        return any(kind == EDITED for kind, _, _ in self.segments)
+
+    def body(self, read):
+        """The editor's full text. read(line, count, last) returns current
+        lines [line, line + count) from the editor and is only called
+        for edited runs; `last` means the run ends the document."""
+        if not self.is_edited():
+            return self.text
+        parts = []
+        position = 0
+        total = self.line_count
+        for kind, first, count in self.segments:
+            if kind == ORIGINAL:
+                parts.append(self.span(first, count))
+            else:
+                parts.append(read(position, count, position + count == total))
+            position += count
+        return "".join(parts)
@@ -1,18 +1,90 @@
 import hashlib
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from ..metrics import instrumented, metrics, text_size
 from .base import BaseEntry
-from deep_translator import GoogleTranslator
+from .chunks import split_text
+
+CHUNK_WORKERS = 8  # pieces of one long text translated at a time
+
+# deep_translator (and the requests/bs4 stack behind it) is slow to
+# import, so it is loaded by the first translation
+GoogleTranslator = None
+
+
+def _translator_class():
+    global GoogleTranslator
+    if GoogleTranslator is None:
+        from deep_translator import GoogleTranslator as translator
+        GoogleTranslator = translator
+    return GoogleTranslator
+
+
+_translators = threading.local()
+
+
+def translator_for(source, target):
+    """A translator for the language pair, reused by the calling thread.
+
+    Building one validates both languages against the provider's list,
+    so each thread keeps one per pair instead of one per call.
+    """
+    cls = _translator_class()
+    pool = getattr(_translators, "pool", None)
+    if pool is None:
+        pool = _translators.pool = {}
+    key = (cls, source, target)
+    translator = pool.get(key)
+    if translator is None:
+        translator = pool[key] = cls(source=source, target=target)
+    return translator
+
+
+_chunk_pool = None
+_chunk_pool_lock = threading.Lock()
+
+
+def _chunk_executor():
+    """Pool shared by every long translation; its tasks never wait on it."""
+    global _chunk_pool
+    with _chunk_pool_lock:
+        if _chunk_pool is None:
+            _chunk_pool = ThreadPoolExecutor(
+                max_workers=CHUNK_WORKERS,
+                thread_name_prefix="translate-chunk",
+            )
+    return _chunk_pool
+
+
+def _implementer(entry, name):
+    """The layer under a feature that really implements method `name`."""
+    while isinstance(entry, EntryFeature) and \
+            getattr(type(entry), name) is getattr(EntryFeature, name):
+        entry = entry.entry
+    return entry
 
 
 class EntryFeature(BaseEntry):
+    __slots__ = ("entry", "base", "_reader", "_writer", "_describer")
+
     def __init__(self, entry: BaseEntry):
         self.entry = entry
+        self.base = entry.base
+        # Layers that only forward are skipped, so a call through any
+        # number of wrappers costs one hop
+        self._reader = _implementer(entry, "get_content")
+        self._writer = _implementer(entry, "edit_content")
+        self._describer = _implementer(entry, "metadata")
 
-    def get_content(self): return self.entry.get_content()
-    def edit_content(self, text): self.entry.edit_content(text)
-    def metadata(self): return self.entry.metadata()
+    def get_content(self): return self._reader.get_content()
+    def edit_content(self, text): self._writer.edit_content(text)
+    def metadata(self): return self._describer.metadata()
 
 
 class SecretEntry(EntryFeature):
+    __slots__ = ("password_hash", "locked")
+
     def __init__(self, entry, password: str):
         super().__init__(entry)
         self.password_hash = hashlib.sha256(password.encode()).hexdigest()
@@ -27,7 +99,7 @@ class SecretEntry(EntryFeature):
     def get_content(self):
         if self.locked:
             return "******** [LOCKED] ********"
-        return self.entry.get_content()
+        return super().get_content()
 
     def metadata(self):
         data = super().metadata()
@@ -36,17 +108,139 @@ class SecretEntry(EntryFeature):
 
 
 class MultilingualEntry(EntryFeature):
+    __slots__ = ("translations",)
+
+    # Shared TranslationCache, installed by the application at startup
+    cache = None
+
     def __init__(self, entry):
         super().__init__(entry)
         self.translations = {}
 
+    @instrumented("translate.add_language")
     def add_language(self, lang_code: str):
         content = self.get_content()
         try:
-            translated = GoogleTranslator(
-                source='auto',
-                target=lang_code).translate(content)
-            self.translations[lang_code] = translated
+            self.translations[lang_code] = self.translate(content, lang_code)
             return True
-        except Exception:
+        except Exception as e:
+            metrics.error("translate.add_language", e)
             return False
+
+    @instrumented("translate.add_languages")
+    def add_languages(self, lang_codes, on_result=None, max_workers=4,
+                      timeout=15.0, retries=2, backoff=0.5):
+        """Translates into several languages at once on a bounded pool.
+
+        Each call gets `timeout` seconds once it starts running, per
+        round of CHUNK_WORKERS pieces for long texts, and is retried up
+        to `retries` times. `on_result(lang, ok)` is called as soon as
+        each language finishes, from the calling thread, after the
+        result has been stored in `translations`. Returns {lang: ok}.
+        """
+        content = self.get_content()
+        rounds = -(-len(split_text(content)) // CHUNK_WORKERS)
+        timeout *= max(1, rounds)
+        attempts = dict.fromkeys(lang_codes, 0)
+        results = {}
+        started = {}
+        pending = {}
+        pool = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="translate"
+        )
+
+        def run(lang, token, attempt):
+            if attempt > 1:
+                time.sleep(backoff * 2 ** (attempt - 2))
+            started[token] = time.monotonic()
+            return self.translate(content, lang)
+
+        def submit(lang):
+            attempts[lang] += 1
+            token = object()
+            future = pool.submit(run, lang, token, attempts[lang])
+            pending[future] = (lang, token)
+
+        def finish(lang, ok):
+            results[lang] = ok
+            if on_result is not None:
+                on_result(lang, ok)
+
+        try:
+            for lang in attempts:
+                submit(lang)
+            while pending:
+                deadlines = [
+                    started[token] + timeout
+                    for _, token in pending.values() if token in started
+                ]
+                wait_for = (
+                    max(0.0, min(deadlines) - time.monotonic())
+                    if deadlines else timeout
+                )
+                done, _ = wait(
+                    pending, timeout=wait_for, return_when=FIRST_COMPLETED
+                )
+                now = time.monotonic()
+                for future in list(pending):
+                    lang, token = pending[future]
+                    if future in done:
+                        try:
+                            text = future.result()
+                        except Exception:
+                            text = None
+                    elif token in started and now - started[token] >= timeout:
+                        # Abandon the slow call; its result is ignored
+                        text = None
+                    else:
+                        continue
+                    del pending[future]
+                    if text is not None:
+                        self.translations[lang] = text
+                        finish(lang, True)
+                    elif attempts[lang] <= retries:
+                        submit(lang)
+                    else:
+                        finish(lang, False)
+        finally:
+            pool.shutdown(wait=False, cancel_futures=True)
+        return results
+
+    @instrumented("translate.translate", size=lambda r, *a, **k: text_size(r))
+    def translate(self, text: str, lang_code: str, source: str = 'auto'):
+        """Translates text, answering repeats from the cache.
+
+        Texts over CHUNK_CHARS are split by split_text, the pieces
+        translated concurrently and joined back in order. Pieces are
+        cached one by one, so after an edit only changed ones are sent.
+        """
+        pieces = split_text(text)
+        if len(pieces) <= 1:
+            return self._translate_text(text, lang_code, source)
+        return "".join(_chunk_executor().map(
+            lambda piece: self._translate_piece(piece, lang_code, source),
+            pieces,
+        ))
+
+    @instrumented("translate.piece", size=lambda r, *a, **k: text_size(r))
+    def _translate_piece(self, piece, lang_code, source):
+        # The translator drops surrounding whitespace; keep the original
+        # paragraph breaks around the translated text
+        text = piece.strip()
+        if not text:
+            return piece
+        start = piece.index(text)
+        return (piece[:start]
+                + self._translate_text(text, lang_code, source)
+                + piece[start + len(text):])
+
+    def _translate_text(self, text, lang_code, source):
+        cache = MultilingualEntry.cache
+        if cache is not None:
+            cached = cache.get(text, source, lang_code)
+            if cached is not None:
+                return cached
+        translated = translator_for(source, lang_code).translate(text)
+        if cache is not None:
+            cache.put(text, source, lang_code, translated)
+        return translated
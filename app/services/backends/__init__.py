@@ -0,0 +1,17 @@
+from .base import StorageBackend
+from .sqlite import SQLiteBackend
+
+
+def create_backend(config):
+    """Backend named by config["backend"]: "mysql" or "sqlite"."""
+    name = config.get("backend", "mysql")
+    if name == "sqlite":
+        return SQLiteBackend(config["sqlite_path"])
+    if name == "mysql":
+        # Imported lazily so SQLite-only installs need no server drivers
+        from .mysql_mongo import MySQLMongoBackend
+        return MySQLMongoBackend(config)
+    raise ValueError(f"Unknown storage backend: {name}")
+
+
+__all__ = ["StorageBackend", "SQLiteBackend", "create_backend"]
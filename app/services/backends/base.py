@@ -0,0 +1,276 @@
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+
+# Orders offered by list_notes: column and direction
+SORTS = {
+    "recent": ("updated_at", "DESC"),
+    "created": ("created_at", "DESC"),
+    "title": ("title", "ASC"),
+    "id": ("id", "ASC"),
+}
+
+
+def now():
+    """UTC timestamp as stored in created_at/updated_at."""
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d %H:%M:%S.%f")
+
+
+def count_words(text):
+    return len(text.split()) if text else 0
+
+
+class WordCounter:
+    """count_words over a text given in chunks, e.g. a streamed body."""
+
+    def __init__(self):
+        self.count = 0
+        self._in_word = False
+
+    def feed(self, chunk):
+        if not chunk:
+            return
+        self.count += len(chunk.split())
+        if self._in_word and not chunk[0].isspace():
+            self.count -= 1  # the word continues from the last chunk
+        self._in_word = not chunk[-1].isspace()
+
+
+def like_pattern(query):
+    """`query` as a LIKE pattern matching it anywhere, wildcards escaped."""
+    pattern = (
+        query.replace("\\", "\\\\")
+        .replace("%", "\\%")
+        .replace("_", "\\_")
+    )
+    return f"%{pattern}%"
+
+
+def listing_query(sort, after, limit, query, lang, languages_table,
+                  mark="?", escape=" ESCAPE '\\'"):
+    """SQL and parameters for one keyset page of list_notes.
+
+    The page continues after the row `after` (the previous page's last,
+    with its id and sort column) in `sort` order, so it is a range scan
+    on the sort column's index however deep the list is scrolled. Its
+    values are compared as they were read, so the row may have been
+    edited or deleted since. `languages_table` has (entry_id, lang) rows
+    for the has-translation filter.
+    """
+    column, order = SORTS[sort]
+    op = "<" if order == "DESC" else ">"
+    sql = (
+        "SELECT e.id, e.title, e.created_at, e.updated_at, e.word_count "
+        "FROM entries e"
+    )
+    params = []
+    where = []
+    if lang:
+        # A semi-join walks the sort index and stops after one page,
+        # instead of collecting and sorting every note in that language
+        where.append(
+            f"EXISTS (SELECT 1 FROM {languages_table} l"
+            f" WHERE l.entry_id = e.id AND l.lang = {mark})"
+        )
+        params.append(lang)
+    if query:
+        where.append(f"e.title LIKE {mark}{escape}")
+        params.append(like_pattern(query))
+    if after is not None:
+        if column == "id":
+            where.append(f"e.id {op} {mark}")
+            params.append(after["id"])
+        else:
+            # The first test alone is an index range; the second breaks
+            # ties between equal keys by id
+            where.append(
+                f"e.{column} {op}= {mark} "
+                f"AND (e.{column} {op} {mark} OR e.id {op} {mark})"
+            )
+            params += [after[column], after[column], after["id"]]
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += f" ORDER BY e.{column} {order}"
+    if column != "id":
+        sql += f", e.id {order}"
+    sql += f" LIMIT {mark}"
+    params.append(limit)
+    return sql, tuple(params)
+
+
+class StorageBackend(ABC):
+    """Where notes live. DatabaseService layers caching and search on top.
+
+    Metadata rows are dicts with id, title, type, password_hash and
+    file_path. Content documents are {"_id", "body", "translations"}.
+    """
+
+    @abstractmethod
+    def connect(self, report_error) -> None:
+        """Opens the stores; report_error(message) for each failure."""
+
+    def close(self) -> None:
+        pass
+
+    @abstractmethod
+    def get_all_titles(self) -> list:
+        pass
+
+    @abstractmethod
+    def get_titles_page(self, after_id=0, limit=50, query="") -> list:
+        pass
+
+    @abstractmethod
+    def list_notes(self, sort="recent", after=None, limit=50, query="",
+                   lang=None) -> list:
+        """One keyset page of {"id", "title", "created_at", "updated_at",
+        "word_count"} rows in a SORTS order, after the row `after` from
+        the page before, optionally only titles containing `query` and
+        notes translated into `lang`."""
+
+    @abstractmethod
+    def get_languages(self) -> list:
+        """Sorted codes of every language some note is translated into."""
+
+    @abstractmethod
+    def migrate(self) -> None:
+        """Brings the stores' schema up to date; connect() calls it."""
+
+    @abstractmethod
+    def get_linked_files(self) -> list:
+        """(id, file_path) rows of notes linked to a file on disk."""
+
+    @abstractmethod
+    def get_metadata(self, note_id):
+        pass
+
+    @abstractmethod
+    def save_metadata(self, meta: dict):
+        pass
+
+    @abstractmethod
+    def get_full_note(self, note_id):
+        pass
+
+    def get_content(self, note_id, langs=()):
+        """Body, the codes of all stored translations and the texts of
+        those in `langs`: {"body", "languages", "translations"} or None.
+
+        Stores that can project fields override this and the next method
+        so translations nobody looks at are never transferred.
+        """
+        doc = self.get_full_note(note_id)
+        if doc is None:
+            return None
+        translations = doc.get("translations") or {}
+        return {
+            "body": doc.get("body", ""),
+            "languages": sorted(translations),
+            "translations": {
+                lang: translations[lang] for lang in langs
+                if lang in translations
+            },
+        }
+
+    def get_translations(self, note_id, langs) -> dict:
+        """{lang: text} of the stored translations among `langs`."""
+        content = self.get_content(note_id, langs)
+        return content["translations"] if content else {}
+
+    @abstractmethod
+    def save_content(self, note_id, content: str, translations: dict = None):
+        pass
+
+    def save_content_chunks(self, note_id, chunks, translations=None):
+        """save_content for a body given as an iterable of strings.
+
+        Stores that can keep a body in pieces override this so the whole
+        body never has to be joined in memory. The server backend does
+        not: a MongoDB document holds its body as one string.
+        """
+        self.save_content(note_id, "".join(chunks), translations)
+
+    @abstractmethod
+    def update_content(self, note_id, body=None, translations=None,
+                       removed=()):
+        """Writes only what changed: the body unless it is None, the
+        given translations, and drops the languages in `removed`."""
+
+    @abstractmethod
+    def save_batch(self, notes) -> list:
+        pass
+
+    @abstractmethod
+    def update_batch(self, notes) -> None:
+        """Rewrites title, body and translations of existing notes.
+
+        Each note is a dict with id, title, body and translations.
+        """
+
+    @abstractmethod
+    def delete_note(self, note_id) -> None:
+        pass
+
+    @abstractmethod
+    def get_notes(self, ids, content=True) -> list:
+        """The notes among `ids` in iter_notes' format, in id order;
+        only their metadata rows when `content` is False."""
+
+    @abstractmethod
+    def delete_notes(self, ids) -> None:
+        """Deletes many notes with one transaction per store."""
+
+    @abstractmethod
+    def set_password_hash(self, ids, password_hash) -> None:
+        """Locks (or, with None, unlocks) many notes in one statement."""
+
+    @abstractmethod
+    def update_translations(self, updates) -> None:
+        """Adds or replaces translations of many notes in one write per
+        store; `updates` is {note_id: {lang: text}}."""
+
+    @abstractmethod
+    def iter_notes(self, batch_size=500, after_id=0):
+        """Yields every note with an id above `after_id`, in id order:
+        metadata, body and translations.
+
+        Rows are fetched `batch_size` at a time, so memory stays flat
+        however large the journal is.
+        """
+
+    # ----------------------
+    # Job checkpoints
+    # ----------------------
+    @abstractmethod
+    def get_checkpoint(self, job_id):
+        """State dict last saved for a background job, or None."""
+
+    @abstractmethod
+    def save_checkpoint(self, job_id, state: dict) -> None:
+        """Replaces a job's saved state; `state` must be JSON-friendly."""
+
+    @abstractmethod
+    def delete_checkpoint(self, job_id) -> None:
+        """Forgets a finished job."""
+
+    # ----------------------
+    # Revisions
+    # ----------------------
+    @abstractmethod
+    def get_revisions(self, note_id) -> list:
+        """{"number", "created_at", "snapshot", "length", "size"} of every
+        stored revision of a note, oldest first, without their data."""
+
+    @abstractmethod
+    def get_revision_chain(self, note_id, number=None) -> list:
+        """Revisions from the last snapshot at or before `number` (the
+        latest revision when None) up to it, oldest first, as
+        {"number", "snapshot", "data"}; [] when there are none."""
+
+    @abstractmethod
+    def save_revision(self, note_id, revision: dict) -> None:
+        """Stores {"number", "created_at", "snapshot", "length", "data"}:
+        the full text for a snapshot, else a dump_delta string."""
+
+    @abstractmethod
+    def iter_contents(self, batch_size=500):
+        """Yields every content document, fetched in batches."""
@@ -0,0 +1,724 @@
+from concurrent.futures import ThreadPoolExecutor
+from ...metrics import metrics
+from ..compression import TextCodec
+from ..pool import MySQLPool
+from .base import (
+    StorageBackend, count_words, like_pattern, listing_query, now,
+)
+
+
+def _add_listing_columns(backend, cur):
+    # DDL commits as it goes in MySQL; a step that fails half-way is
+    # finished by hand before the version is recorded
+    stamp = now()
+    cur.execute("ALTER TABLE entries ADD COLUMN created_at DATETIME(6)")
+    cur.execute("ALTER TABLE entries ADD COLUMN updated_at DATETIME(6)")
+    cur.execute(
+        "ALTER TABLE entries ADD COLUMN word_count INT NOT NULL DEFAULT 0"
+    )
+    cur.execute(
+        "UPDATE entries SET created_at = %s, updated_at = %s", (stamp, stamp)
+    )
+    cur.execute("CREATE INDEX entries_updated ON entries (updated_at, id)")
+    cur.execute("CREATE INDEX entries_created ON entries (created_at, id)")
+    cur.execute("CREATE INDEX entries_title ON entries (title, id)")
+    # Translations live in MongoDB; their language codes are mirrored
+    # here so the notes list can filter by language with a join
+    cur.execute(
+        "CREATE TABLE entry_languages ("
+        " entry_id INT NOT NULL,"
+        " lang VARCHAR(16) NOT NULL,"
+        " PRIMARY KEY (entry_id, lang))"
+    )
+    cur.execute("CREATE INDEX entry_languages_lang ON entry_languages (lang)")
+    if backend.mongo is None:
+        return
+    batch = []
+    for doc in backend.mongo.entries.find(
+        {}, {"body": 1, "translations": 1}, batch_size=500
+    ):
+        batch.append(doc)
+        if len(batch) >= 500:
+            _backfill(cur, batch)
+            batch = []
+    _backfill(cur, batch)
+
+
+def _backfill(cur, docs):
+    cur.executemany(
+        "UPDATE entries SET word_count = %s WHERE id = %s",
+        [(count_words(TextCodec.decode(doc.get("body", ""))), int(doc["_id"]))
+         for doc in docs],
+    )
+    cur.executemany(
+        "INSERT IGNORE INTO entry_languages (entry_id, lang) "
+        "VALUES (%s, %s)",
+        [(int(doc["_id"]), lang) for doc in docs
+         for lang in doc.get("translations") or {}],
+    )
+
+
+# (version, migration) in order; the schema_version table holds the
+# versions applied so far
+MIGRATIONS = [
+    (1, _add_listing_columns),
+]
+
+
+class MySQLMongoBackend(StorageBackend):
+    """MySQL `entries` table for metadata, MongoDB `entries` for content.
+
+    The pymysql and pymongo drivers are imported on first use, so merely
+    choosing this backend does not slow down start-up.
+    """
+
+    def __init__(self, config=None, mysql=None, mongo=None):
+        self.config = config or {}
+        self.mysql = mysql
+        self.mongo = mongo
+        # Long bodies and translations are compressed in MongoDB when
+        # JOURNAL_COMPRESSION is set; reads always decode them
+        self.codec = TextCodec.from_config(self.config)
+
+    def connect(self, report_error):
+        # Both servers are reached in parallel: start-up waits for the
+        # slower of the two, not their sum
+        with ThreadPoolExecutor(
+            max_workers=2, thread_name_prefix="connect"
+        ) as pool:
+            attempts = [
+                pool.submit(self._connect_mongo),
+                pool.submit(self._connect_mysql),
+            ]
+            for attempt in attempts:
+                error = attempt.result()
+                if error:
+                    report_error(error)
+        if self.mysql:
+            try:
+                self.migrate()
+            except Exception as e:
+                report_error(f"MySQL migration failed: {e}")
+
+    def migrate(self):
+        with self.mysql.cursor() as cur:
+            cur.execute(
+                "CREATE TABLE IF NOT EXISTS schema_version "
+                "(version INT NOT NULL)"
+            )
+            cur.execute("SELECT MAX(version) AS version FROM schema_version")
+            version = (cur.fetchone() or {}).get("version") or 0
+            for target, migration in MIGRATIONS:
+                if version < target:
+                    migration(self, cur)
+                    cur.execute(
+                        "INSERT INTO schema_version (version) VALUES (%s)",
+                        (target,),
+                    )
+                    version = target
+
+    def _connect_mongo(self):
+        from pymongo import MongoClient
+        try:
+            # One client for the whole app; it pools its own sockets
+            client = MongoClient(
+                self.config.get("mongo_uri", "mongodb://localhost:27017"),
+                serverSelectionTimeoutMS=2000,
+                maxPoolSize=10,
+            )
+            self.mongo = client[self.config.get("mongo_database", "journal")]
+            client.admin.command("ping")
+            self.mongo.revisions.create_index(
+                [("note_id", 1), ("number", 1)]
+            )
+        except Exception as e:
+            return f"MongoDB connection failed: {e}"
+
+    def _connect_mysql(self):
+        import pymysql
+
+        def connect():
+            return pymysql.connect(
+                host=self.config.get("mysql_host", "localhost"),
+                user=self.config.get("mysql_user", "root"),
+                password=self.config.get("mysql_password", "root"),
+                database=self.config.get("mysql_database", "journal_db"),
+                cursorclass=pymysql.cursors.DictCursor,
+                autocommit=True,
+            )
+
+        try:
+            pool = MySQLPool(connect, max_size=5)
+            pool.prefill(1)
+            self.mysql = pool
+        except Exception as e:
+            return f"MySQL Connection failed: {e}"
+
+    def close(self):
+        if isinstance(self.mysql, MySQLPool):
+            self.mysql.close()
+        if self.mongo is not None:
+            self.mongo.client.close()
+
+    # ----------------------
+    # MySQL: metadata
+    # ----------------------
+    def get_all_titles(self):
+        if not self.mysql:
+            return []
+        try:
+            with self.mysql.cursor() as cur:
+                query = "SELECT id, title FROM entries"
+                cur.execute(query)
+                return cur.fetchall()
+
+        except Exception as e:
+            metrics.error("mysql.get_all_titles", e)
+            return []
+
+    def get_titles_page(self, after_id=0, limit=50, query=""):
+        if not self.mysql:
+            return []
+        try:
+            with self.mysql.cursor() as cur:
+                if query:
+                    cur.execute(
+                        "SELECT id, title FROM entries "
+                        "WHERE id > %s AND title LIKE %s "
+                        "ORDER BY id LIMIT %s",
+                        (after_id, like_pattern(query), limit),
+                    )
+                else:
+                    cur.execute(
+                        "SELECT id, title FROM entries "
+                        "WHERE id > %s ORDER BY id LIMIT %s",
+                        (after_id, limit),
+                    )
+                return cur.fetchall()
+
+        except Exception as e:
+            metrics.error("mysql.get_titles_page", e)
+            return []
+
+    def list_notes(self, sort="recent", after=None, limit=50, query="",
+                   lang=None):
+        if not self.mysql:
+            return []
+        # MySQL escapes LIKE patterns with a backslash by default
+        sql, params = listing_query(
+            sort, after, limit, query, lang, "entry_languages",
+            mark="%s", escape="",
+        )
+        try:
+            with self.mysql.cursor() as cur:
+                cur.execute(sql, params)
+                return cur.fetchall()
+        except Exception as e:
+            metrics.error("mysql.list_notes", e)
+            return []
+
+    def get_languages(self):
+        if not self.mysql:
+            return []
+        with self.mysql.cursor() as cur:
+            cur.execute(
+                "SELECT DISTINCT lang FROM entry_languages ORDER BY lang"
+            )
+            return [row["lang"] for row in cur.fetchall()]
+
+    def get_linked_files(self):
+        if not self.mysql:
+            return []
+        with self.mysql.cursor() as cur:
+            cur.execute(
+                "SELECT id, file_path FROM entries "
+                "WHERE file_path IS NOT NULL AND file_path <> ''"
+            )
+            return cur.fetchall()
+
+    def get_metadata(self, note_id):
+        if not self.mysql:
+            return None
+        with self.mysql.cursor() as cur:
+            cur.execute(
+                "SELECT title, password_hash, file_path "
+                "FROM entries WHERE id = %s",
+                (note_id,),
+            )
+            return cur.fetchone()
+
+    def save_metadata(self, meta: dict):
+        stamp = now()
+        with self.mysql.cursor() as cur:
+            if meta.get("id"):
+                query = (
+                    "UPDATE entries SET title=%s, type=%s, password_hash=%s, "
+                    "file_path=%s, updated_at=%s WHERE id=%s"
+                )
+                values = (
+                    meta["title"],
+                    meta["type"],
+                    meta["password_hash"],
+                    meta["file_path"],
+                    stamp,
+                    meta["id"],
+                )
+                cur.execute(query, values)
+                return meta["id"]
+            else:
+                query = (
+                        "INSERT INTO entries (title,"
+                        " type,password_hash, file_path,"
+                        " created_at, updated_at)"
+                        " VALUES (%s, %s, %s, %s, %s, %s)"
+                    )
+
+                values = (
+                    meta["title"],
+                    meta["type"],
+                    meta["password_hash"],
+                    meta["file_path"],
+                    stamp,
+                    stamp,
+                )
+                cur.execute(query, values)
+                return cur.lastrowid
+
+    def _touch(self, note_id, body=None, languages=(), removed=(),
+               replace=False):
+        """Brings the listing columns in MySQL in line with a content
+        write to MongoDB: updated_at, word_count when the body changed,
+        and entry_languages (all of it when `replace`)."""
+        if not self.mysql:
+            return
+        try:
+            with self.mysql.cursor() as cur:
+                if body is None:
+                    cur.execute(
+                        "UPDATE entries SET updated_at = %s WHERE id = %s",
+                        (now(), note_id),
+                    )
+                else:
+                    cur.execute(
+                        "UPDATE entries SET updated_at = %s, word_count = %s"
+                        " WHERE id = %s",
+                        (now(), count_words(body), note_id),
+                    )
+                if replace:
+                    cur.execute(
+                        "DELETE FROM entry_languages WHERE entry_id = %s",
+                        (note_id,),
+                    )
+                if removed:
+                    cur.executemany(
+                        "DELETE FROM entry_languages "
+                        "WHERE entry_id = %s AND lang = %s",
+                        [(note_id, lang) for lang in removed],
+                    )
+                if languages:
+                    cur.executemany(
+                        "INSERT IGNORE INTO entry_languages (entry_id, lang) "
+                        "VALUES (%s, %s)",
+                        [(note_id, lang) for lang in languages],
+                    )
+        except Exception as e:
+            # Only the list's sorting and filters are out of date
+            metrics.error("mysql.touch", e)
+
+    # ----------------------
+    # MongoDB: content
+    # ----------------------
+    @staticmethod
+    def _decoded(doc):
+        if doc is None:
+            return None
+        return dict(
+            doc,
+            body=TextCodec.decode(doc.get("body", "")),
+            translations=TextCodec.decode_all(doc.get("translations")),
+        )
+
+    def _encoded(self, body, translations):
+        return {
+            "body": self.codec.encode(body),
+            "translations": self.codec.encode_all(translations),
+        }
+
+    def get_full_note(self, note_id):
+        if self.mongo is None:
+            return None
+        return self._decoded(
+            self.mongo.entries.find_one({"_id": str(note_id)})
+        )
+
+    def get_content(self, note_id, langs=()):
+        if self.mongo is None:
+            return None
+        # Computed projection (MongoDB 4.4+): the server lists the keys
+        # of `translations` and sends only the texts asked for
+        projection = {
+            "body": 1,
+            "languages": {"$map": {
+                "input": {"$objectToArray": {
+                    "$ifNull": ["$translations", {}]
+                }},
+                "as": "translation",
+                "in": "$$translation.k",
+            }},
+        }
+        projection.update({f"translations.{lang}": 1 for lang in langs})
+        doc = self.mongo.entries.find_one({"_id": str(note_id)}, projection)
+        if doc is None:
+            return None
+        return {
+            "body": TextCodec.decode(doc.get("body", "")),
+            "languages": sorted(doc.get("languages") or []),
+            "translations": TextCodec.decode_all(doc.get("translations")),
+        }
+
+    def get_translations(self, note_id, langs):
+        if self.mongo is None or not langs:
+            return {}
+        doc = self.mongo.entries.find_one(
+            {"_id": str(note_id)},
+            {f"translations.{lang}": 1 for lang in langs},
+        )
+        return TextCodec.decode_all((doc or {}).get("translations"))
+
+    def save_content(self, note_id, content: str, translations: dict = None):
+        if self.mongo is not None:
+            self.mongo.entries.update_one(
+                {"_id": str(note_id)},
+                {"$set": self._encoded(content, translations)},
+                upsert=True,
+            )
+        self._touch(note_id, content, list(translations or {}), replace=True)
+
+    def update_content(self, note_id, body=None, translations=None,
+                       removed=()):
+        if self.mongo is None:
+            return
+        fields = {f"translations.{lang}": self.codec.encode(text)
+                  for lang, text in (translations or {}).items()}
+        if body is not None:
+            fields["body"] = self.codec.encode(body)
+        update = {}
+        if fields:
+            update["$set"] = fields
+        if removed:
+            update["$unset"] = {f"translations.{lang}": "" for lang in removed}
+        if update:
+            self.mongo.entries.update_one(
+                {"_id": str(note_id)}, update, upsert=True
+            )
+            self._touch(note_id, body, list(translations or {}), removed)
+
+    def iter_notes(self, batch_size=500, after_id=0):
+        if not self.mysql:
+            return
+        last_id = after_id or 0
+        while True:
+            # One keyset page per query, each on a pooled connection held
+            # only while it runs: callers may spend minutes on a batch, and
+            # a cursor left open that long would hit net_write_timeout
+            with self.mysql.cursor() as cur:
+                cur.execute(
+                    "SELECT id, title, type, password_hash, file_path "
+                    "FROM entries WHERE id > %s ORDER BY id LIMIT %s",
+                    (last_id, batch_size),
+                )
+                rows = cur.fetchall()
+            if not rows:
+                return
+            yield from self._with_content(rows)
+            last_id = rows[-1]["id"]
+
+    def _with_content(self, rows):
+        """Metadata rows joined with their MongoDB documents, one query."""
+        docs = {}
+        if self.mongo is not None and rows:
+            found = self.mongo.entries.find(
+                {"_id": {"$in": [str(r["id"]) for r in rows]}},
+                batch_size=len(rows),
+            )
+            docs = {doc["_id"]: doc for doc in found}
+        for row in rows:
+            doc = docs.get(str(row["id"])) or {}
+            yield dict(
+                row,
+                body=TextCodec.decode(doc.get("body", "")),
+                translations=TextCodec.decode_all(doc.get("translations")),
+            )
+
+    def iter_contents(self, batch_size=500):
+        if self.mongo is None:
+            return
+        for doc in self.mongo.entries.find(
+            {}, {"body": 1, "translations": 1}, batch_size=batch_size
+        ):
+            yield self._decoded(doc)
+
+    # ----------------------
+    # Both stores
+    # ----------------------
+    def save_batch(self, notes):
+        from pymongo import UpdateOne
+        if not notes:
+            return []
+        stamp = now()
+        with self.mysql.transaction() as cur:
+            # One INSERT per row: each lastrowid is that row's own id, so
+            # ids stay right whatever auto_increment settings or other
+            # clients do; the transaction still commits them together
+            ids = []
+            for n in notes:
+                cur.execute(
+                    "INSERT INTO entries (title, type, password_hash,"
+                    " file_path, created_at, updated_at, word_count)"
+                    " VALUES (%s, %s, %s, %s, %s, %s, %s)",
+                    (n["title"], n.get("type", "TEXT"),
+                     n.get("password_hash"), n.get("file_path"),
+                     stamp, stamp, count_words(n.get("body", ""))),
+                )
+                ids.append(cur.lastrowid)
+            cur.executemany(
+                "INSERT IGNORE INTO entry_languages (entry_id, lang) "
+                "VALUES (%s, %s)",
+                [
+                    (note_id, lang)
+                    for note_id, n in zip(ids, notes)
+                    for lang in n.get("translations") or {}
+                ],
+            )
+
+        if self.mongo is not None:
+            self.mongo.entries.bulk_write(
+                [
+                    UpdateOne(
+                        {"_id": str(note_id)},
+                        {"$set": self._encoded(
+                            n.get("body", ""), n.get("translations")
+                        )},
+                        upsert=True,
+                    )
+                    for note_id, n in zip(ids, notes)
+                ],
+                ordered=False,
+            )
+        return ids
+
+    def update_batch(self, notes):
+        from pymongo import UpdateOne
+        if not notes:
+            return
+        stamp = now()
+        with self.mysql.cursor() as cur:
+            cur.executemany(
+                "UPDATE entries SET title = %s, updated_at = %s, "
+                "word_count = %s WHERE id = %s",
+                [
+                    (n["title"], stamp, count_words(n.get("body", "")),
+                     n["id"])
+                    for n in notes
+                ],
+            )
+            ids = [n["id"] for n in notes]
+            cur.execute(
+                "DELETE FROM entry_languages WHERE entry_id IN ({})".format(
+                    ", ".join(["%s"] * len(ids))
+                ),
+                ids,
+            )
+            cur.executemany(
+                "INSERT IGNORE INTO entry_languages (entry_id, lang) "
+                "VALUES (%s, %s)",
+                [
+                    (n["id"], lang) for n in notes
+                    for lang in n.get("translations") or {}
+                ],
+            )
+        if self.mongo is not None:
+            self.mongo.entries.bulk_write(
+                [
+                    UpdateOne(
+                        {"_id": str(n["id"])},
+                        {"$set": self._encoded(
+                            n.get("body", ""), n.get("translations")
+                        )},
+                        upsert=True,
+                    )
+                    for n in notes
+                ],
+                ordered=False,
+            )
+
+    def delete_note(self, note_id):
+        if self.mysql:
+            try:
+                with self.mysql.cursor() as cur:
+                    cur.execute(
+                        "DELETE FROM entries WHERE id = %s", (note_id,)
+                    )
+                    cur.execute(
+                        "DELETE FROM entry_languages WHERE entry_id = %s",
+                        (note_id,),
+                    )
+            except Exception as e:
+                metrics.error("mysql.delete_note", e)
+                print(f"SQL Delete Error: {e}")
+
+        if self.mongo is not None:
+            self.mongo.entries.delete_one({"_id": str(note_id)})
+            self.mongo.revisions.delete_many({"note_id": int(note_id)})
+
+    # ----------------------
+    # Job checkpoints
+    # ----------------------
+    # Kept in MongoDB's job_checkpoints collection, one document per job
+    def get_checkpoint(self, job_id):
+        if self.mongo is None:
+            return None
+        doc = self.mongo.job_checkpoints.find_one({"_id": job_id})
+        return doc["state"] if doc else None
+
+    def save_checkpoint(self, job_id, state):
+        if self.mongo is None:
+            raise RuntimeError("MongoDB is not connected")
+        self.mongo.job_checkpoints.update_one(
+            {"_id": job_id},
+            {"$set": {"state": state, "updated_at": now()}},
+            upsert=True,
+        )
+
+    def delete_checkpoint(self, job_id):
+        if self.mongo is not None:
+            self.mongo.job_checkpoints.delete_one({"_id": job_id})
+
+    # ----------------------
+    # Revisions
+    # ----------------------
+    # MongoDB's revisions collection, one document per revision with
+    # _id "<note id>:<number>"; snapshots go through the text codec
+    def get_revisions(self, note_id):
+        if self.mongo is None:
+            return []
+        return [
+            {key: doc[key] for key in
+             ("number", "created_at", "snapshot", "length", "size")}
+            for doc in self.mongo.revisions.find(
+                {"note_id": int(note_id)},
+                {"number": 1, "created_at": 1, "snapshot": 1, "length": 1,
+                 "size": 1},
+            ).sort("number", 1)
+        ]
+
+    def get_revision_chain(self, note_id, number=None):
+        if self.mongo is None:
+            return []
+        note_id = int(note_id)
+        last = {"$lte": number} if number is not None else {"$gte": 0}
+        snapshot = next(iter(self.mongo.revisions.find(
+            {"note_id": note_id, "snapshot": True, "number": last},
+            {"number": 1},
+        ).sort("number", -1).limit(1)), None)
+        if snapshot is None:
+            return []
+        docs = self.mongo.revisions.find({
+            "note_id": note_id,
+            "number": dict(last, **{"$gte": snapshot["number"]}),
+        }).sort("number", 1)
+        return [
+            {"number": doc["number"], "snapshot": doc["snapshot"],
+             "data": TextCodec.decode(doc["data"])}
+            for doc in docs
+        ]
+
+    def save_revision(self, note_id, revision):
+        if self.mongo is None:
+            raise RuntimeError("MongoDB is not connected")
+        self.mongo.revisions.update_one(
+            {"_id": f"{int(note_id)}:{revision['number']}"},
+            {"$set": dict(
+                revision, note_id=int(note_id),
+                size=len(revision["data"]),
+                data=self.codec.encode(revision["data"]),
+            )},
+            upsert=True,
+        )
+
+    def get_notes(self, ids, content=True):
+        if not self.mysql or not ids:
+            return []
+        with self.mysql.cursor() as cur:
+            cur.execute(
+                "SELECT id, title, type, password_hash, file_path "
+                "FROM entries WHERE id IN ({}) ORDER BY id".format(
+                    ", ".join(["%s"] * len(ids))
+                ),
+                [int(note_id) for note_id in ids],
+            )
+            rows = cur.fetchall()
+        return list(self._with_content(rows)) if content else rows
+
+    def delete_notes(self, ids):
+        if not ids:
+            return
+        ids = [int(note_id) for note_id in ids]
+        marks = ", ".join(["%s"] * len(ids))
+        if self.mysql:
+            with self.mysql.transaction() as cur:
+                cur.execute(f"DELETE FROM entries WHERE id IN ({marks})", ids)
+                cur.execute(
+                    f"DELETE FROM entry_languages WHERE entry_id IN ({marks})",
+                    ids,
+                )
+        if self.mongo is not None:
+            self.mongo.entries.delete_many(
+                {"_id": {"$in": [str(note_id) for note_id in ids]}}
+            )
+            self.mongo.revisions.delete_many({"note_id": {"$in": ids}})
+
+    def set_password_hash(self, ids, password_hash):
+        if not ids:
+            return
+        with self.mysql.cursor() as cur:
+            cur.execute(
+                "UPDATE entries SET password_hash = %s, updated_at = %s "
+                "WHERE id IN ({})".format(", ".join(["%s"] * len(ids))),
+                [password_hash, now(), *[int(note_id) for note_id in ids]],
+            )
+
+    def update_translations(self, updates):
+        from pymongo import UpdateOne
+        if not updates:
+            return
+        requests = [
+            UpdateOne(
+                {"_id": str(note_id)},
+                {"$set": {
+                    f"translations.{lang}": self.codec.encode(text)
+                    for lang, text in translations.items()
+                }},
+                upsert=True,
+            )
+            for note_id, translations in updates.items() if translations
+        ]
+        if self.mongo is not None and requests:
+            self.mongo.entries.bulk_write(requests, ordered=False)
+        if self.mysql:
+            ids = [int(note_id) for note_id in updates]
+            with self.mysql.transaction() as cur:
+                cur.executemany(
+                    "INSERT IGNORE INTO entry_languages (entry_id, lang) "
+                    "VALUES (%s, %s)",
+                    [
+                        (int(note_id), lang)
+                        for note_id, translations in updates.items()
+                        for lang in translations
+                    ],
+                )
+                cur.execute(
+                    "UPDATE entries SET updated_at = %s WHERE id IN ({})"
+                    .format(", ".join(["%s"] * len(ids))),
+                    [now(), *ids],
+                )
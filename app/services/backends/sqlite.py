@@ -0,0 +1,682 @@
+import itertools
+import json
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from .base import (
+    StorageBackend, WordCounter, count_words, like_pattern, listing_query,
+    now,
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT NOT NULL,
+    type TEXT NOT NULL DEFAULT 'TEXT' CHECK (type IN ('TEXT', 'FILE')),
+    password_hash TEXT,
+    file_path TEXT
+);
+CREATE TABLE IF NOT EXISTS contents (
+    entry_id INTEGER PRIMARY KEY,
+    body TEXT NOT NULL DEFAULT ''
+);
+-- Bodies streamed in by save_content_chunks, one row per chunk, so a
+-- large file is written once instead of being rewritten per chunk;
+-- contents.body is '' for those notes
+CREATE TABLE IF NOT EXISTS content_chunks (
+    entry_id INTEGER NOT NULL,
+    seq INTEGER NOT NULL,
+    text TEXT NOT NULL,
+    PRIMARY KEY (entry_id, seq)
+);
+CREATE TABLE IF NOT EXISTS translations (
+    entry_id INTEGER NOT NULL,
+    lang TEXT NOT NULL,
+    text TEXT NOT NULL,
+    PRIMARY KEY (entry_id, lang)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS job_checkpoints (
+    id TEXT PRIMARY KEY,
+    state TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS revisions (
+    entry_id INTEGER NOT NULL,
+    number INTEGER NOT NULL,
+    created_at TEXT NOT NULL,
+    snapshot INTEGER NOT NULL,
+    length INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (entry_id, number)
+);
+"""
+
+
+def _add_listing_columns(conn):
+    # Rows written before this migration get its date as both stamps
+    stamp = now()
+    conn.execute("ALTER TABLE entries ADD COLUMN created_at TEXT")
+    conn.execute("ALTER TABLE entries ADD COLUMN updated_at TEXT")
+    conn.execute(
+        "ALTER TABLE entries ADD COLUMN word_count INTEGER NOT NULL DEFAULT 0"
+    )
+    conn.execute(
+        "UPDATE entries SET created_at = ?, updated_at = ?", (stamp, stamp)
+    )
+    conn.execute(
+        "CREATE INDEX entries_updated ON entries (updated_at, id)"
+    )
+    conn.execute(
+        "CREATE INDEX entries_created ON entries (created_at, id)"
+    )
+    conn.execute("CREATE INDEX entries_title ON entries (title, id)")
+    # get_languages reads the distinct codes from this index alone
+    conn.execute(
+        "CREATE INDEX translations_lang ON translations (lang, entry_id)"
+    )
+    last_id = 0
+    while True:
+        rows = conn.execute(
+            "SELECT entry_id, body FROM contents WHERE entry_id > ? "
+            "ORDER BY entry_id LIMIT 500",
+            (last_id,),
+        ).fetchall()
+        if not rows:
+            return
+        conn.executemany(
+            "UPDATE entries SET word_count = ? WHERE id = ?",
+            [(count_words(row["body"]), row["entry_id"]) for row in rows],
+        )
+        last_id = rows[-1]["entry_id"]
+
+
+# (version, migration) in order; PRAGMA user_version holds the last applied
+MIGRATIONS = [
+    (1, _add_listing_columns),
+]
+
+_memory_ids = itertools.count(1)
+
+
+class SQLiteBackend(StorageBackend):
+    """Metadata, bodies and translations in one local SQLite file.
+
+    Each thread gets its own connection; WAL mode lets readers run while
+    a save is being written. Statements are fixed strings with ?
+    placeholders, so sqlite3's statement cache reuses their prepared form.
+    """
+
+    def __init__(self, path):
+        if path == ":memory:":
+            # Shared-cache URI so every thread sees the same database
+            self._target = f"file:journal_mem_{next(_memory_ids)}" \
+                           "?mode=memory&cache=shared"
+            self._uri = True
+        else:
+            directory = os.path.dirname(path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._target = path
+            self._uri = False
+        self._local = threading.local()
+        self._keepalive = None
+        self._write_lock = threading.Lock()
+
+    def connect(self, report_error):
+        try:
+            conn = self._conn()
+            conn.executescript(SCHEMA)
+            # Holds a shared in-memory database open for its lifetime
+            self._keepalive = conn
+            self.migrate()
+        except Exception as e:
+            report_error(f"SQLite connection failed: {e}")
+
+    def migrate(self):
+        version = self._conn().execute("PRAGMA user_version").fetchone()[0]
+        for target, migration in MIGRATIONS:
+            if version < target:
+                # Each step commits with its version or not at all
+                with self._transaction() as conn:
+                    migration(conn)
+                    conn.execute(f"PRAGMA user_version = {target}")
+                version = target
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+        self._keepalive = None
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(
+                self._target,
+                uri=self._uri,
+                timeout=10,
+                isolation_level=None,
+                cached_statements=256,
+            )
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        # One writer at a time inside the process; IMMEDIATE takes the
+        # file's write lock up front so id allocation below is stable
+        with self._write_lock:
+            conn = self._conn()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield conn
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+    # ----------------------
+    # Metadata
+    # ----------------------
+    def get_all_titles(self):
+        rows = self._conn().execute("SELECT id, title FROM entries")
+        return [dict(row) for row in rows]
+
+    def get_titles_page(self, after_id=0, limit=50, query=""):
+        if query:
+            rows = self._conn().execute(
+                "SELECT id, title FROM entries "
+                "WHERE id > ? AND title LIKE ? ESCAPE '\\' "
+                "ORDER BY id LIMIT ?",
+                (after_id, like_pattern(query), limit),
+            )
+        else:
+            rows = self._conn().execute(
+                "SELECT id, title FROM entries "
+                "WHERE id > ? ORDER BY id LIMIT ?",
+                (after_id, limit),
+            )
+        return [dict(row) for row in rows]
+
+    def list_notes(self, sort="recent", after=None, limit=50, query="",
+                   lang=None):
+        sql, params = listing_query(
+            sort, after, limit, query, lang, "translations"
+        )
+        return [dict(row) for row in self._conn().execute(sql, params)]
+
+    def get_languages(self):
+        rows = self._conn().execute(
+            "SELECT DISTINCT lang FROM translations ORDER BY lang"
+        )
+        return [row["lang"] for row in rows]
+
+    def get_linked_files(self):
+        rows = self._conn().execute(
+            "SELECT id, file_path FROM entries "
+            "WHERE file_path IS NOT NULL AND file_path <> ''"
+        )
+        return [dict(row) for row in rows]
+
+    def get_metadata(self, note_id):
+        row = self._conn().execute(
+            "SELECT title, password_hash, file_path "
+            "FROM entries WHERE id = ?",
+            (note_id,),
+        ).fetchone()
+        return dict(row) if row else None
+
+    def save_metadata(self, meta: dict):
+        values = (
+            meta["title"],
+            meta["type"],
+            meta["password_hash"],
+            meta["file_path"],
+        )
+        stamp = now()
+        with self._transaction() as conn:
+            if meta.get("id"):
+                conn.execute(
+                    "UPDATE entries SET title = ?, type = ?, "
+                    "password_hash = ?, file_path = ?, updated_at = ? "
+                    "WHERE id = ?",
+                    values + (stamp, meta["id"]),
+                )
+                return meta["id"]
+            cur = conn.execute(
+                "INSERT INTO entries (title, type, password_hash, file_path,"
+                " created_at, updated_at) VALUES (?, ?, ?, ?, ?, ?)",
+                values + (stamp, stamp),
+            )
+            return cur.lastrowid
+
+    # ----------------------
+    # Content
+    # ----------------------
+    def get_full_note(self, note_id):
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT body FROM contents WHERE entry_id = ?", (note_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        translations = dict(conn.execute(
+            "SELECT lang, text FROM translations WHERE entry_id = ?",
+            (note_id,),
+        ).fetchall())
+        return {
+            "_id": str(note_id),
+            "body": self._chunked_bodies(conn, [note_id]).get(
+                int(note_id), row["body"]
+            ),
+            "translations": translations,
+        }
+
+    def get_content(self, note_id, langs=()):
+        conn = self._conn()
+        row = conn.execute(
+            "SELECT body FROM contents WHERE entry_id = ?", (note_id,)
+        ).fetchone()
+        if row is None:
+            return None
+        # Read from the (entry_id, lang) key alone, without the texts
+        languages = [lang for (lang,) in conn.execute(
+            "SELECT lang FROM translations WHERE entry_id = ? ORDER BY lang",
+            (note_id,),
+        )]
+        return {
+            "body": self._chunked_bodies(conn, [note_id]).get(
+                int(note_id), row["body"]
+            ),
+            "languages": languages,
+            "translations": self._select_translations(conn, note_id, langs),
+        }
+
+    def get_translations(self, note_id, langs):
+        return self._select_translations(self._conn(), note_id, langs)
+
+    @staticmethod
+    def _select_translations(conn, note_id, langs):
+        langs = list(langs)
+        if not langs:
+            return {}
+        marks = ",".join("?" * len(langs))
+        return dict(conn.execute(
+            "SELECT lang, text FROM translations "
+            f"WHERE entry_id = ? AND lang IN ({marks})",
+            [note_id, *langs],
+        ).fetchall())
+
+    def save_content(self, note_id, content: str, translations: dict = None):
+        with self._transaction() as conn:
+            self._write_content(conn, int(note_id), content, translations)
+
+    def save_content_chunks(self, note_id, chunks, translations=None):
+        note_id = int(note_id)
+        words = WordCounter()
+        with self._transaction() as conn:
+            self._write_content(conn, note_id, "", translations)
+            for seq, chunk in enumerate(chunks):
+                words.feed(chunk)
+                conn.execute(
+                    "INSERT INTO content_chunks (entry_id, seq, text) "
+                    "VALUES (?, ?, ?)",
+                    (note_id, seq, chunk),
+                )
+            conn.execute(
+                "UPDATE entries SET word_count = ? WHERE id = ?",
+                (words.count, note_id),
+            )
+
+    @staticmethod
+    def _write_content(conn, note_id, content, translations):
+        conn.execute(
+            "UPDATE entries SET updated_at = ?, word_count = ? WHERE id = ?",
+            (now(), count_words(content), note_id),
+        )
+        conn.execute(
+            "INSERT INTO contents (entry_id, body) VALUES (?, ?) "
+            "ON CONFLICT(entry_id) DO UPDATE SET body = excluded.body",
+            (note_id, content),
+        )
+        conn.execute(
+            "DELETE FROM content_chunks WHERE entry_id = ?", (note_id,)
+        )
+        conn.execute(
+            "DELETE FROM translations WHERE entry_id = ?", (note_id,)
+        )
+        if translations:
+            conn.executemany(
+                "INSERT INTO translations (entry_id, lang, text) "
+                "VALUES (?, ?, ?)",
+                [(note_id, lang, text) for lang, text in translations.items()],
+            )
+
+    def update_content(self, note_id, body=None, translations=None,
+                       removed=()):
+        note_id = int(note_id)
+        with self._transaction() as conn:
+            if body is None:
+                conn.execute(
+                    "UPDATE entries SET updated_at = ? WHERE id = ?",
+                    (now(), note_id),
+                )
+            else:
+                conn.execute(
+                    "UPDATE entries SET updated_at = ?, word_count = ? "
+                    "WHERE id = ?",
+                    (now(), count_words(body), note_id),
+                )
+            if body is not None:
+                conn.execute(
+                    "INSERT INTO contents (entry_id, body) VALUES (?, ?) "
+                    "ON CONFLICT(entry_id) DO UPDATE SET body = excluded.body",
+                    (note_id, body),
+                )
+                conn.execute(
+                    "DELETE FROM content_chunks WHERE entry_id = ?",
+                    (note_id,),
+                )
+            if translations:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO translations "
+                    "(entry_id, lang, text) VALUES (?, ?, ?)",
+                    [(note_id, lang, text)
+                     for lang, text in translations.items()],
+                )
+            if removed:
+                conn.executemany(
+                    "DELETE FROM translations WHERE entry_id = ? AND lang = ?",
+                    [(note_id, lang) for lang in removed],
+                )
+
+    def iter_notes(self, batch_size=500, after_id=0):
+        last_id = after_id or 0
+        conn = self._conn()
+        while True:
+            rows = conn.execute(
+                "SELECT e.id, e.title, e.type, e.password_hash, e.file_path,"
+                " COALESCE(c.body, '') AS body "
+                "FROM entries e LEFT JOIN contents c ON c.entry_id = e.id "
+                "WHERE e.id > ? ORDER BY e.id LIMIT ?",
+                (last_id, batch_size),
+            ).fetchall()
+            if not rows:
+                return
+            ids = [row["id"] for row in rows]
+            translations = self._translations_for(conn, ids)
+            bodies = self._chunked_bodies(conn, ids)
+            for row in rows:
+                yield dict(
+                    row, body=bodies.get(row["id"], row["body"]),
+                    translations=translations.get(row["id"], {}),
+                )
+            last_id = rows[-1]["id"]
+
+    @staticmethod
+    def _chunked_bodies(conn, ids):
+        """{id: body} of the notes among `ids` stored as content_chunks."""
+        parts = {}
+        marks = ",".join("?" * len(ids))
+        for entry_id, text in conn.execute(
+            "SELECT entry_id, text FROM content_chunks "
+            f"WHERE entry_id IN ({marks}) ORDER BY entry_id, seq",
+            [int(i) for i in ids],
+        ):
+            parts.setdefault(entry_id, []).append(text)
+        return {entry_id: "".join(texts) for entry_id, texts in parts.items()}
+
+    @staticmethod
+    def _translations_for(conn, ids):
+        translations = {}
+        marks = ",".join("?" * len(ids))
+        for entry_id, lang, text in conn.execute(
+            "SELECT entry_id, lang, text FROM translations "
+            f"WHERE entry_id IN ({marks})",
+            ids,
+        ):
+            translations.setdefault(entry_id, {})[lang] = text
+        return translations
+
+    def iter_contents(self, batch_size=500):
+        last_id = 0
+        conn = self._conn()
+        while True:
+            rows = conn.execute(
+                "SELECT entry_id, body FROM contents WHERE entry_id > ? "
+                "ORDER BY entry_id LIMIT ?",
+                (last_id, batch_size),
+            ).fetchall()
+            if not rows:
+                return
+            ids = [row["entry_id"] for row in rows]
+            translations = self._translations_for(conn, ids)
+            bodies = self._chunked_bodies(conn, ids)
+            for row in rows:
+                yield {
+                    "_id": str(row["entry_id"]),
+                    "body": bodies.get(row["entry_id"], row["body"]),
+                    "translations": translations.get(row["entry_id"], {}),
+                }
+            last_id = ids[-1]
+
+    # ----------------------
+    # Both
+    # ----------------------
+    def save_batch(self, notes):
+        if not notes:
+            return []
+        with self._transaction() as conn:
+            row = conn.execute(
+                "SELECT seq FROM sqlite_sequence WHERE name = 'entries'"
+            ).fetchone()
+            first_id = (row[0] if row else 0) + 1
+            ids = list(range(first_id, first_id + len(notes)))
+            stamp = now()
+            conn.executemany(
+                "INSERT INTO entries (id, title, type, password_hash, "
+                "file_path, created_at, updated_at, word_count) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (note_id, n["title"], n.get("type", "TEXT"),
+                     n.get("password_hash"), n.get("file_path"),
+                     stamp, stamp, count_words(n.get("body", "")))
+                    for note_id, n in zip(ids, notes)
+                ],
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO contents (entry_id, body) "
+                "VALUES (?, ?)",
+                [
+                    (note_id, n.get("body", ""))
+                    for note_id, n in zip(ids, notes)
+                ],
+            )
+            conn.executemany(
+                "INSERT OR REPLACE INTO translations (entry_id, lang, text) "
+                "VALUES (?, ?, ?)",
+                [
+                    (note_id, lang, text)
+                    for note_id, n in zip(ids, notes)
+                    for lang, text in (n.get("translations") or {}).items()
+                ],
+            )
+        return ids
+
+    def update_batch(self, notes):
+        if not notes:
+            return
+        with self._transaction() as conn:
+            conn.executemany(
+                "UPDATE entries SET title = ? WHERE id = ?",
+                [(n["title"], int(n["id"])) for n in notes],
+            )
+            for n in notes:
+                self._write_content(
+                    conn, int(n["id"]), n.get("body", ""),
+                    n.get("translations"),
+                )
+
+    def get_notes(self, ids, content=True):
+        ids = [int(note_id) for note_id in ids]
+        if not ids:
+            return []
+        conn = self._conn()
+        marks = ",".join("?" * len(ids))
+        if not content:
+            return [dict(row) for row in conn.execute(
+                "SELECT id, title, type, password_hash, file_path "
+                f"FROM entries WHERE id IN ({marks}) ORDER BY id",
+                ids,
+            )]
+        rows = conn.execute(
+            "SELECT e.id, e.title, e.type, e.password_hash, e.file_path,"
+            " COALESCE(c.body, '') AS body "
+            "FROM entries e LEFT JOIN contents c ON c.entry_id = e.id "
+            f"WHERE e.id IN ({marks}) ORDER BY e.id",
+            ids,
+        ).fetchall()
+        if not rows:
+            return []
+        found = [row["id"] for row in rows]
+        translations = self._translations_for(conn, found)
+        bodies = self._chunked_bodies(conn, found)
+        return [
+            dict(row, body=bodies.get(row["id"], row["body"]),
+                 translations=translations.get(row["id"], {}))
+            for row in rows
+        ]
+
+    def delete_notes(self, ids):
+        ids = [int(note_id) for note_id in ids]
+        if not ids:
+            return
+        marks = ",".join("?" * len(ids))
+        with self._transaction() as conn:
+            conn.execute(f"DELETE FROM entries WHERE id IN ({marks})", ids)
+            conn.execute(
+                f"DELETE FROM contents WHERE entry_id IN ({marks})", ids
+            )
+            conn.execute(
+                f"DELETE FROM content_chunks WHERE entry_id IN ({marks})",
+                ids,
+            )
+            conn.execute(
+                f"DELETE FROM translations WHERE entry_id IN ({marks})", ids
+            )
+            conn.execute(
+                f"DELETE FROM revisions WHERE entry_id IN ({marks})", ids
+            )
+
+    def set_password_hash(self, ids, password_hash):
+        ids = [int(note_id) for note_id in ids]
+        if not ids:
+            return
+        marks = ",".join("?" * len(ids))
+        with self._transaction() as conn:
+            conn.execute(
+                "UPDATE entries SET password_hash = ?, updated_at = ? "
+                f"WHERE id IN ({marks})",
+                [password_hash, now(), *ids],
+            )
+
+    def update_translations(self, updates):
+        if not updates:
+            return
+        stamp = now()
+        with self._transaction() as conn:
+            conn.executemany(
+                "INSERT OR REPLACE INTO translations (entry_id, lang, text) "
+                "VALUES (?, ?, ?)",
+                [
+                    (int(note_id), lang, text)
+                    for note_id, translations in updates.items()
+                    for lang, text in translations.items()
+                ],
+            )
+            conn.executemany(
+                "UPDATE entries SET updated_at = ? WHERE id = ?",
+                [(stamp, int(note_id)) for note_id in updates],
+            )
+
+    # ----------------------
+    # Job checkpoints
+    # ----------------------
+    def get_checkpoint(self, job_id):
+        row = self._conn().execute(
+            "SELECT state FROM job_checkpoints WHERE id = ?", (job_id,)
+        ).fetchone()
+        return json.loads(row["state"]) if row else None
+
+    def save_checkpoint(self, job_id, state):
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO job_checkpoints "
+                "(id, state, updated_at) VALUES (?, ?, ?)",
+                (job_id, json.dumps(state), now()),
+            )
+
+    def delete_checkpoint(self, job_id):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM job_checkpoints WHERE id = ?", (job_id,))
+
+    # ----------------------
+    # Revisions
+    # ----------------------
+    def get_revisions(self, note_id):
+        return [
+            dict(row, snapshot=bool(row["snapshot"]))
+            for row in self._conn().execute(
+                "SELECT number, created_at, snapshot, length, size "
+                "FROM revisions WHERE entry_id = ? ORDER BY number",
+                (int(note_id),),
+            )
+        ]
+
+    def get_revision_chain(self, note_id, number=None):
+        note_id = int(note_id)
+        last = number if number is not None else 2 ** 63 - 1
+        return [
+            dict(row, snapshot=bool(row["snapshot"]))
+            for row in self._conn().execute(
+                "SELECT number, snapshot, data FROM revisions "
+                "WHERE entry_id = ? AND number <= ? AND number >= ("
+                " SELECT MAX(number) FROM revisions"
+                " WHERE entry_id = ? AND number <= ? AND snapshot = 1"
+                ") ORDER BY number",
+                (note_id, last, note_id, last),
+            )
+        ]
+
+    def save_revision(self, note_id, revision):
+        with self._transaction() as conn:
+            conn.execute(
+                "INSERT INTO revisions (entry_id, number, created_at,"
+                " snapshot, length, size, data) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (int(note_id), revision["number"], revision["created_at"],
+                 int(revision["snapshot"]), revision["length"],
+                 len(revision["data"]), revision["data"]),
+            )
+
+    def delete_note(self, note_id):
+        with self._transaction() as conn:
+            conn.execute("DELETE FROM entries WHERE id = ?", (note_id,))
+            conn.execute(
+                "DELETE FROM contents WHERE entry_id = ?", (note_id,)
+            )
+            conn.execute(
+                "DELETE FROM content_chunks WHERE entry_id = ?", (note_id,)
+            )
+            conn.execute(
+                "DELETE FROM translations WHERE entry_id = ?", (note_id,)
+            )
+            conn.execute(
+                "DELETE FROM revisions WHERE entry_id = ?", (note_id,)
+            )
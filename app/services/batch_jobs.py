@@ -0,0 +1,326 @@
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from ..metrics import metrics
+from .batch_translation import BatchTranslator, RateLimiter
+from .file_manager import FileManager
+
+
+def _batches(items, size):
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def _report():
+    return {
+        "total": 0,
+        "updated": 0,
+        "errors": [],
+        "seconds": 0.0,
+    }
+
+
+class Retranslator:
+    """Translates the whole journal, or the notes in `ids`, into `langs`.
+
+    Notes stream from DatabaseService.iter_notes a batch at a time. The
+    translations a batch is missing go through one BatchTranslator, which
+    packs them into few requests on `workers` threads, at most
+    `rate_limit` a second, and come back with one update_translations.
+    By default only languages a note is missing are translated and
+    password-protected notes are left alone, since their text would be
+    sent to the translator.
+
+    With a `job_id` the last note done is checkpointed after every batch
+    (in MongoDB on the server backend) and a later run with the same id
+    carries on from there; the checkpoint is dropped once the job ends.
+    """
+
+    def __init__(self, db, langs, batch_size=100, workers=8,
+                 only_missing=True, include_locked=False, ids=None,
+                 rate_limit=None, job_id=None):
+        self.db = db
+        self.langs = list(langs)
+        self.batch_size = batch_size
+        self.workers = workers
+        self.only_missing = only_missing
+        self.include_locked = include_locked
+        # Only these notes (e.g. a selection) instead of the whole journal
+        self.ids = ids
+        self.rate_limit = rate_limit
+        self.job_id = job_id
+
+    @staticmethod
+    def job_id_for(langs, scope="all", only_missing=True,
+                   include_locked=False):
+        """Checkpoint id shared by runs with the same languages and options,
+        so the CLI and the app resume each other's jobs."""
+        return ":".join([
+            "retranslate", ",".join(sorted(langs)), scope,
+            "missing" if only_missing else "redo",
+            "locked" if include_locked else "open",
+        ])
+
+    def _notes(self, after_id):
+        if self.ids is None:
+            return self.db.iter_notes(self.batch_size, after_id)
+        ids = sorted(i for i in self.ids if i > after_id)
+        return (
+            note for chunk in _batches(ids, self.batch_size)
+            for note in self.db.get_notes(chunk)
+        )
+
+    def _targets(self, note):
+        if note.get("password_hash") and not self.include_locked:
+            return []
+        if not note.get("body", "").strip():
+            return []
+        existing = note.get("translations") or {}
+        return [
+            lang for lang in self.langs
+            if not (self.only_missing and lang in existing)
+        ]
+
+    def _checkpoint(self, state):
+        try:
+            self.db.save_checkpoint(self.job_id, state)
+        except Exception as e:
+            metrics.error("retranslate.checkpoint", e)
+            print(f"Checkpoint Error: {e}")
+
+    def run(self, on_progress=None, cancel=None):
+        """Returns {"total", "updated", "errors", "seconds", "requests",
+        "resumed_after"}; errors are (note id, message) pairs and the
+        counts cover this run. on_progress(done, failed) is called after
+        every batch; setting `cancel` stops after the current one.
+        """
+        report = dict(_report(), requests=0, resumed_after=0)
+        start = time.perf_counter()
+        state = {"last_id": 0, "done": 0, "updated": 0}
+        if self.job_id is not None:
+            state = self.db.get_checkpoint(self.job_id) or state
+            report["resumed_after"] = state["last_id"]
+        limiter = RateLimiter(self.rate_limit) if self.rate_limit else None
+        finished = True
+        with BatchTranslator(self.workers, limiter) as translator:
+            for batch in _batches(self._notes(state["last_id"]),
+                                  self.batch_size):
+                report["total"] += len(batch)
+                work = [(n, lang) for n in batch for lang in self._targets(n)]
+                results = translator.translate(
+                    [(note["body"], lang) for note, lang in work]
+                )
+
+                # Only the new translations are written; bodies stay put
+                changed = {}
+                for (note, lang), text in zip(work, results):
+                    if text is None:
+                        report["errors"].append(
+                            (note["id"], f"translation to '{lang}' failed")
+                        )
+                    else:
+                        changed.setdefault(note["id"], {})[lang] = text
+                if changed:
+                    try:
+                        self.db.update_translations(changed)
+                        report["updated"] += len(changed)
+                    except Exception as e:
+                        # Stop before the checkpoint moves past this batch
+                        report["errors"].extend(
+                            (note_id, f"Database write failed: {e}")
+                            for note_id in changed
+                        )
+                        finished = False
+                        break
+                if self.job_id is not None:
+                    state = {
+                        "last_id": batch[-1]["id"],
+                        "langs": self.langs,
+                        "done": state["done"] + len(batch),
+                        "updated": state["updated"] + len(changed),
+                    }
+                    self._checkpoint(state)
+                if on_progress is not None:
+                    on_progress(report["total"], len(report["errors"]))
+                if cancel is not None and cancel.is_set():
+                    finished = False
+                    break
+            report["requests"] = translator.requests
+        if finished and self.job_id is not None:
+            self.db.delete_checkpoint(self.job_id)
+        report["seconds"] = time.perf_counter() - start
+        return report
+
+
+class LinkedFileResync:
+    """Re-imports every linked file whose content differs from its note.
+
+    The batch counterpart of LinkedFileWatcher for scheduled runs: files
+    are parsed on `workers` threads while notes stream from the
+    database, and changed notes are written with update_batch.
+    """
+
+    def __init__(self, db, batch_size=200, workers=None):
+        self.db = db
+        self.batch_size = batch_size
+        self.workers = workers or min(32, (os.cpu_count() or 2) * 2)
+
+    @staticmethod
+    def _parse(note):
+        try:
+            return FileManager.import_from_file(note["file_path"]), None
+        except Exception as e:
+            return None, str(e)
+
+    def run(self, on_progress=None, cancel=None):
+        """Returns {"total", "updated", "errors", "seconds"}; errors are
+        (file path, message) pairs and total counts linked notes."""
+        report = _report()
+        start = time.perf_counter()
+        linked = (
+            n for n in self.db.iter_notes(self.batch_size)
+            if n.get("file_path")
+        )
+        with ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="resync"
+        ) as pool:
+            for batch in _batches(linked, self.batch_size):
+                report["total"] += len(batch)
+                paths = {n["id"]: n["file_path"] for n in batch}
+                changed = []
+                for note, (parsed, error) in zip(
+                    batch, pool.map(self._parse, batch)
+                ):
+                    if error is not None:
+                        report["errors"].append((note["file_path"], error))
+                        continue
+                    title, body, translations = parsed
+                    if (title, body, translations) != (
+                        note["title"], note["body"], note["translations"]
+                    ):
+                        changed.append({
+                            "id": note["id"],
+                            "title": title,
+                            "body": body,
+                            "translations": translations,
+                        })
+                if changed:
+                    try:
+                        self.db.update_batch(changed)
+                        report["updated"] += len(changed)
+                    except Exception as e:
+                        report["errors"].extend(
+                            (paths[n["id"]], f"Database write failed: {e}")
+                            for n in changed
+                        )
+                if on_progress is not None:
+                    on_progress(report["total"], len(report["errors"]))
+                if cancel is not None and cancel.is_set():
+                    break
+        report["seconds"] = time.perf_counter() - start
+        return report
+
+
+def export_name(note):
+    """File name for a note in a bulk export: id and a safe title."""
+    slug = re.sub(r"[^\w-]+", "_", note["title"]).strip("_")[:60]
+    return f"{note['id']}-{slug or 'note'}.txt"
+
+
+class BulkActions:
+    """Delete, export, lock or translate the notes picked in the list.
+
+    `ids` are handled `batch_size` at a time and each batch is one
+    transaction per store (DELETE ... WHERE id IN, delete_many, one
+    UPDATE, one bulk_write). on_progress(done, failed) runs after every
+    batch and setting `cancel` stops before the next one. Every method
+    returns {"total", "updated", "errors", "seconds"}, errors being
+    (note id, message) pairs. Password-protected notes are left alone,
+    as acting on a single one needs its password too.
+    """
+
+    def __init__(self, db, ids, batch_size=500):
+        self.db = db
+        self.ids = list(ids)
+        self.batch_size = batch_size
+
+    def _run(self, act, content, on_progress, cancel):
+        report = _report()
+        start = time.perf_counter()
+        for chunk in _batches(self.ids, self.batch_size):
+            notes = self.db.get_notes(chunk, content)
+            found = {n["id"] for n in notes}
+            report["errors"].extend(
+                (note_id, "Note not found")
+                for note_id in chunk if note_id not in found
+            )
+            open_notes = []
+            for note in notes:
+                if note.get("password_hash"):
+                    report["errors"].append(
+                        (note["id"], "Password-protected; left as is")
+                    )
+                else:
+                    open_notes.append(note)
+            if open_notes:
+                try:
+                    report["updated"] += act(open_notes, report)
+                except Exception as e:
+                    report["errors"].extend(
+                        (n["id"], f"Database write failed: {e}")
+                        for n in open_notes
+                    )
+            report["total"] += len(chunk)
+            if on_progress is not None:
+                on_progress(report["total"], len(report["errors"]))
+            if cancel is not None and cancel.is_set():
+                break
+        report["seconds"] = time.perf_counter() - start
+        return report
+
+    def delete(self, on_progress=None, cancel=None):
+        def act(notes, report):
+            self.db.delete_notes([n["id"] for n in notes])
+            return len(notes)
+        return self._run(act, False, on_progress, cancel)
+
+    def protect(self, password_hash, on_progress=None, cancel=None):
+        def act(notes, report):
+            self.db.set_password_hash([n["id"] for n in notes], password_hash)
+            return len(notes)
+        return self._run(act, False, on_progress, cancel)
+
+    def export(self, directory, on_progress=None, cancel=None):
+        """One .txt per note in `directory`, readable by BulkImporter."""
+        os.makedirs(directory, exist_ok=True)
+
+        def act(notes, report):
+            written = 0
+            for note in notes:
+                name = export_name(note)
+                # export_to_txt reports failure by returning False
+                if FileManager.export_to_txt(
+                    os.path.join(directory, name),
+                    note["title"], note["body"], note["translations"],
+                ):
+                    written += 1
+                else:
+                    report["errors"].append(
+                        (note["id"], f"Could not write {name}")
+                    )
+            return written
+        return self._run(act, True, on_progress, cancel)
+
+    def translate(self, langs, workers=8, rate_limit=None, on_progress=None,
+                  cancel=None):
+        return Retranslator(
+            self.db, langs, batch_size=min(self.batch_size, 100),
+            workers=workers, ids=self.ids, rate_limit=rate_limit,
+        ).run(on_progress, cancel)
@@ -0,0 +1,148 @@
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from ..metrics import instrumented, metrics
+from ..models.chunks import CHUNK_CHARS, split_text
+from ..models.features import MultilingualEntry, translator_for
+
+
+class RateLimiter:
+    """Spaces calls at least 1/per_second seconds apart, across threads."""
+
+    def __init__(self, per_second):
+        self.interval = 1.0 / per_second
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next)
+            self._next = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+class BatchTranslator:
+    """Translates many texts with as few provider requests as possible.
+
+    Texts are cut with split_text, and the pieces MultilingualEntry.cache
+    does not know are packed, per language, into requests of up to
+    `limit` characters joined by SEPARATOR. Requests run on `workers`
+    threads, spaced by the optional RateLimiter, through the translators
+    translator_for keeps per thread. A request that fails, or whose reply
+    does not split back into as many pieces, is resent piece by piece.
+    """
+
+    SEPARATOR = "\n[[~]]\n"
+    _SPLIT = re.compile(r"\s*\[\[~\]\]\s*")
+
+    def __init__(self, workers=4, rate_limiter=None, limit=CHUNK_CHARS,
+                 source="auto", retries=1, backoff=0.5):
+        self.rate_limiter = rate_limiter
+        self.limit = limit
+        self.source = source
+        self.retries = retries
+        self.backoff = backoff
+        self.requests = 0  # provider calls made so far
+        self._lock = threading.Lock()
+        self._pool = ThreadPoolExecutor(
+            max_workers=workers, thread_name_prefix="translate-batch"
+        )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    @instrumented("translate.batch")
+    def translate(self, items):
+        """Translations of [(text, lang)] items, in order; None for an
+        item when any of its pieces failed."""
+        cache = MultilingualEntry.cache
+        layouts = []
+        done = {}  # (piece text, lang) -> translation, None until known
+        for text, lang in items:
+            layout = []
+            for piece in split_text(text):
+                core = piece.strip()
+                start = piece.index(core) if core else len(piece)
+                layout.append((piece[:start], core, piece[start + len(core):]))
+                if core and (core, lang) not in done:
+                    done[core, lang] = (
+                        cache.get(core, self.source, lang)
+                        if cache is not None else None
+                    )
+            layouts.append(layout)
+
+        requests = self._pack([key for key, value in done.items()
+                               if value is None])
+        for request, results in zip(requests,
+                                    self._pool.map(self._send, requests)):
+            for (core, lang), translated in zip(request, results):
+                done[core, lang] = translated
+                if cache is not None and translated is not None:
+                    cache.put(core, self.source, lang, translated)
+
+        output = []
+        for layout, (_, lang) in zip(layouts, items):
+            parts = []
+            for lead, core, trail in layout:
+                translated = done[core, lang] if core else ""
+                if translated is None:
+                    parts = None
+                    break
+                parts.append(lead + translated + trail)
+            output.append(None if parts is None else "".join(parts))
+        return output
+
+    def _pack(self, keys):
+        """Groups (piece, lang) keys into requests of one language each."""
+        requests = []
+        open_requests = {}  # lang -> (keys, characters) being filled
+        for core, lang in keys:
+            request, size = open_requests.get(lang, (None, 0))
+            added = len(core) + (len(self.SEPARATOR) if request else 0)
+            if request is None or size + added > self.limit:
+                request = []
+                requests.append(request)
+                size = 0
+                added = len(core)
+            request.append((core, lang))
+            open_requests[lang] = (request, size + added)
+        return requests
+
+    def _send(self, request):
+        cores = [core for core, _ in request]
+        lang = request[0][1]
+        try:
+            reply = self._call(self.SEPARATOR.join(cores), lang)
+            if len(cores) == 1:
+                return [reply]
+            parts = self._SPLIT.split(reply.strip())
+            if len(parts) == len(cores):
+                return parts
+        except Exception as e:
+            metrics.error("translate.batch", e)
+            if len(cores) == 1:
+                return [None]
+        return [self._send([key])[0] for key in request]
+
+    def _call(self, text, lang):
+        for attempt in range(self.retries + 1):
+            if attempt:
+                time.sleep(self.backoff * 2 ** (attempt - 1))
+            if self.rate_limiter is not None:
+                self.rate_limiter.wait()
+            with self._lock:
+                self.requests += 1
+            try:
+                return translator_for(self.source, lang).translate(text)
+            except Exception:
+                if attempt == self.retries:
+                    raise
@@ -0,0 +1,115 @@
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from .file_manager import FileManager
+
+IMPORT_EXTENSIONS = ('.txt', '.csv')
+
+
+def _parse_file(path):
+    """Runs in a worker: returns (path, parsed, error)."""
+    try:
+        return path, FileManager.import_from_file(path), None
+    except Exception as e:
+        return path, None, str(e)
+
+
+class BulkImporter:
+    """Imports every .txt/.csv export found under a directory.
+
+    Files are parsed in parallel worker processes. Each batch of parsed
+    files is written with one MySQL transaction and one MongoDB bulk_write
+    through DatabaseService.save_batch. While a batch is being written,
+    the next one is already being parsed.
+    """
+
+    def __init__(self, db, batch_size=500, workers=None,
+                 use_processes=True):
+        self.db = db
+        self.batch_size = batch_size
+        self.workers = workers or os.cpu_count() or 2
+        self.use_processes = use_processes
+
+    @staticmethod
+    def find_files(directory):
+        paths = []
+        for root, _, files in os.walk(directory):
+            for name in files:
+                if name.lower().endswith(IMPORT_EXTENSIONS):
+                    paths.append(os.path.join(root, name))
+        paths.sort()
+        return paths
+
+    def _executor(self):
+        if self.use_processes:
+            # spawn: forking a threaded GUI process is not safe
+            return ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return ThreadPoolExecutor(max_workers=self.workers)
+
+    def run(self, directory, on_progress=None, cancel=None):
+        """Imports the directory and returns a summary dict.
+
+        on_progress(done, total, failed) is called after every batch;
+        setting the `cancel` threading.Event stops after the current one.
+        """
+        paths = self.find_files(directory)
+        report = {
+            "total": len(paths),
+            "imported": 0,
+            "ids": [],
+            "errors": [],
+            "seconds": 0.0,
+        }
+        start = time.perf_counter()
+        batches = [
+            paths[i:i + self.batch_size]
+            for i in range(0, len(paths), self.batch_size)
+        ]
+
+        with self._executor() as pool:
+            def parse(batch):
+                chunksize = max(1, len(batch) // (self.workers * 4))
+                return pool.map(_parse_file, batch, chunksize=chunksize)
+
+            pending = parse(batches[0]) if batches else None
+            for i in range(len(batches)):
+                results = list(pending)
+                # Start parsing the next batch before writing this one
+                if i + 1 < len(batches) and not (cancel and cancel.is_set()):
+                    pending = parse(batches[i + 1])
+
+                notes = []
+                for path, parsed, error in results:
+                    if error is not None:
+                        report["errors"].append((path, error))
+                        continue
+                    title, body, translations = parsed
+                    notes.append({
+                        "title": title,
+                        "type": "TEXT",
+                        "password_hash": None,
+                        "file_path": path,
+                        "body": body,
+                        "translations": translations,
+                    })
+                try:
+                    report["ids"].extend(self.db.save_batch(notes))
+                    report["imported"] += len(notes)
+                except Exception as e:
+                    report["errors"].extend(
+                        (n["file_path"], f"Database write failed: {e}")
+                        for n in notes
+                    )
+
+                done = sum(len(b) for b in batches[:i + 1])
+                if on_progress is not None:
+                    on_progress(done, len(paths), len(report["errors"]))
+                if cancel is not None and cancel.is_set():
+                    break
+
+        report["seconds"] = time.perf_counter() - start
+        return report
@@ -0,0 +1,79 @@
+import lzma
+import zlib
+from ..metrics import instrumented
+
+FORMAT_VERSION = 1
+
+# name -> (compress, decompress) over UTF-8 bytes
+CODECS = {
+    "zlib": (lambda data: zlib.compress(data, 6), zlib.decompress),
+    "lzma": (lambda data: lzma.compress(data, preset=1), lzma.decompress),
+}
+
+
+class TextCodec:
+    """Compresses long text fields before they are stored.
+
+    Texts of `threshold` characters or more are stored as
+    {"codec": name, "v": FORMAT_VERSION, "data": bytes}, unless that
+    saves under a tenth of their size. Plain strings (short texts and
+    everything written before compression was turned on) are read back
+    as they are, so the setting can change at any time. `codec` None
+    writes plain strings only but still reads compressed ones.
+    """
+
+    def __init__(self, codec=None, threshold=16 * 1024):
+        if codec and codec not in CODECS:
+            raise ValueError(
+                f"Unknown compression '{codec}'; use one of {sorted(CODECS)}"
+            )
+        self.codec = codec or None
+        self.threshold = threshold
+
+    @classmethod
+    def from_config(cls, config):
+        """From JOURNAL_COMPRESSION / JOURNAL_COMPRESSION_THRESHOLD."""
+        return cls(
+            config.get("compression") or None,
+            int(config.get("compression_threshold") or 16 * 1024),
+        )
+
+    def encode(self, text):
+        if self.codec is None or text is None or len(text) < self.threshold:
+            return text
+        raw = text.encode("utf-8", "surrogatepass")
+        data = self._compress(self.codec, raw)
+        if len(data) > len(raw) * 0.9:
+            return text
+        return {"codec": self.codec, "v": FORMAT_VERSION, "data": data}
+
+    def encode_all(self, translations):
+        return {lang: self.encode(text)
+                for lang, text in (translations or {}).items()}
+
+    @staticmethod
+    def decode(value):
+        if not isinstance(value, dict):
+            return value
+        codec = value.get("codec")
+        if value.get("v") != FORMAT_VERSION or codec not in CODECS:
+            raise ValueError(
+                f"Unsupported text encoding {codec!r} "
+                f"version {value.get('v')!r}"
+            )
+        return TextCodec._decompress(codec, bytes(value["data"]))
+
+    @staticmethod
+    def decode_all(translations):
+        return {lang: TextCodec.decode(text)
+                for lang, text in (translations or {}).items()}
+
+    @staticmethod
+    @instrumented("codec.compress", size=lambda r, codec, raw: len(raw))
+    def _compress(codec, raw):
+        return CODECS[codec][0](raw)
+
+    @staticmethod
+    @instrumented("codec.decompress", size=lambda r, codec, data: len(r))
+    def _decompress(codec, data):
+        return CODECS[codec][1](data).decode("utf-8", "surrogatepass")
@@ -1,117 +1,523 @@
-import pymysql
-from pymongo import MongoClient
-from tkinter import messagebox
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from ..config import load_config
+from ..metrics import instrumented, text_size
+from .backends import create_backend
+from .note_cache import NoteCache
+from .revisions import RevisionLog
+from .search_index import SearchIndex, TermCounter, DEFAULT_INDEX_PATH
+
+
+def _result_size(result, *args, **kwargs):
+    return text_size(result)
+
+
+def _content_size(result, self, note_id, body=None, translations=None,
+                  *args, **kwargs):
+    return text_size(body) + text_size(translations)
+
+
+def _notes_size(result, self, notes):
+    return text_size(notes)
 
 
 class DatabaseService:
+    """Notes storage used by the UI.
+
+    Reads and writes go to a StorageBackend chosen by configuration
+    (MySQL + MongoDB, or a single SQLite file); this class adds the note
+    cache, the search index and the worker pools on top.
+    """
+
     _instance = None
 
     def __new__(cls):
         if cls._instance is None:
             cls._instance = super(DatabaseService, cls).__new__(cls)
-            cls._instance.mysql = None
-            cls._instance.mongo = None
+            cls._instance.config = load_config()
+            cls._instance.backend = create_backend(cls._instance.config)
+            cls._instance.index = None
+            # Note ids changed while an index build runs, replayed after
+            cls._instance._index_missed = None
+            cls._instance._index_lock = threading.Lock()
+            cls._instance.ready = None
+            cls._instance.connect_errors = []
+            cls._instance.executor = ThreadPoolExecutor(
+                max_workers=4, thread_name_prefix="db"
+            )
+            # Separate pool for per-store fan-out inside a single call, so
+            # a task on `executor` never waits on a slot of its own pool
+            cls._instance.fanout = ThreadPoolExecutor(
+                max_workers=4, thread_name_prefix="db-fanout"
+            )
+            cls._instance.note_cache = NoteCache()
+            cls._instance.revisions = RevisionLog(
+                cls._instance.backend,
+                int(cls._instance.config.get("revision_snapshot_every", 20)),
+            )
             cls._instance._init_connections()
         return cls._instance
 
     def _init_connections(self):
-        try:
-            client = MongoClient(
-                "mongodb://localhost:27017", serverSelectionTimeoutMS=2000
-            )
-            self.mongo = client["journal"]
-            client.admin.command("ping")
-        except Exception as e:
-            messagebox.showerror(
-                "Database Error", f"MongoDB connection failed: {e}"
-            )
+        # Connect in the background so the window can be drawn at once;
+        # `ready` completes with the list of connection errors
+        self.ready = self.fanout.submit(self._connect)
 
-        try:
-            self.mysql = pymysql.connect(
-                host="localhost",
-                user="root",
-                password="root",
-                database="journal_db",
-                cursorclass=pymysql.cursors.DictCursor,
-                autocommit=True,
-            )
-        except Exception as e:
-            messagebox.showerror(
-                "Database Error", f"MySQL Connection failed: {e}"
-            )
+    def _connect(self):
+        self.connect_errors = []
+        self.backend.connect(self.connect_errors.append)
+        return list(self.connect_errors)
 
-    def get_all_titles(self):
-        if not self.mysql:
-            return []
-        try:
-            self.mysql.ping(reconnect=True)
-            with self.mysql.cursor() as cur:
-                query = "SELECT id, title FROM entries"
-                cur.execute(query)
-                return cur.fetchall()
+    def is_ready(self):
+        return self.ready is None or self.ready.done()
 
-        except Exception:
-            return []
+    def wait_ready(self):
+        """Blocks until the initial connection attempt has finished."""
+        if self.ready is not None:
+            self.ready.result()
 
-    def save_metadata(self, meta: dict):
-        self.mysql.ping(reconnect=True)
-        with self.mysql.cursor() as cur:
-            if meta.get("id"):
-                query = (
-                    "UPDATE entries SET title=%s, type=%s, password_hash=%s, "
-                    "file_path=%s WHERE id=%s"
-                )
-                values = (
-                    meta["title"],
-                    meta["type"],
-                    meta["password_hash"],
-                    meta["file_path"],
-                    meta["id"],
-                )
-                cur.execute(query, values)
-                return meta["id"]
-            else:
-                query = (
-                        "INSERT INTO entries (title,"
-                        " type,password_hash, file_path)"
-                        " VALUES (%s, %s, %s, %s)"
+    def use_backend(self, backend):
+        """Switches storage and drops notes cached from the old backend."""
+        self.backend = backend
+        self.revisions.backend = backend
+        self.revisions.clear()
+        self.note_cache.clear()
+
+    # The MySQL and MongoDB handles of the server backend. Assigning one
+    # switches the service to that backend.
+    @property
+    def mysql(self):
+        return getattr(self.backend, "mysql", None)
+
+    @mysql.setter
+    def mysql(self, value):
+        self._server_backend().mysql = value
+
+    @property
+    def mongo(self):
+        return getattr(self.backend, "mongo", None)
+
+    @mongo.setter
+    def mongo(self, value):
+        self._server_backend().mongo = value
+
+    def _server_backend(self):
+        from .backends.mysql_mongo import MySQLMongoBackend
+        if not isinstance(self.backend, MySQLMongoBackend):
+            self.use_backend(MySQLMongoBackend(self.config))
+        return self.backend
+
+    def submit(self, fn, *args, **kwargs):
+        """Runs fn (usually one of this service's methods) on the DB pool.
+
+        Returns a concurrent.futures.Future, so callers on the Tk thread
+        never block on a query. Work submitted while the stores are still
+        connecting starts once they are up.
+        """
+        def run():
+            self.wait_ready()
+            return fn(*args, **kwargs)
+
+        return self.executor.submit(run)
+
+    @instrumented("db.open_search_index")
+    def open_search_index(self, path=DEFAULT_INDEX_PATH):
+        """Attaches the full-text index, building it on first use."""
+        index = SearchIndex(path)
+        if index.is_empty():
+            with self._index_lock:
+                self.index = None
+                self._index_missed = set()
+            self._build_index(index)
+        else:
+            self.index = index
+        return self.index
+
+    @instrumented("db.rebuild_search_index")
+    def rebuild_search_index(self):
+        # Detached in one step with the missed set started, so a write
+        # always finds one or the other
+        with self._index_lock:
+            index, self.index = self.index, None
+            if index is None:
+                return
+            self._index_missed = set()
+        self._build_index(index)
+
+    def _build_index(self, index):
+        # Filled while detached, so searches and saves never wait on the
+        # build's transaction; notes saved meanwhile are reindexed after
+        try:
+            with index.batch():
+                index.clear()
+                for note in self.get_all_titles():
+                    index.index_title(note["id"], note["title"])
+                for doc in self.backend.iter_contents(batch_size=500):
+                    index.index_content(
+                        doc["_id"],
+                        doc.get("body", ""),
+                        doc.get("translations"),
                     )
+        finally:
+            with self._index_lock:
+                missed, self._index_missed = self._index_missed, None
+                self.index = index
+        self._reindex(missed)
+
+    def _reindex_later(self, ids):
+        """Called by writes that found no index attached."""
+        with self._index_lock:
+            if self._index_missed is not None:
+                self._index_missed.update(int(i) for i in ids)
+                return
+        # The build finished between the write and this call
+        if self.index is not None:
+            self._reindex(ids)
 
-                values = (
-                    meta["title"],
-                    meta["type"],
-                    meta["password_hash"],
-                    meta["file_path"],
+    def _reindex(self, ids):
+        ids = sorted({int(i) for i in ids})
+        if not ids:
+            return
+        notes = self.backend.get_notes(ids)
+        with self.index.batch():
+            for note in notes:
+                self.index.index_title(note["id"], note["title"])
+                self.index.index_content(
+                    note["id"], note.get("body", ""), note.get("translations")
                 )
-                cur.execute(query, values)
-                return cur.lastrowid
+            for note_id in set(ids) - {note["id"] for note in notes}:
+                self.index.remove(note_id)
+
+    @instrumented("db.search")
+    def search(self, query, limit=200):
+        """Ranked {"id", "title", "score"} matches from the full-text index."""
+        if self.index is None:
+            return []
+        return self.index.search(query, limit)
 
+    @instrumented("db.get_all_titles", size=_result_size)
+    def get_all_titles(self):
+        return self.backend.get_all_titles()
+
+    @instrumented("db.get_titles_page", size=_result_size)
+    def get_titles_page(self, after_id=0, limit=50, query=""):
+        """Keyset page of (id, title) rows with id > after_id."""
+        return self.backend.get_titles_page(after_id, limit, query)
+
+    @instrumented("db.list_notes", size=_result_size)
+    def list_notes(self, sort="recent", after=None, limit=50, query="",
+                   lang=None):
+        """Keyset page of the notes list in `sort` order ("recent",
+        "created", "title" or "id"), continuing after `after`, the last
+        row of the page before.
+
+        Rows are {"id", "title", "created_at", "updated_at",
+        "word_count"}; `query` keeps titles containing it and `lang` notes
+        translated into that language. Every page is an index range scan.
+        """
+        return self.backend.list_notes(sort, after, limit, query, lang)
+
+    @instrumented("db.get_languages")
+    def get_languages(self):
+        """Every language some note is translated into, sorted."""
+        return self.backend.get_languages()
+
+    @instrumented("db.get_linked_files")
+    def get_linked_files(self):
+        """(id, file_path) rows of every note linked to a file."""
+        return self.backend.get_linked_files()
+
+    @instrumented("db.iter_notes")
+    def iter_notes(self, batch_size=500, after_id=0):
+        """Streams every note (metadata, body, translations) in id order,
+        starting after `after_id`."""
+        return self.backend.iter_notes(batch_size, after_id)
+
+    # ----------------------
+    # Job checkpoints
+    # ----------------------
+    def get_checkpoint(self, job_id):
+        """Saved progress of a background job, or None."""
+        return self.backend.get_checkpoint(job_id)
+
+    def save_checkpoint(self, job_id, state):
+        self.backend.save_checkpoint(job_id, state)
+
+    def delete_checkpoint(self, job_id):
+        self.backend.delete_checkpoint(job_id)
+
+    @instrumented("db.load_note", size=_result_size)
+    def load_note(self, note_id, langs=()):
+        """Metadata and content of one note, fetched from both stores at once.
+
+        Returns {"id", "title", "password_hash", "file_path", "body",
+        "languages", "translations"} or None. `languages` names every
+        stored translation but `translations` only holds those in `langs`
+        (and any loaded before); load_translations fetches the others when
+        they are shown. Served from the LRU cache when the note was loaded
+        recently and has not changed since.
+        """
+        note = self.note_cache.get(note_id)
+        if note is None:
+            generation = self.note_cache.generation(note_id)
+            meta_future = self.fanout.submit(self.get_metadata, note_id)
+            content = self.backend.get_content(note_id, langs)
+            record = meta_future.result()
+            if record is None and content is None:
+                return None
+            note = {
+                "id": note_id,
+                "title": record["title"] if record else "Untitled",
+                "password_hash": record["password_hash"] if record else None,
+                "file_path": record["file_path"] if record else None,
+                "body": content["body"] if content else "",
+                "languages": content["languages"] if content else [],
+                "translations": content["translations"] if content else None,
+            }
+            self.note_cache.put(note_id, note, generation)
+        note = self._copy_note(note)
+        missing = [
+            lang for lang in langs
+            if lang in note["languages"] and lang not in note["translations"]
+        ]
+        if missing:
+            note["translations"].update(
+                self.load_translations(note_id, missing)
+            )
+        return note
+
+    @instrumented("db.load_translations", size=_result_size)
+    def load_translations(self, note_id, langs):
+        """{lang: text} of the stored translations in `langs`, fetched on
+        their own; the cached note keeps them for the next load."""
+        generation = self.note_cache.generation(note_id)
+        translations = self.backend.get_translations(note_id, list(langs))
+        note = self.note_cache.get(note_id)
+        if translations and note is not None \
+                and note["translations"] is not None:
+            self.note_cache.put(note_id, dict(
+                note, translations=dict(note["translations"], **translations)
+            ), generation)
+        return translations
+
+    @instrumented("db.peek_note")
+    def peek_note(self, note_id):
+        """Cached copy of a note without touching either store, or None."""
+        note = self.note_cache.get(note_id)
+        return self._copy_note(note) if note is not None else None
+
+    @staticmethod
+    def _copy_note(note):
+        # Callers mutate translations in place; keep the cached one intact
+        translations = note["translations"]
+        return dict(
+            note,
+            languages=list(note["languages"]),
+            translations=dict(translations) if translations is not None
+            else None,
+        )
+
+    @instrumented("db.get_metadata", size=_result_size)
+    def get_metadata(self, note_id):
+        return self.backend.get_metadata(note_id)
+
+    @instrumented("db.save_metadata")
+    def save_metadata(self, meta: dict):
+        note_id = self.backend.save_metadata(meta)
+        self.note_cache.invalidate(note_id)
+        if self.index is not None:
+            self.index.index_title(note_id, meta["title"])
+        else:
+            self._reindex_later([note_id])
+        return note_id
+
+    @instrumented("db.save_content", size=_content_size)
     def save_content(self, note_id, content: str, translations: dict = None):
-        if self.mongo is not None:
-            self.mongo.entries.update_one(
-                {"_id": str(note_id)},
-                {"$set": {
-                    "body": content,
-                    "translations": translations or {}
-                    }},
-                upsert=True,
+        self.backend.save_content(note_id, content, translations)
+        # After the write: a load racing it must not re-cache old data
+        self.note_cache.invalidate(note_id)
+        if self.index is not None:
+            self.index.index_content(note_id, content, translations)
+        else:
+            self._reindex_later([note_id])
+
+    @instrumented("db.save_content_chunks")
+    def save_content_chunks(self, note_id, chunks, translations=None):
+        """save_content for a body streamed as chunks, e.g. from
+        FileManager.open_entry; the search index is built as they pass."""
+        terms = TermCounter()
+
+        def feed():
+            for chunk in chunks:
+                terms.feed(chunk)
+                yield chunk
+
+        self.backend.save_content_chunks(note_id, feed(), translations)
+        self.note_cache.invalidate(note_id)
+        if self.index is not None:
+            self.index.index_content(note_id, terms.result(), translations)
+        else:
+            self._reindex_later([note_id])
+
+    @instrumented("db.update_content", size=_content_size)
+    def update_content(self, note_id, body=None, translations=None,
+                       removed=()):
+        """Partial save: the body unless None, changed translations and
+        removed languages. Untouched fields are not rewritten."""
+        if body is None and not translations and not removed:
+            return
+        self.backend.update_content(note_id, body, translations, removed)
+        self.note_cache.invalidate(note_id)
+        if self.index is not None:
+            self.index.update_content(note_id, body, translations, removed)
+        else:
+            self._reindex_later([note_id])
+
+    @instrumented("db.save_changes")
+    def save_changes(self, meta, body, translations, changes):
+        """Writes one edited note as described by DirtyTracker.changes.
+
+        Only the parts that changed since the last save are written; a
+        changed body is also added to the note's revision history.
+        Returns the note id, which is new when the note was never saved.
+        Raises LookupError for a saved note that has been deleted since,
+        as the content stores would otherwise take its body back.
+        """
+        note_id = meta["id"]
+        if not changes["new"] and self.backend.get_metadata(note_id) is None:
+            raise LookupError(f"Note {note_id} no longer exists")
+        earlier = None
+        if changes["body"] and not changes["new"] \
+                and not self.revisions.has_history(note_id):
+            # Read before the write: a note's text from before it had a
+            # history becomes its first revision
+            earlier = (self.backend.get_content(note_id) or {}).get("body")
+        if changes["metadata"]:
+            note_id = self.save_metadata(meta)
+        if changes["new"]:
+            self.save_content(note_id, body, translations)
+        else:
+            self.update_content(
+                note_id,
+                body if changes["body"] else None,
+                changes["translations"],
+                changes["removed"],
             )
+        if changes["new"] or changes["body"]:
+            # After the write, so the history only holds saved bodies
+            self.revisions.record(note_id, body, before=lambda: earlier)
+        return note_id
 
-    def get_full_note(self, note_id):
-        if self.mongo is None:
-            return None
-        return self.mongo.entries.find_one({"_id": str(note_id)})
+    # ----------------------
+    # Revisions
+    # ----------------------
+    @instrumented("db.get_revisions")
+    def get_revisions(self, note_id):
+        """Saved revisions of a note, oldest first, without their text."""
+        return self.revisions.history(note_id)
 
-    def delete_note(self, note_id):
-        if self.mysql:
-            try:
-                self.mysql.ping(reconnect=True)
-                with self.mysql.cursor() as cur:
-                    cur.execute(
-                        "DELETE FROM entries WHERE id = %s", (note_id,)
+    @instrumented("db.get_revision", size=_result_size)
+    def get_revision(self, note_id, number):
+        """Body of a note as saved in revision `number`, or None."""
+        return self.revisions.get(note_id, number)
+
+    @instrumented("db.save_batch", size=_notes_size)
+    def save_batch(self, notes):
+        """Inserts many new notes with one transaction per store.
+
+        Each note is a dict with title, type, password_hash, file_path,
+        body and translations. Returns the new ids in input order.
+        """
+        ids = self.backend.save_batch(notes)
+        if self.index is not None and ids:
+            with self.index.batch():
+                for note_id, n in zip(ids, notes):
+                    self.index.index_title(note_id, n["title"])
+                    self.index.index_content(
+                        note_id, n.get("body", ""), n.get("translations")
                     )
-            except Exception as e:
-                print(f"SQL Delete Error: {e}")
+        elif ids:
+            self._reindex_later(ids)
+        return ids
 
-        if self.mongo is not None:
-            self.mongo.entries.delete_one({"_id": str(note_id)})
+    @instrumented("db.update_batch", size=_notes_size)
+    def update_batch(self, notes):
+        """Rewrites title and content of existing notes, one write per
+        store. Each note is a dict with id, title, body, translations."""
+        if not notes:
+            return
+        self.backend.update_batch(notes)
+        for n in notes:
+            self.note_cache.invalidate(n["id"])
+        if self.index is not None:
+            with self.index.batch():
+                for n in notes:
+                    self.index.index_title(n["id"], n["title"])
+                    self.index.index_content(
+                        n["id"], n.get("body", ""), n.get("translations")
+                    )
+        else:
+            self._reindex_later([n["id"] for n in notes])
+
+    @instrumented("db.get_full_note", size=_result_size)
+    def get_full_note(self, note_id):
+        return self.backend.get_full_note(note_id)
+
+    @instrumented("db.get_notes", size=_result_size)
+    def get_notes(self, ids, content=True):
+        """Full notes (metadata, body, translations) for many ids at
+        once, in id order; ids that do not exist are left out. With
+        `content` False only the metadata store is read."""
+        return self.backend.get_notes(ids, content)
+
+    @instrumented("db.delete_notes")
+    def delete_notes(self, ids):
+        """Deletes many notes with one transaction per store."""
+        if not ids:
+            return
+        self.backend.delete_notes(ids)
+        for note_id in ids:
+            self.note_cache.invalidate(note_id)
+            self.revisions.invalidate(note_id)
+        if self.index is not None:
+            with self.index.batch():
+                for note_id in ids:
+                    self.index.remove(note_id)
+        else:
+            self._reindex_later(ids)
+
+    @instrumented("db.set_password_hash")
+    def set_password_hash(self, ids, password_hash):
+        """Locks many notes with the same password hash at once."""
+        if not ids:
+            return
+        self.backend.set_password_hash(ids, password_hash)
+        for note_id in ids:
+            self.note_cache.invalidate(note_id)
+
+    @instrumented("db.update_translations", size=_notes_size)
+    def update_translations(self, updates):
+        """Adds translations to many notes, {note_id: {lang: text}}, with
+        one write per store; other fields are left as they are."""
+        updates = {k: v for k, v in updates.items() if v}
+        if not updates:
+            return
+        self.backend.update_translations(updates)
+        for note_id in updates:
+            self.note_cache.invalidate(note_id)
+        if self.index is not None:
+            with self.index.batch():
+                for note_id, translations in updates.items():
+                    self.index.update_content(note_id, None, translations)
+        else:
+            self._reindex_later(updates)
+
+    @instrumented("db.delete_note")
+    def delete_note(self, note_id):
+        self.backend.delete_note(note_id)
+        self.note_cache.invalidate(note_id)
+        self.revisions.invalidate(note_id)
+        if self.index is not None:
+            self.index.remove(note_id)
+        else:
+            self._reindex_later([note_id])
@@ -1,10 +1,36 @@
 import csv
 import json
 import os
+import re
+from ..metrics import instrumented, metrics, text_size
+
+CHUNK_SIZE = 1 << 20  # characters per body chunk
+
+TXT_HEADER = "--- JOURNAL ENTRY ---"
+TXT_SEPARATOR = "-" * 20
+TXT_TRANSLATIONS = "METADATA_TRANSLATIONS:"
+CSV_COLUMNS = ("Title", "Main_Body", "Translations_JSON")
+
+
+def _file_size(result, filepath, *args, **kwargs):
+    return os.path.getsize(filepath) if result is not False else 0
+
+
+class FileParseError(Exception):
+    """A file that could not be read as a journal export."""
+
+    def __init__(self, message, path=None, line=None):
+        self.message = message
+        self.path = path
+        self.line = line
+        super().__init__(
+            f"Line {line}: {message}" if line is not None else message
+        )
 
 
 class FileManager:
     @staticmethod
+    @instrumented("file.export_to_txt", size=_file_size)
     def export_to_txt(filepath, title, body, translations):
         """Saves note and translations into a structured text file."""
         try:
@@ -22,10 +48,12 @@ class FileManager:
             return True
 
         except Exception as e:
+            metrics.error("file.export_to_txt", e)
             print(f"TXT Export Error: {e}")
             return False
 
     @staticmethod
+    @instrumented("file.export_to_csv", size=_file_size)
     def export_to_csv(filepath, title, body, translations):
         """Saves note and translations into a CSV row."""
         try:
@@ -41,43 +69,342 @@ class FileManager:
                 )
             return True
         except Exception as e:
+            metrics.error("file.export_to_csv", e)
             print(f"CSV Export Error: {e}")
             return False
 
     @staticmethod
+    @instrumented("file.open_entry", size=_file_size)
+    def open_entry(filepath, chunk_size=CHUNK_SIZE):
+        """EntryReader streaming a TXT or CSV export (or plain text)."""
+        return EntryReader(filepath, chunk_size)
+
+    @staticmethod
+    @instrumented("file.import_from_file", size=lambda r, *a: text_size(r))
     def import_from_file(filepath):
         """returns (title, body, translations_dict)."""
+        with FileManager.open_entry(filepath) as entry:
+            body = "".join(entry.body_chunks())
+            return entry.title, body, entry.translations
+
+
+class EntryReader:
+    """Reads one exported note without loading the file at once.
+
+    The title is parsed on open. body_chunks() then yields the body in
+    pieces of about `chunk_size` characters, and `translations` is
+    available once the body has been read. Memory stays bounded by the
+    chunk size (plus the translations) whatever the size of the file.
+    """
+
+    def __init__(self, path, chunk_size=CHUNK_SIZE):
+        self.path = path
+        self.chunk_size = chunk_size
+        self._translations = None
         try:
-            if filepath.endswith('.csv'):
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    reader = csv.DictReader(f)
-                    row = next(reader)
-                    return (
-                        row['Title'],
-                        row['Main_Body'],
-                        json.loads(row['Translations_JSON'])
-                    )
-            else:  # Handle TXT
-                with open(filepath, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                    if "METADATA_TRANSLATIONS:" in content:
-                        parts = content.split("METADATA_TRANSLATIONS:\n")
-                        header_body = parts[0]
-                        translations = json.loads(parts[1])
-
-                        # Extract title and body from header_body
-                        lines = header_body.splitlines()
-                        title = lines[1].replace("TITLE: ", "").strip()
-                        body_start = header_body.find("CONTENT:\n") + 9
-                        body_end = header_body.find(
-                            "\n--------------------",
-                            body_start
-                        )
-                        body = header_body[body_start:body_end].strip()
-                        return title, body, translations
-                    else:
-                        # Standard plain text file
-                        title = os.path.basename(filepath).split('.')[0]
-                        return title, content, {}
+            if path.endswith(".csv"):
+                self._file = open(path, "r", encoding="utf-8", newline="")
+                self._events = self._parse_csv()
+            else:
+                self._file = open(path, "r", encoding="utf-8")
+                self._events = self._parse_txt()
+            _, self.title = next(self._events)
+        except FileParseError:
+            self.close()
+            raise
+        except Exception as e:
+            self.close()
+            raise FileParseError(f"File parsing failed: {e}", path) from e
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        f = getattr(self, "_file", None)
+        if f is not None:
+            f.close()
+
+    def body_chunks(self):
+        try:
+            for kind, value in self._events:
+                if kind == "translations":
+                    self._translations = value
+                    return
+                yield value
+        except FileParseError:
+            raise
         except Exception as e:
-            raise Exception(f"File parsing failed: {e}")
+            raise FileParseError(
+                f"File parsing failed: {e}", self.path
+            ) from e
+
+    @property
+    def translations(self):
+        if self._translations is None:
+            for _ in self.body_chunks():
+                pass
+        return self._translations
+
+    @property
+    def _line_limit(self):
+        # Long enough for every section marker line
+        return max(self.chunk_size, 64)
+
+    def _error(self, line, message):
+        return FileParseError(message, self.path, line)
+
+    # ----------------------
+    # Body pieces
+    # ----------------------
+    def _coalesce(self, pieces, strip):
+        """Joins small pieces into chunks; strip trims like str.strip()."""
+        buffer = []
+        size = 0
+        held = ""  # trailing whitespace, kept until more text follows
+        started = not strip
+        for piece in pieces:
+            if strip:
+                if not started:
+                    piece = piece.lstrip()
+                    if not piece:
+                        continue
+                    started = True
+                text = piece.rstrip()
+                if not text:
+                    held += piece
+                    continue
+                piece, held = held + text, piece[len(text):]
+            buffer.append(piece)
+            size += len(piece)
+            if size >= self.chunk_size:
+                yield "body", "".join(buffer)
+                buffer = []
+                size = 0
+        if buffer:
+            yield "body", "".join(buffer)
+
+    # ----------------------
+    # TXT format
+    # ----------------------
+    def _parse_txt(self):
+        f = self._file
+        first = f.readline(self._line_limit)
+        if first.rstrip("\r\n") != TXT_HEADER:
+            # Plain text file: the whole content is the body
+            yield "title", os.path.basename(self.path).split('.')[0]
+            rest = iter(lambda: f.read(self.chunk_size), "")
+            yield from self._coalesce(
+                (piece for part in ([first], rest) for piece in part),
+                strip=False,
+            )
+            yield "translations", {}
+            return
+
+        title_line = f.readline()
+        if not title_line.startswith("TITLE: "):
+            raise self._error(2, "expected 'TITLE: <title>'")
+        yield "title", title_line.replace("TITLE: ", "").strip()
+        if f.readline().rstrip("\r\n") != TXT_SEPARATOR:
+            raise self._error(3, f"expected '{TXT_SEPARATOR}'")
+        if f.readline().rstrip("\r\n") != "CONTENT:":
+            raise self._error(4, "expected 'CONTENT:'")
+
+        state = {"line": 4, "marker": None}
+        yield from self._coalesce(self._txt_body(state), strip=True)
+        if state["marker"] is None:
+            raise self._error(
+                state["line"], f"missing '{TXT_TRANSLATIONS}' section"
+            )
+        try:
+            translations = json.loads(f.read())
+        except json.JSONDecodeError as e:
+            raise self._error(
+                state["marker"] + e.lineno,
+                f"invalid translations JSON: {e.msg}",
+            )
+        yield "translations", translations
+
+    def _txt_body(self, state):
+        # readline(limit) keeps a single huge line from being read whole;
+        # only full lines can be section markers
+        held = None
+        at_line_start = True
+        limit = self._line_limit
+        for piece in iter(lambda: self._file.readline(limit), ""):
+            whole_line = at_line_start and piece.endswith("\n")
+            at_line_start = piece.endswith("\n")
+            if at_line_start:
+                state["line"] += 1
+            text = piece.rstrip("\r\n") if whole_line else None
+            if text == TXT_TRANSLATIONS:
+                state["marker"] = state["line"]
+                return
+            if held is not None:
+                yield held
+                held = None
+            if text == TXT_SEPARATOR:
+                # Ends the body only if the translations marker follows
+                held = piece
+                continue
+            yield piece
+        if held is not None:
+            yield held
+
+    # ----------------------
+    # CSV format
+    # ----------------------
+    def _parse_csv(self):
+        fields = _CsvFields(self._file, self.chunk_size, self._error)
+        header = [
+            "".join(pieces) for pieces in fields.record()
+        ]
+        missing = [name for name in CSV_COLUMNS if name not in header]
+        if missing:
+            raise self._error(1, f"missing column(s): {', '.join(missing)}")
+        body_column = header.index("Main_Body")
+
+        values = {}
+        row = fields.record()
+        for column, pieces in enumerate(row):
+            if column == body_column:
+                if "Title" not in values:
+                    # The title comes first in our exports; otherwise the
+                    # body has to be buffered to find it
+                    values["Main_Body"] = "".join(pieces)
+                    continue
+                yield "title", values["Title"]
+                yield from self._coalesce(pieces, strip=False)
+                values["Main_Body"] = None
+            elif column < len(header):
+                values[header[column]] = "".join(pieces)
+            else:
+                for _ in pieces:
+                    pass
+        if len(values) < len(CSV_COLUMNS):
+            raise self._error(
+                fields.line, f"expected {len(header)} columns in the row"
+            )
+        if values["Main_Body"] is not None:
+            yield "title", values["Title"]
+            yield from self._coalesce([values["Main_Body"]], strip=False)
+        try:
+            translations = json.loads(values["Translations_JSON"])
+        except json.JSONDecodeError as e:
+            raise self._error(
+                fields.line, f"invalid translations JSON: {e.msg}"
+            )
+        yield "translations", translations
+
+
+class _CsvFields:
+    """Incremental reader for files written by csv.writer.
+
+    record() returns an iterator over the fields of the next record, and
+    each field is itself an iterator of text pieces, so one huge quoted
+    field never has to be held in memory at once. `line` is the current
+    physical line number.
+    """
+
+    SPECIAL = re.compile(r'[,\r\n]')
+
+    def __init__(self, f, chunk_size, error):
+        self._file = f
+        self._chunk_size = chunk_size
+        self._error = error
+        self._buf = ""
+        self._pos = 0
+        self._record_done = False
+        self.line = 1
+
+    def _more(self):
+        data = self._file.read(self._chunk_size)
+        if not data:
+            return False
+        self._buf = self._buf[self._pos:] + data
+        self._pos = 0
+        return True
+
+    def _available(self):
+        return self._pos < len(self._buf) or self._more()
+
+    def record(self):
+        self._record_done = False
+        if not self._available():
+            raise self._error(self.line, "unexpected end of file")
+        return self._fields()
+
+    def _fields(self):
+        while not self._record_done:
+            pieces = self._field()
+            yield pieces
+            # Whatever the caller did not read is skipped
+            for _ in pieces:
+                pass
+            self._delimiter()
+
+    def _field(self):
+        if self._available() and self._buf[self._pos] == '"':
+            self._pos += 1
+            return self._quoted()
+        return self._unquoted()
+
+    def _quoted(self):
+        start_line = self.line
+        while True:
+            end = self._buf.find('"', self._pos)
+            if end < 0:
+                piece = self._buf[self._pos:]
+                self._pos = len(self._buf)
+                self.line += piece.count("\n")
+                if piece:
+                    yield piece
+                if not self._more():
+                    raise self._error(
+                        start_line, "unterminated quoted field"
+                    )
+                continue
+            piece = self._buf[self._pos:end]
+            self.line += piece.count("\n")
+            if piece:
+                yield piece
+            self._pos = end
+            if end + 1 >= len(self._buf) and not self._more():
+                self._pos += 1
+                return
+            if self._buf[self._pos + 1] == '"':
+                self._pos += 2
+                yield '"'
+            else:
+                self._pos += 1
+                return
+
+    def _unquoted(self):
+        while self._available():
+            match = self.SPECIAL.search(self._buf, self._pos)
+            end = match.start() if match else len(self._buf)
+            if end > self._pos:
+                yield self._buf[self._pos:end]
+            self._pos = end
+            if match:
+                return
+
+    def _delimiter(self):
+        if not self._available():
+            self._record_done = True
+            return
+        char = self._buf[self._pos]
+        self._pos += 1
+        if char == ",":
+            return
+        if char == "\r":
+            if self._available() and self._buf[self._pos] == "\n":
+                self._pos += 1
+        elif char != "\n":
+            raise self._error(
+                self.line, f"unexpected {char!r} after a quoted field"
+            )
+        self.line += 1
+        self._record_done = True
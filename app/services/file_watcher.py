@@ -0,0 +1,297 @@
+import ctypes
+import ctypes.util
+import hashlib
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from .file_manager import FileManager
+
+# inotify(7) constants
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+# Editors either rewrite a file in place or rename a new one over it
+DIR_MASK = IN_CLOSE_WRITE | IN_MOVED_TO | IN_CREATE | IN_DELETE | \
+    IN_MOVED_FROM
+EVENT_HEADER = struct.Struct("iIII")
+
+
+def _digest(path):
+    sha = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            sha.update(chunk)
+    return sha.hexdigest()
+
+
+class FileIndex:
+    """Last seen (mtime, size, sha256) of each watched file.
+
+    A file whose mtime and size are unchanged is assumed unchanged; when
+    they differ the content hash decides, so touching a file or writing
+    identical content back does not count as a change.
+    """
+
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _stat(path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def record(self, path):
+        """Remembers the file as it is now, e.g. after writing it."""
+        stat = self._stat(path)
+        try:
+            digest = _digest(path) if stat else None
+        except OSError:
+            digest = None
+        with self._lock:
+            self._entries[path] = (stat, digest)
+
+    def forget(self, path):
+        with self._lock:
+            self._entries.pop(path, None)
+
+    def stat_changed(self, path):
+        with self._lock:
+            known = self._entries.get(path)
+        return known is None or known[0] != self._stat(path)
+
+    def changed(self, path):
+        """True when the content differs from the recorded one."""
+        stat = self._stat(path)
+        with self._lock:
+            known_stat, known_digest = self._entries.get(path, (None, None))
+        if stat is None or stat == known_stat:
+            return False
+        try:
+            digest = _digest(path)
+        except OSError:
+            return False
+        with self._lock:
+            self._entries[path] = (stat, digest)
+        return digest != known_digest
+
+
+class InotifySource:
+    """Directory watches through the Linux inotify API."""
+
+    def __init__(self):
+        self._libc = ctypes.CDLL(
+            ctypes.util.find_library("c") or "libc.so.6", use_errno=True
+        )
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs = {}
+        self._wds = {}
+
+    def add_dir(self, directory):
+        if directory in self._wds:
+            return
+        wd = self._libc.inotify_add_watch(
+            self.fd, os.fsencode(directory), DIR_MASK
+        )
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"cannot watch {directory}")
+        self._wds[directory] = wd
+        self._dirs[wd] = directory
+
+    def wait(self, timeout):
+        """Paths touched within `timeout` seconds, or None on overflow."""
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return set()
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return set()
+        paths = set()
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if mask & IN_Q_OVERFLOW:
+                return None
+            directory = self._dirs.get(wd)
+            if directory is not None and name:
+                paths.add(os.path.join(directory, os.fsdecode(name)))
+        return paths
+
+    def close(self):
+        os.close(self.fd)
+
+
+def _open_inotify():
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        return InotifySource()
+    except (OSError, AttributeError) as e:
+        print(f"inotify unavailable, polling linked files: {e}")
+        return None
+
+
+class LinkedFileWatcher:
+    """Pulls external edits of linked files back into the journal.
+
+    Runs on one background thread. The directories of all linked files
+    are watched with inotify on Linux; elsewhere, and as a safety net,
+    the files are stat()ed every `poll_interval` seconds. Once events
+    have been quiet for `settle` seconds the changed files are re-parsed
+    and written with DatabaseService.update_batch, and on_sync(note_ids)
+    is called from the watcher thread.
+    """
+
+    def __init__(self, db, on_sync=None, poll_interval=None, settle=0.3,
+                 batch_size=200, use_inotify=True):
+        self.db = db
+        self.on_sync = on_sync
+        self.settle = settle
+        self.batch_size = batch_size
+        self.index = FileIndex()
+        self._source = _open_inotify() if use_inotify else None
+        self.poll_interval = poll_interval or (
+            60.0 if self._source else 2.0
+        )
+        self._notes = {}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Loads the linked files and starts watching in the background."""
+        self._thread = threading.Thread(
+            target=self._run, name="file-watcher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+        if self._source is not None:
+            self._source.close()
+
+    def watch(self, note_id, path):
+        """Tracks note_id's linked file; also call it after writing one."""
+        path = os.path.abspath(path)
+        with self._lock:
+            # A note is linked to one file at a time
+            for old_path, ids in list(self._notes.items()):
+                ids.discard(note_id)
+                if not ids and old_path != path:
+                    del self._notes[old_path]
+                    self.index.forget(old_path)
+            self._notes.setdefault(path, set()).add(note_id)
+        self.index.record(path)
+        if self._source is not None:
+            try:
+                self._source.add_dir(os.path.dirname(path))
+            except OSError as e:
+                # Still covered by the periodic stat() pass
+                print(f"Linked file watch error: {e}")
+
+    def unwatch(self, note_id):
+        with self._lock:
+            for path, ids in list(self._notes.items()):
+                ids.discard(note_id)
+                if not ids:
+                    del self._notes[path]
+                    self.index.forget(path)
+
+    def watched(self):
+        with self._lock:
+            return set(self._notes)
+
+    def _run(self):
+        try:
+            for row in self.db.get_linked_files():
+                self.watch(row["id"], row["file_path"])
+        except Exception as e:
+            print(f"Linked file watcher could not load links: {e}")
+
+        pending = set()
+        last_event = 0.0
+        next_poll = time.monotonic() + self.poll_interval
+        while not self._stop.is_set():
+            now = time.monotonic()
+            timeout = self.settle if pending else max(0.0, next_poll - now)
+            if self._source is not None:
+                touched = self._source.wait(timeout)
+            else:
+                self._stop.wait(timeout)
+                touched = set()
+
+            watched = self.watched()
+            if touched is None:
+                touched = watched
+            touched &= watched
+            now = time.monotonic()
+            if now >= next_poll:
+                touched |= {
+                    p for p in watched - pending
+                    if self.index.stat_changed(p)
+                }
+                next_poll = now + self.poll_interval
+            if touched:
+                pending |= touched
+                last_event = now
+            elif pending and now - last_event >= self.settle:
+                self.sync(pending)
+                pending = set()
+
+    def sync(self, paths):
+        """Re-imports the files whose content changed; returns note ids."""
+        notes = []
+        sources = {}
+        for path in sorted(paths):
+            if not self.index.changed(path):
+                continue
+            try:
+                title, body, translations = FileManager.import_from_file(path)
+            except Exception as e:
+                print(f"Linked file sync error ({path}): {e}")
+                continue
+            with self._lock:
+                ids = sorted(self._notes.get(path, ()))
+            for note_id in ids:
+                sources[note_id] = path
+                notes.append({
+                    "id": note_id,
+                    "title": title,
+                    "body": body,
+                    "translations": translations,
+                })
+
+        synced = []
+        for start in range(0, len(notes), self.batch_size):
+            batch = notes[start:start + self.batch_size]
+            try:
+                self.db.update_batch(batch)
+            except Exception as e:
+                print(f"Linked file sync error: {e}")
+                # Forget the files so the next stat() pass retries them
+                for n in batch:
+                    self.index.forget(sources[n["id"]])
+                continue
+            synced.extend(n["id"] for n in batch)
+        if synced and self.on_sync is not None:
+            self.on_sync(synced)
+        return synced
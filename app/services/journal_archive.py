@@ -0,0 +1,193 @@
+import csv
+import gzip
+import json
+import sys
+import time
+
+ARCHIVE_COLUMNS = (
+    "id", "title", "type", "password_hash", "file_path", "body",
+    "translations",
+)
+GZIP_MAGIC = b"\x1f\x8b"
+
+# Bodies are stored in single CSV fields; lift the 128 KB default cap
+csv.field_size_limit(min(sys.maxsize, 2 ** 31 - 1))
+
+
+def _open_text(path, mode):
+    """Opens plain or gzip-compressed text; .gz is sniffed on read."""
+    if "r" in mode:
+        with open(path, "rb") as f:
+            compressed = f.read(2) == GZIP_MAGIC
+    else:
+        compressed = path.endswith(".gz")
+    if compressed:
+        return gzip.open(path, mode + "t", encoding="utf-8", newline="")
+    return open(path, mode, encoding="utf-8", newline="")
+
+
+def _format(path):
+    name = path[:-3] if path.endswith(".gz") else path
+    if name.endswith(".jsonl"):
+        return "jsonl"
+    if name.endswith(".csv"):
+        return "csv"
+    raise ValueError(f"Unsupported archive type: {path}")
+
+
+class JournalArchive:
+    """Backs up the whole journal to one file and restores it.
+
+    Archives are multi-row CSV (.csv) or JSON Lines (.jsonl), optionally
+    gzip-compressed (.csv.gz, .jsonl.gz). Each row holds a note's id,
+    metadata, body and translations. Both directions stream: notes are
+    read through DatabaseService.iter_notes and written back with
+    save_batch, `batch_size` at a time.
+    """
+
+    def __init__(self, db, batch_size=500):
+        self.db = db
+        self.batch_size = batch_size
+
+    def export_to(self, path, on_progress=None, cancel=None):
+        """Writes every note to `path`; returns the number written.
+
+        on_progress(count) is called after every batch; setting the
+        `cancel` threading.Event stops early.
+        """
+        kind = _format(path)
+        count = 0
+        with _open_text(path, "w") as f:
+            if kind == "csv":
+                writer = csv.writer(f)
+                writer.writerow(ARCHIVE_COLUMNS)
+
+                def write(note):
+                    writer.writerow([
+                        note.get("id"), note["title"], note.get("type"),
+                        note.get("password_hash"), note.get("file_path"),
+                        note.get("body", ""),
+                        json.dumps(
+                            note.get("translations") or {},
+                            ensure_ascii=False,
+                        ),
+                    ])
+            else:
+                def write(note):
+                    f.write(json.dumps(
+                        {name: note.get(name) for name in ARCHIVE_COLUMNS},
+                        ensure_ascii=False,
+                    ))
+                    f.write("\n")
+
+            for note in self.db.iter_notes(self.batch_size):
+                write(note)
+                count += 1
+                if count % self.batch_size == 0:
+                    if on_progress is not None:
+                        on_progress(count)
+                    if cancel is not None and cancel.is_set():
+                        break
+        if on_progress is not None:
+            on_progress(count)
+        return count
+
+    def import_from(self, path, on_progress=None, cancel=None):
+        """Adds every note in the archive as a new note.
+
+        Returns {"total", "imported", "ids", "errors", "seconds"} like
+        BulkImporter.run; errors are (line number, message) pairs.
+        """
+        report = {
+            "total": 0,
+            "imported": 0,
+            "ids": [],
+            "errors": [],
+            "seconds": 0.0,
+        }
+        start = time.perf_counter()
+        batch = []
+        lines = []
+
+        def flush():
+            try:
+                report["ids"].extend(self.db.save_batch(batch))
+                report["imported"] += len(batch)
+            except Exception as e:
+                report["errors"].extend(
+                    (line, f"Database write failed: {e}") for line in lines
+                )
+            batch.clear()
+            lines.clear()
+            if on_progress is not None:
+                on_progress(report["total"], len(report["errors"]))
+
+        with _open_text(path, "r") as f:
+            for line, record in self._records(f, _format(path)):
+                report["total"] += 1
+                try:
+                    batch.append(self._note(record))
+                    lines.append(line)
+                except (ValueError, TypeError, KeyError) as e:
+                    report["errors"].append((line, str(e)))
+                if len(batch) >= self.batch_size:
+                    flush()
+                    if cancel is not None and cancel.is_set():
+                        break
+            if batch:
+                flush()
+
+        report["seconds"] = time.perf_counter() - start
+        return report
+
+    @staticmethod
+    def _records(f, kind):
+        """Yields (line number, dict) for each row of the archive."""
+        if kind == "csv":
+            reader = csv.DictReader(f)
+            missing = set(ARCHIVE_COLUMNS) - set(reader.fieldnames or ())
+            if missing:
+                raise ValueError(
+                    f"Line 1: missing column(s): {', '.join(sorted(missing))}"
+                )
+            # line_num counts physical lines, so it is where the row ends
+            for row in reader:
+                yield reader.line_num, row
+        else:
+            for line, text in enumerate(f, 1):
+                if not text.strip():
+                    continue
+                try:
+                    yield line, json.loads(text)
+                except json.JSONDecodeError as e:
+                    yield line, {"_error": f"invalid JSON: {e.msg}"}
+
+    @staticmethod
+    def _note(record):
+        if not isinstance(record, dict):
+            raise ValueError("expected one object per line")
+        if "_error" in record:
+            raise ValueError(record["_error"])
+        translations = record.get("translations")
+        if translations in (None, ""):
+            translations = {}
+        if isinstance(translations, str):
+            try:
+                translations = json.loads(translations)
+            except json.JSONDecodeError as e:
+                raise ValueError(f"invalid translations JSON: {e.msg}")
+        if not isinstance(translations, dict):
+            raise ValueError("translations must be an object")
+        if not record.get("title"):
+            raise ValueError("missing title")
+        entry_type = record.get("type") or "TEXT"
+        if entry_type not in ("TEXT", "FILE"):
+            raise ValueError(f"unknown type {entry_type!r}")
+        return {
+            "title": record["title"],
+            "type": entry_type,
+            "password_hash": record.get("password_hash") or None,
+            "file_path": record.get("file_path") or None,
+            "body": record.get("body") or "",
+            "translations": translations,
+        }
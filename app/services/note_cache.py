@@ -0,0 +1,83 @@
+import sys
+import threading
+from collections import OrderedDict
+
+
+def _sizeof(value):
+    """Rough memory footprint of a loaded note (strings dominate)."""
+    if isinstance(value, dict):
+        return sys.getsizeof(value) + sum(
+            _sizeof(k) + _sizeof(v) for k, v in value.items()
+        )
+    if isinstance(value, (list, tuple)):
+        return sys.getsizeof(value) + sum(_sizeof(v) for v in value)
+    return sys.getsizeof(value)
+
+
+class NoteCache:
+    """LRU of fully loaded notes, bounded by the bytes they hold.
+
+    Every invalidation bumps a per-note generation; a load that started
+    before the invalidation cannot put its stale result back.
+    """
+
+    def __init__(self, max_bytes=32 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._generations = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def generation(self, note_id):
+        with self._lock:
+            return self._generations.get(str(note_id), 0)
+
+    def get(self, note_id):
+        key = str(note_id)
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item[0]
+
+    def put(self, note_id, note, generation=None):
+        key = str(note_id)
+        size = _sizeof(note)
+        with self._lock:
+            if generation is not None and (
+                generation != self._generations.get(key, 0)
+            ):
+                return
+            if size > self.max_bytes:
+                return
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.size -= old[1]
+            self._items[key] = (note, size)
+            self.size += size
+            while self.size > self.max_bytes:
+                _, (_, evicted) = self._items.popitem(last=False)
+                self.size -= evicted
+
+    def invalidate(self, note_id):
+        key = str(note_id)
+        with self._lock:
+            self._generations[key] = self._generations.get(key, 0) + 1
+            old = self._items.pop(key, None)
+            if old is not None:
+                self.size -= old[1]
+
+    def clear(self):
+        with self._lock:
+            for key in self._items:
+                self._generations[key] = self._generations.get(key, 0) + 1
+            self._items.clear()
+            self.size = 0
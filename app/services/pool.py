@@ -0,0 +1,93 @@
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+
+class MySQLPool:
+    """Bounded pool of MySQL connections shared by worker threads.
+
+    At most `max_size` connections exist at once; borrowers wait up to
+    `timeout` seconds for one to come back. Idle connections are pinged
+    only when they have been unused for `ping_after` seconds, instead of
+    before every query.
+    """
+
+    def __init__(self, connect, max_size=5, timeout=10.0, ping_after=30.0):
+        self._connect = connect
+        self.max_size = max_size
+        self.timeout = timeout
+        self.ping_after = ping_after
+        self._idle = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(max_size)
+
+    def prefill(self, count=1):
+        """Opens connections up front so configuration errors surface."""
+        conns = [self._connect() for _ in range(min(count, self.max_size))]
+        for conn in conns:
+            self._idle.put((conn, time.monotonic()))
+
+    @contextmanager
+    def connection(self):
+        if not self._slots.acquire(timeout=self.timeout):
+            raise TimeoutError("MySQL pool exhausted")
+        conn = None
+        try:
+            try:
+                conn, last_used = self._idle.get_nowait()
+                if time.monotonic() - last_used > self.ping_after:
+                    conn.ping(reconnect=True)
+            except queue.Empty:
+                conn = self._connect()
+            yield conn
+        except Exception as e:
+            # Connection-level failures leave the socket unusable
+            if conn is not None and _is_connection_error(e):
+                _close_quietly(conn)
+                conn = None
+            raise
+        finally:
+            if conn is not None:
+                self._idle.put((conn, time.monotonic()))
+            self._slots.release()
+
+    @contextmanager
+    def cursor(self):
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                yield cur
+
+    @contextmanager
+    def transaction(self):
+        """A cursor whose statements commit together or not at all."""
+        with self.connection() as conn:
+            conn.begin()
+            try:
+                with conn.cursor() as cur:
+                    yield cur
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+
+    def close(self):
+        while True:
+            try:
+                conn, _ = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            _close_quietly(conn)
+
+
+def _is_connection_error(error):
+    import pymysql
+    return isinstance(
+        error, (pymysql.err.OperationalError, pymysql.err.InterfaceError)
+    )
+
+
+def _close_quietly(conn):
+    try:
+        conn.close()
+    except Exception:
+        pass
@@ -0,0 +1,130 @@
+import threading
+from collections import OrderedDict
+from ..metrics import instrumented
+from ..models.delta import apply_delta, dump_delta, load_delta, make_delta
+from .backends.base import now
+
+
+class RevisionLog:
+    """History of note bodies, stored as deltas between saves.
+
+    A revision is either a snapshot (the full text) or a make_delta
+    against the revision before it. Snapshots are written for a note's
+    first revision, once `snapshot_every` revisions have been chained
+    since the last one, and whenever the delta would be at least half
+    the size of the text. Rebuilding any revision therefore reads one
+    snapshot and applies at most snapshot_every - 1 deltas, and a save
+    stores about as much as was edited.
+
+    The latest text of the `max_cached` notes recorded most recently is
+    kept, so autosaving a note diffs against it instead of reading and
+    replaying its chain again. The log must be the only writer of the
+    revisions it caches; invalidate() drops a note whose history went.
+    """
+
+    def __init__(self, backend, snapshot_every=20, max_cached=32):
+        self.backend = backend
+        self.snapshot_every = max(1, snapshot_every)
+        self.max_cached = max_cached
+        # Numbers come from the latest revision: one record at a time
+        self._lock = threading.Lock()
+        # note id -> (latest number, revisions since the snapshot, text)
+        self._latest = OrderedDict()
+
+    @staticmethod
+    def _rebuild(chain):
+        text = chain[0]["data"]
+        for revision in chain[1:]:
+            text = apply_delta(text, load_delta(revision["data"]))
+        return text
+
+    def history(self, note_id):
+        """Every revision's number, date, snapshot flag, text length and
+        stored size, oldest first."""
+        return self.backend.get_revisions(note_id)
+
+    @instrumented("revisions.get", size=lambda r, *a, **k: len(r or ""))
+    def get(self, note_id, number=None):
+        """Text of revision `number` (the latest when None), or None."""
+        chain = self.backend.get_revision_chain(note_id, number)
+        if not chain or number is not None \
+                and chain[-1]["number"] != number:
+            return None
+        return self._rebuild(chain)
+
+    @instrumented("revisions.record")
+    def record(self, note_id, body, before=None):
+        """Adds `body` as a note's next revision unless it is the latest
+        one already; returns the new number, or None.
+
+        before() returns the text `body` replaces. It is only called for
+        a note without history, whose earlier text then becomes
+        revision 1 so the first save can be undone too.
+        """
+        with self._lock:
+            latest = self._latest_of(note_id)
+            if latest:
+                number, chained, previous = latest
+                if body == previous:
+                    return None
+                base = previous if chained < self.snapshot_every else None
+            else:
+                number, chained, base = 0, 0, None
+                earlier = before() if before else None
+                if earlier and earlier != body:
+                    self._save(note_id, 1, earlier, None)
+                    number, chained = 1, 1
+                    base = earlier if self.snapshot_every > 1 else None
+            number += 1
+            snapshot = self._save(note_id, number, body, base)
+            self._remember(
+                note_id, (number, 1 if snapshot else chained + 1, body)
+            )
+            return number
+
+    def has_history(self, note_id):
+        """Whether the note has a revision yet; its latest is then cached
+        for the record() that usually follows."""
+        with self._lock:
+            return self._latest_of(note_id) is not None
+
+    def _latest_of(self, note_id):
+        latest = self._latest.get(note_id)
+        if latest is None:
+            chain = self.backend.get_revision_chain(note_id)
+            if chain:
+                latest = (chain[-1]["number"], len(chain),
+                          self._rebuild(chain))
+                self._remember(note_id, latest)
+        else:
+            self._latest.move_to_end(note_id)
+        return latest
+
+    def invalidate(self, note_id):
+        """Forgets the cached latest text of a note."""
+        with self._lock:
+            self._latest.pop(note_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._latest.clear()
+
+    def _remember(self, note_id, latest):
+        self._latest[note_id] = latest
+        while len(self._latest) > self.max_cached:
+            self._latest.popitem(last=False)
+
+    def _save(self, note_id, number, text, base):
+        data = None
+        if base is not None:
+            data = dump_delta(make_delta(base, text))
+            if len(data) * 2 >= len(text):
+                data = None
+        self.backend.save_revision(note_id, {
+            "number": number,
+            "created_at": now(),
+            "snapshot": data is None,
+            "length": len(text),
+            "data": text if data is None else data,
+        })
+        return data is None
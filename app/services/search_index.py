@@ -0,0 +1,374 @@
+import heapq
+import math
+import os
+import re
+import sqlite3
+import threading
+from collections import Counter
+from contextlib import contextmanager
+
+DEFAULT_INDEX_PATH = os.path.join(
+    os.path.expanduser("~"), ".journal_project", "search_index.db"
+)
+
+# Title hits rank above body hits, translations slightly below the body
+FIELD_WEIGHTS = {"title": 3.0, "body": 1.0}
+TRANSLATION_WEIGHT = 0.8
+
+TOKEN_RE = re.compile(r"\w+")
+QUERY_RE = re.compile(r"(\w+)(\*?)")
+
+# Limits for prefix expansion and IN (...) lookups
+MAX_EXPANSIONS = 64
+SQL_CHUNK = 500
+
+
+def tokenize(text):
+    return TOKEN_RE.findall((text or "").casefold())
+
+
+class TermCounter:
+    """Term frequencies of a text that arrives in pieces."""
+
+    def __init__(self):
+        self.counts = Counter()
+        self._carry = ""
+
+    def feed(self, chunk):
+        text = self._carry + chunk.casefold()
+        # A word cut at the chunk edge is finished by the next chunk
+        cut = len(text)
+        while cut and (text[cut - 1].isalnum() or text[cut - 1] == "_"):
+            cut -= 1
+        self._carry = text[cut:]
+        self.counts.update(TOKEN_RE.findall(text, 0, cut))
+
+    def result(self):
+        if self._carry:
+            self.counts[self._carry] += 1
+            self._carry = ""
+        return self.counts
+
+
+class SearchIndex:
+    """Persistent inverted index over note titles, bodies and translations.
+
+    Postings live in a local SQLite file keyed by (term, doc, field), so a
+    save only rewrites the postings of the fields that changed; `df` is
+    the number of documents a term occurs in, whatever the field. Queries
+    AND their terms together, treat the last term (or any term ending in
+    '*') as a prefix, and rank with a BM25-style weight.
+    """
+
+    def __init__(self, path=DEFAULT_INDEX_PATH):
+        if path != ":memory:":
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+        self._lock = threading.RLock()
+        self._in_batch = False
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS docs (
+                doc_id INTEGER PRIMARY KEY,
+                title TEXT NOT NULL DEFAULT ''
+            );
+            CREATE TABLE IF NOT EXISTS terms (
+                term TEXT PRIMARY KEY,
+                df INTEGER NOT NULL
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS postings (
+                term TEXT NOT NULL,
+                doc_id INTEGER NOT NULL,
+                field TEXT NOT NULL,
+                tf INTEGER NOT NULL,
+                PRIMARY KEY (term, doc_id, field)
+            ) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS postings_doc
+                ON postings (doc_id, field);
+            """
+        )
+        if self.conn.execute("PRAGMA user_version").fetchone()[0] < 1:
+            # Indexes written before version 1 counted df once per field
+            self.conn.execute("DELETE FROM terms")
+            self.conn.execute(
+                "INSERT INTO terms (term, df) SELECT term, "
+                "COUNT(DISTINCT doc_id) FROM postings GROUP BY term"
+            )
+            self.conn.execute("PRAGMA user_version = 1")
+        self.conn.commit()
+
+    # ----------------------
+    # Updates
+    # ----------------------
+    @contextmanager
+    def batch(self):
+        """Groups every update made inside the block into one transaction."""
+        with self._lock:
+            outer = not self._in_batch
+            self._in_batch = True
+            try:
+                yield self
+                if outer:
+                    self.conn.commit()
+            except BaseException:
+                if outer:
+                    self.conn.rollback()
+                raise
+            finally:
+                if outer:
+                    self._in_batch = False
+
+    def index_title(self, doc_id, title):
+        with self.batch():
+            self.conn.execute(
+                "INSERT INTO docs (doc_id, title) VALUES (?, ?) "
+                "ON CONFLICT(doc_id) DO UPDATE SET title = excluded.title",
+                (int(doc_id), title or ""),
+            )
+            self._replace_field(int(doc_id), "title", title)
+
+    def index_content(self, doc_id, body, translations=None):
+        """Reindexes the body and the full set of translations.
+
+        `body` may also be a Counter of terms from a TermCounter.
+        """
+        doc_id = int(doc_id)
+        translations = translations or {}
+        with self.batch():
+            self.conn.execute(
+                "INSERT OR IGNORE INTO docs (doc_id) VALUES (?)", (doc_id,)
+            )
+            self._replace_field(doc_id, "body", body)
+            stale = {
+                row[0] for row in self.conn.execute(
+                    "SELECT DISTINCT field FROM postings "
+                    "WHERE doc_id = ? AND field LIKE 'tr:%'",
+                    (doc_id,),
+                )
+            } - {f"tr:{lang}" for lang in translations}
+            for field in stale:
+                self._replace_field(doc_id, field, "")
+            for lang, text in translations.items():
+                self._replace_field(doc_id, f"tr:{lang}", text)
+
+    def update_content(self, doc_id, body=None, translations=None,
+                       removed=()):
+        """Reindexes only the fields a partial save touched."""
+        doc_id = int(doc_id)
+        with self.batch():
+            self.conn.execute(
+                "INSERT OR IGNORE INTO docs (doc_id) VALUES (?)", (doc_id,)
+            )
+            if body is not None:
+                self._replace_field(doc_id, "body", body)
+            for lang, text in (translations or {}).items():
+                self._replace_field(doc_id, f"tr:{lang}", text)
+            for lang in removed:
+                self._replace_field(doc_id, f"tr:{lang}", "")
+
+    def remove(self, doc_id):
+        doc_id = int(doc_id)
+        with self.batch():
+            fields = [
+                row[0] for row in self.conn.execute(
+                    "SELECT DISTINCT field FROM postings WHERE doc_id = ?",
+                    (doc_id,),
+                )
+            ]
+            for field in fields:
+                self._replace_field(doc_id, field, "")
+            self.conn.execute("DELETE FROM docs WHERE doc_id = ?", (doc_id,))
+
+    def clear(self):
+        with self.batch():
+            self.conn.execute("DELETE FROM postings")
+            self.conn.execute("DELETE FROM terms")
+            self.conn.execute("DELETE FROM docs")
+
+    def _replace_field(self, doc_id, field, text):
+        # Caller holds the lock and the transaction
+        old = {
+            row[0] for row in self.conn.execute(
+                "SELECT term FROM postings WHERE doc_id = ? AND field = ?",
+                (doc_id, field),
+            )
+        }
+        new = text if isinstance(text, Counter) else Counter(tokenize(text))
+        if old:
+            self.conn.execute(
+                "DELETE FROM postings WHERE doc_id = ? AND field = ?",
+                (doc_id, field),
+            )
+        # df counts documents: only terms the document gains or loses as
+        # a whole change it, not those still in one of its other fields
+        elsewhere = self._doc_terms(doc_id, old ^ new.keys())
+        lost = old - new.keys() - elsewhere
+        gained = new.keys() - old - elsewhere
+        if lost:
+            self.conn.executemany(
+                "UPDATE terms SET df = df - 1 WHERE term = ?",
+                [(t,) for t in lost],
+            )
+        if new:
+            self.conn.executemany(
+                "INSERT INTO postings (term, doc_id, field, tf) "
+                "VALUES (?, ?, ?, ?)",
+                [(t, doc_id, field, tf) for t, tf in new.items()],
+            )
+        if gained:
+            self.conn.executemany(
+                "INSERT INTO terms (term, df) VALUES (?, 1) "
+                "ON CONFLICT(term) DO UPDATE SET df = df + 1",
+                [(t,) for t in gained],
+            )
+        if lost:
+            self.conn.execute("DELETE FROM terms WHERE df <= 0")
+
+    def _doc_terms(self, doc_id, terms):
+        """Those of `terms` that still have postings for `doc_id`."""
+        terms = list(terms)
+        found = set()
+        for i in range(0, len(terms), SQL_CHUNK):
+            chunk = terms[i:i + SQL_CHUNK]
+            marks = ",".join("?" * len(chunk))
+            found.update(row[0] for row in self.conn.execute(
+                "SELECT DISTINCT term FROM postings "
+                f"WHERE doc_id = ? AND term IN ({marks})",
+                [doc_id, *chunk],
+            ))
+        return found
+
+    # ----------------------
+    # Queries
+    # ----------------------
+    def is_empty(self):
+        with self._lock:
+            return self.conn.execute(
+                "SELECT 1 FROM docs LIMIT 1"
+            ).fetchone() is None
+
+    def search(self, query, limit=50):
+        """Returns up to `limit` {"id", "title", "score"} rows, best first."""
+        parsed = self._parse(query)
+        if not parsed:
+            return []
+
+        with self._lock:
+            n_docs = self.conn.execute(
+                "SELECT COUNT(*) FROM docs"
+            ).fetchone()[0] or 1
+
+            expanded = []
+            for word, is_prefix in parsed:
+                terms = self._expand(word, is_prefix)
+                if not terms:
+                    return []
+                expanded.append(terms)
+            # Rarest query term first: it bounds the candidate set, so a
+            # word found in most notes is only looked up in the documents
+            # the rarer words left, never scanned in full
+            expanded.sort(key=lambda terms: sum(df for _, df in terms))
+
+            if len(expanded) == 1:
+                # Single word: let SQLite rank and cut to the top hits
+                best = self._score(expanded[0], n_docs, limit=limit)
+            else:
+                scores = dict(self._score(expanded[0], n_docs))
+                for terms in expanded[1:]:
+                    if not scores:
+                        return []
+                    hits = self._score(terms, n_docs, candidates=scores)
+                    scores = {
+                        d: s + scores[d] for d, s in hits if d in scores
+                    }
+                best = heapq.nlargest(
+                    limit, scores.items(), key=lambda i: i[1]
+                )
+            titles = self._titles([doc_id for doc_id, _ in best])
+
+        return [
+            {"id": doc_id, "title": titles.get(doc_id, ""), "score": score}
+            for doc_id, score in best
+        ]
+
+    @staticmethod
+    def _parse(query):
+        query = (query or "").casefold()
+        matches = list(QUERY_RE.finditer(query))
+        parsed = []
+        for i, match in enumerate(matches):
+            # The word still being typed is matched as a prefix
+            typing = i == len(matches) - 1 and match.end() == len(query)
+            parsed.append((match.group(1), bool(match.group(2)) or typing))
+        return parsed
+
+    def _expand(self, word, is_prefix):
+        if not is_prefix:
+            row = self.conn.execute(
+                "SELECT term, df FROM terms WHERE term = ?", (word,)
+            ).fetchone()
+            return [row] if row else []
+        return self.conn.execute(
+            "SELECT term, df FROM terms WHERE term >= ? AND term < ? "
+            "ORDER BY df DESC LIMIT ?",
+            (word, word + "\U0010ffff", MAX_EXPANSIONS),
+        ).fetchall()
+
+    def _score(self, terms, n_docs, candidates=None, limit=None):
+        """Sums the BM25-style weight of `terms` per document inside SQLite.
+
+        Aggregating in SQL keeps the per-posting loop out of Python, so a
+        common word costs one grouped scan instead of one tuple per hit.
+        """
+        weights = []
+        for term, df in terms:
+            weights.extend(
+                (term, math.log(1 + (n_docs - df + 0.5) / (df + 0.5)))
+            )
+        table = " UNION ALL ".join(
+            ["SELECT ? AS term, ? AS idf"]
+            + ["SELECT ?, ?"] * (len(terms) - 1)
+        )
+        sql = (
+            "SELECT p.doc_id, SUM(w.idf * p.tf * 2.2 / (p.tf + 1.2) * "
+            "CASE p.field WHEN 'title' THEN ? WHEN 'body' THEN ? ELSE ? END"
+            f") AS score FROM ({table}) AS w "
+            "JOIN postings p ON p.term = w.term"
+        )
+        params = [
+            FIELD_WEIGHTS["title"], FIELD_WEIGHTS["body"], TRANSLATION_WEIGHT,
+            *weights,
+        ]
+
+        df_total = sum(df for _, df in terms)
+        if candidates is None or len(candidates) > df_total:
+            sql += " GROUP BY p.doc_id"
+            if limit is not None:
+                sql += " ORDER BY score DESC LIMIT ?"
+                params.append(limit)
+            return self.conn.execute(sql, params).fetchall()
+
+        # Few candidates left: look up just those documents
+        ids = list(candidates)
+        rows = []
+        for i in range(0, len(ids), SQL_CHUNK):
+            chunk = ids[i:i + SQL_CHUNK]
+            marks = ",".join("?" * len(chunk))
+            rows.extend(self.conn.execute(
+                f"{sql} WHERE p.doc_id IN ({marks}) GROUP BY p.doc_id",
+                params + chunk,
+            ))
+        return rows
+
+    def _titles(self, ids):
+        titles = {}
+        for i in range(0, len(ids), SQL_CHUNK):
+            chunk = ids[i:i + SQL_CHUNK]
+            marks = ",".join("?" * len(chunk))
+            titles.update(self.conn.execute(
+                f"SELECT doc_id, title FROM docs WHERE doc_id IN ({marks})",
+                chunk,
+            ))
+        return titles
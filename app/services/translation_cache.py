@@ -0,0 +1,177 @@
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from ..metrics import metrics
+
+DEFAULT_CACHE_PATH = os.path.join(
+    os.path.expanduser("~"), ".journal_project", "translation_cache.db"
+)
+
+
+class TranslationCache:
+    """Translations keyed by (content hash, source, target language).
+
+    Entries live in the `translation_cache` collection of the journal's
+    MongoDB database, next to `entries`. When MongoDB is unavailable the
+    cache falls back to a local SQLite file. Both stores keep at most
+    `max_entries` items and evict the least recently used ones.
+    """
+
+    EVICT_EVERY = 100  # puts between eviction passes
+
+    def __init__(self, mongo=None, path=DEFAULT_CACHE_PATH,
+                 max_entries=20000):
+        self.mongo = mongo
+        self.path = path
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        self._disk = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(text, source, target):
+        digest = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        return f"{digest}:{source}:{target}"
+
+    def get(self, text, source, target):
+        key = self.key(text, source, target)
+        value = self._mongo_get(key)
+        if value is None:
+            value = self._disk_get(key)
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def put(self, text, source, target, translation):
+        if translation is None:
+            return
+        key = self.key(text, source, target)
+        if not self._mongo_put(key, translation):
+            self._disk_put(key, translation)
+        with self._lock:
+            self._puts += 1
+            evict = self._puts % self.EVICT_EVERY == 0
+        if evict:
+            self.evict()
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    # ----------------------
+    # MongoDB store
+    # ----------------------
+    def _mongo_get(self, key):
+        if self.mongo is None:
+            return None
+        try:
+            doc = self.mongo.translation_cache.find_one_and_update(
+                {"_id": key}, {"$set": {"last_used": time.time()}}
+            )
+            return doc["translation"] if doc else None
+        except Exception as e:
+            metrics.error("translation_cache.read", e)
+            print(f"Translation cache read error: {e}")
+            return None
+
+    def _mongo_put(self, key, translation):
+        if self.mongo is None:
+            return False
+        try:
+            self.mongo.translation_cache.update_one(
+                {"_id": key},
+                {"$set": {
+                    "translation": translation,
+                    "last_used": time.time(),
+                }},
+                upsert=True,
+            )
+            return True
+        except Exception as e:
+            metrics.error("translation_cache.write", e)
+            print(f"Translation cache write error: {e}")
+            return False
+
+    # ----------------------
+    # On-disk fallback
+    # ----------------------
+    def _disk_conn(self):
+        if self._disk is None:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            self._disk = sqlite3.connect(self.path, check_same_thread=False)
+            self._disk.execute(
+                "CREATE TABLE IF NOT EXISTS cache ("
+                "key TEXT PRIMARY KEY, translation TEXT NOT NULL, "
+                "last_used REAL NOT NULL)"
+            )
+            self._disk.execute(
+                "CREATE INDEX IF NOT EXISTS cache_lru ON cache (last_used)"
+            )
+            self._disk.commit()
+        return self._disk
+
+    def _disk_get(self, key):
+        with self._lock:
+            conn = self._disk_conn()
+            row = conn.execute(
+                "SELECT translation FROM cache WHERE key = ?", (key,)
+            ).fetchone()
+            if row:
+                conn.execute(
+                    "UPDATE cache SET last_used = ? WHERE key = ?",
+                    (time.time(), key),
+                )
+                conn.commit()
+            return row[0] if row else None
+
+    def _disk_put(self, key, translation):
+        with self._lock:
+            conn = self._disk_conn()
+            conn.execute(
+                "INSERT OR REPLACE INTO cache (key, translation, last_used) "
+                "VALUES (?, ?, ?)",
+                (key, translation, time.time()),
+            )
+            conn.commit()
+
+    # ----------------------
+    # Eviction
+    # ----------------------
+    def evict(self):
+        """Drops least recently used entries beyond `max_entries`."""
+        if self.mongo is not None:
+            try:
+                coll = self.mongo.translation_cache
+                coll.create_index("last_used")
+                extra = coll.estimated_document_count() - self.max_entries
+                if extra > 0:
+                    old = coll.find({}, {"_id": 1}).sort(
+                        "last_used", 1
+                    ).limit(extra)
+                    ids = [doc["_id"] for doc in old]
+                    coll.delete_many({"_id": {"$in": ids}})
+            except Exception as e:
+                metrics.error("translation_cache.evict", e)
+                print(f"Translation cache eviction error: {e}")
+
+        with self._lock:
+            conn = self._disk_conn()
+            conn.execute(
+                "DELETE FROM cache WHERE key IN ("
+                "SELECT key FROM cache ORDER BY last_used DESC "
+                "LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+            conn.commit()
@@ -0,0 +1,44 @@
+import queue
+
+
+class TkDispatcher:
+    """Hands results from worker threads back to the Tk thread.
+
+    Tk widgets may only be touched from the thread running mainloop, so
+    workers enqueue callbacks here and the Tk thread drains the queue
+    with after().
+    """
+
+    def __init__(self, widget, interval_ms=25):
+        self.widget = widget
+        self.interval_ms = interval_ms
+        self._calls = queue.SimpleQueue()
+        self.widget.after(self.interval_ms, self._drain)
+
+    def call(self, fn, *args):
+        """Thread-safe: schedules fn(*args) on the Tk thread."""
+        self._calls.put((fn, args))
+
+    def then(self, future, on_done, on_error=None):
+        """Calls on_done(result) or on_error(exc) on the Tk thread."""
+        def done(f):
+            error = f.exception()
+            if error is None:
+                self.call(on_done, f.result())
+            elif on_error is not None:
+                self.call(on_error, error)
+            else:
+                print(f"Background task failed: {error}")
+        future.add_done_callback(done)
+
+    def _drain(self):
+        try:
+            while True:
+                fn, args = self._calls.get_nowait()
+                try:
+                    fn(*args)
+                except Exception as e:
+                    print(f"UI callback failed: {e}")
+        except queue.Empty:
+            pass
+        self.widget.after(self.interval_ms, self._drain)
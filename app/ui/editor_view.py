@@ -1,7 +1,22 @@
+from tkinter import TclError, simpledialog
 import customtkinter as ctk
+from app.metrics import instrumented
+from app.models.document import LargeDocument
 
 
 class EditorView(ctk.CTkFrame):
+    """Title and body editor.
+
+    Bodies over LARGE_DOCUMENT_CHARS (imported logs and the like) switch
+    to a large-document mode: the text is inserted CHUNK_CHARS at a time
+    from after() callbacks so the window keeps responding, and a
+    LargeDocument records which lines are edited, so get_body reads only
+    those lines back from the widget instead of the whole text.
+    """
+
+    LARGE_DOCUMENT_CHARS = 512 * 1024
+    CHUNK_CHARS = 64 * 1024
+
     def __init__(self, master):
         super().__init__(master)
 
@@ -15,6 +30,163 @@ class EditorView(ctk.CTkFrame):
 
         self.textbox = ctk.CTkTextbox(self)
         self.textbox.grid(row=1, column=0, padx=20, pady=10, sticky="nsew")
+        self.textbox.bind("<Control-g>", self.ask_line)
 
         self.save_btn = ctk.CTkButton(self, text="💾 Save")
         self.save_btn.grid(row=2, column=0, pady=10)
+        self.status_label = ctk.CTkLabel(
+            self, text="", font=("Arial", 11), text_color="#888888"
+        )
+
+        self.document = None  # LargeDocument while in large-document mode
+        self._loader = None  # after() id of the next chunk
+        self._chunks = None
+        self._loaded = 0  # characters of the document inserted so far
+        self._pending_line = None
+        self._intercept_edits()
+
+    # ----------------------
+    # Edit tracking
+    # ----------------------
+    def _intercept_edits(self):
+        # Route the Tk widget's command through _dispatch, as IDLE's
+        # WidgetRedirector does, to see every insert and delete
+        widget = self.textbox._textbox
+        self._tk = widget.tk
+        self._widget_command = widget._w + "_unwatched"
+        self._tk.call("rename", widget._w, self._widget_command)
+        self._tk.createcommand(widget._w, self._dispatch)
+
+    def _call(self, *args):
+        return self._tk.call((self._widget_command,) + args)
+
+    def _line(self, index):
+        # "end" is past the newline Tk keeps after the last line
+        last = self.document.line_count - 1
+        line = int(str(self._call("index", index)).split(".")[0]) - 1
+        return min(line, last)
+
+    def _dispatch(self, *args):
+        if self.document is not None and self._chunks is None and args:
+            try:
+                self._record_edit(args)
+            except TclError:
+                pass
+        try:
+            return self._call(*args)
+        except TclError:
+            return ""
+
+    def _record_edit(self, args):
+        operation = args[0]
+        if operation == "insert":
+            text = "".join(args[2::2])
+            self.document.edit(self._line(args[1]), 1, 1 + text.count("\n"))
+        elif operation == "delete":
+            first = self._line(args[1])
+            last = self._line(args[2] if len(args) > 2 else f"{args[1]}+1c")
+            self.document.edit(first, last - first + 1, 1)
+        elif operation == "replace":
+            first, last = self._line(args[1]), self._line(args[2])
+            text = "".join(args[3::2])
+            self.document.edit(first, last - first + 1, 1 + text.count("\n"))
+
+    def _read_lines(self, line, count, last):
+        end = "end-1c" if last else f"{line + count + 1}.0"
+        return self._call("get", f"{line + 1}.0", end)
+
+    # ----------------------
+    # Body
+    # ----------------------
+    @instrumented("ui.editor.set_body")
+    def set_body(self, text):
+        """Shows `text`; long ones are inserted over several after() calls."""
+        self._stop_loading()
+        self.textbox.configure(state="normal")
+        self.textbox.delete("1.0", "end")
+        if len(text) < self.LARGE_DOCUMENT_CHARS:
+            self.document = None
+            self.textbox.insert("1.0", text)
+            return
+        self.document = LargeDocument(text)
+        self._chunks = self.document.chunks(self.CHUNK_CHARS)
+        self._loaded = 0
+        # Read-only until every chunk is in, so no edit lands mid-load
+        self.textbox.configure(state="disabled")
+        self.status_label.grid(row=3, column=0, padx=20, sticky="w")
+        self._load_next()
+
+    def get_body(self):
+        """The text in the editor; in large-document mode only edited
+        lines are read back from the widget."""
+        if self.document is None:
+            return self.textbox.get("1.0", "end-1c")
+        return self.document.body(self._read_lines)
+
+    @property
+    def loading(self):
+        return self._chunks is not None
+
+    @instrumented("ui.editor.load_chunk")
+    def _load_next(self):
+        self._loader = None
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self._chunks = None
+            self.textbox.configure(state="normal")
+            self.status_label.grid_forget()
+            if self._pending_line is not None:
+                self.goto_line(self._pending_line)
+            return
+        self._call("configure", "-state", "normal")
+        self._call("insert", "end-1c", chunk)
+        self._call("configure", "-state", "disabled")
+        self._loaded += len(chunk)
+        total = len(self.document.text)
+        self.status_label.configure(
+            text=f"Loading {self._loaded / 2 ** 20:.1f} of "
+                 f"{total / 2 ** 20:.1f} MB..."
+        )
+        line = self._pending_line
+        if line is not None and line < self.document.line_of(self._loaded)[0]:
+            self.goto_line(line)
+        self._loader = self.after(1, self._load_next)
+
+    def _stop_loading(self):
+        if self._loader is not None:
+            self.after_cancel(self._loader)
+            self._loader = None
+        self._chunks = None
+        self._pending_line = None
+        self.status_label.grid_forget()
+
+    # ----------------------
+    # Jumps
+    # ----------------------
+    def goto_line(self, line):
+        """Scrolls to line `line` (from 1), once it has been loaded."""
+        self._pending_line = line
+        if self.loading:
+            loaded = self.document.line_of(self._loaded)[0]
+            if line - 1 >= loaded:
+                return
+        self._pending_line = None
+        self.textbox.see(f"{line}.0")
+        self.textbox.mark_set("insert", f"{line}.0")
+
+    def goto_offset(self, offset):
+        """Scrolls to a character offset of the loaded text, found through
+        the line index rather than Tk counting characters from the top."""
+        if self.document is None:
+            self.textbox.see(f"1.0+{offset}c")
+            return
+        line, _ = self.document.line_of(offset)
+        current = self.document.current_line(line)
+        if current is not None:
+            self.goto_line(current + 1)
+
+    def ask_line(self, event=None):
+        line = simpledialog.askinteger("Go to Line", "Line:", minvalue=1)
+        if line:
+            self.goto_line(line)
+        return "break"
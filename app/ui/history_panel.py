@@ -0,0 +1,140 @@
+import difflib
+import customtkinter as ctk
+from tkinter import messagebox
+
+DIFF_COLORS = {"+": "#2e7d32", "-": "#c0392b", "@": "#5dade2"}
+
+
+def describe_revision(revision):
+    """One-line label of a get_revisions row."""
+    kind = "full copy" if revision["snapshot"] else \
+        f"{revision['size']:,} chars changed"
+    return (f"#{revision['number']}  {revision['created_at'][:16]}  "
+            f"{revision['length']:,} chars ({kind})")
+
+
+def revision_diff(old, new, max_lines=3000):
+    """Unified diff of two bodies, line by line, cut after `max_lines`
+    lines so a rewritten log does not flood the text box."""
+    lines = []
+    diff = difflib.unified_diff(
+        old.splitlines(), new.splitlines(),
+        "revision", "editor", lineterm="",
+    )
+    for line in diff:
+        if len(lines) == max_lines:
+            lines.append("... (diff cut short)")
+            break
+        lines.append(line)
+    return "\n".join(lines) if lines else "No differences."
+
+
+class HistoryPanel(ctk.CTkToplevel):
+    """Saved revisions of one note: the changes from a revision to the
+    text in the editor, and a button to put that revision back.
+
+    Revisions are rebuilt and diffed on the database pool; on_restore
+    (number, text) is called on the Tk thread.
+    """
+
+    def __init__(self, master, db, dispatcher, note_id, title, current_body,
+                 on_restore):
+        super().__init__(master)
+        self.title(f"History - {title}")
+        self.geometry("1000x600")
+        self.db = db
+        self.dispatcher = dispatcher
+        self.note_id = note_id
+        self.current_body = current_body
+        self.on_restore = on_restore
+        self.selected = None  # (number, text) shown in the diff
+
+        self.grid_columnconfigure(1, weight=1)
+        self.grid_rowconfigure(0, weight=1)
+        self.revision_list = ctk.CTkScrollableFrame(self, width=330)
+        self.revision_list.grid(row=0, column=0, padx=10, pady=10,
+                                sticky="ns")
+        self.diff_box = ctk.CTkTextbox(self, font=("Courier", 12),
+                                       wrap="none")
+        self.diff_box.grid(row=0, column=1, padx=(0, 10), pady=10,
+                           sticky="nsew")
+        for prefix, color in DIFF_COLORS.items():
+            self.diff_box.tag_config(prefix, foreground=color)
+
+        bar = ctk.CTkFrame(self, fg_color="transparent")
+        bar.grid(row=1, column=0, columnspan=2, sticky="ew", padx=10,
+                 pady=(0, 10))
+        self.status_label = ctk.CTkLabel(bar, text="Loading revisions...")
+        self.status_label.pack(side="left")
+        self.restore_btn = ctk.CTkButton(
+            bar, text="↩ Restore", width=110, state="disabled",
+            command=self.restore,
+        )
+        self.restore_btn.pack(side="right", padx=5)
+
+        self.dispatcher.then(
+            self.db.submit(self.db.get_revisions, note_id),
+            self.show_revisions, self.show_error,
+        )
+
+    def show_revisions(self, revisions):
+        if not self.winfo_exists():
+            return
+        if not revisions:
+            self.status_label.configure(text="No saved revisions yet.")
+            return
+        self.status_label.configure(
+            text=f"{len(revisions)} revisions; pick one to compare."
+        )
+        for revision in reversed(revisions):
+            ctk.CTkButton(
+                self.revision_list, text=describe_revision(revision),
+                anchor="w", fg_color="transparent", hover_color="#333333",
+                command=lambda n=revision["number"]: self.select(n),
+            ).pack(fill="x", pady=1)
+
+    def select(self, number):
+        body = self.current_body()
+        self.restore_btn.configure(state="disabled")
+        self.status_label.configure(text=f"Loading revision #{number}...")
+
+        def load():
+            text = self.db.get_revision(self.note_id, number)
+            return text, revision_diff(text, body) if text is not None \
+                else None
+
+        self.dispatcher.then(
+            self.db.submit(load),
+            lambda result: self.show_diff(number, *result),
+            self.show_error,
+        )
+
+    def show_diff(self, number, text, diff):
+        if not self.winfo_exists():
+            return
+        if text is None:
+            self.status_label.configure(text=f"Revision #{number} is gone.")
+            return
+        self.selected = (number, text)
+        self.diff_box.configure(state="normal")
+        self.diff_box.delete("1.0", "end")
+        for line in diff.splitlines():
+            tag = line[:1] if line[:1] in DIFF_COLORS \
+                and not line.startswith(("+++", "---")) else ()
+            self.diff_box.insert("end", line + "\n", tag)
+        self.diff_box.configure(state="disabled")
+        self.status_label.configure(
+            text=f"Revision #{number} (-) against the editor (+)"
+        )
+        self.restore_btn.configure(state="normal")
+
+    def restore(self):
+        if self.selected is None:
+            return
+        number, text = self.selected
+        self.on_restore(number, text)
+        self.destroy()
+
+    def show_error(self, error):
+        if self.winfo_exists():
+            messagebox.showerror("History", str(error), parent=self)
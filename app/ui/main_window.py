@@ -1,16 +1,46 @@
 import hashlib
-import arabic_reshaper
-from bidi.algorithm import get_display
+import os
+import re
+import threading
 import customtkinter as ctk
 from tkinter import messagebox, simpledialog, filedialog
+from .dispatcher import TkDispatcher
 from .editor_view import EditorView
+from .note_list import VirtualNoteList, completed
+from .history_panel import HistoryPanel
+from .performance_panel import PerformancePanel
+from app.metrics import instrumented, metrics
 from app.services.database import DatabaseService
 from app.services.storage import StorageFactory
 from app.services.file_manager import FileManager
+from app.services.batch_jobs import BulkActions, Retranslator
+from app.services.bulk_import import BulkImporter
+from app.services.file_watcher import LinkedFileWatcher
+from app.services.journal_archive import JournalArchive
+from app.services.translation_cache import TranslationCache
+from app.models.dirty import DirtyTracker
 from app.models.features import MultilingualEntry
 
 
+def rtl_display(text):
+    """Arabic text shaped and reordered for Tk, which has no bidi support."""
+    # Imported on first use to keep them off the start-up path
+    import arabic_reshaper
+    from bidi.algorithm import get_display
+    return get_display(arabic_reshaper.reshape(text))
+
+
 class MainWindow(ctk.CTk):
+    AUTOSAVE_MS = 1500  # pause in typing before changes are saved
+    # Orders of the notes list, as offered by DatabaseService.list_notes
+    SORT_LABELS = {
+        "Recently edited": "recent",
+        "Newest first": "created",
+        "Title A-Z": "title",
+        "Oldest first": "id",
+    }
+    ALL_LANGUAGES = "All languages"
+
     def __init__(self):
         super().__init__()
 
@@ -20,11 +50,33 @@ class MainWindow(ctk.CTk):
         self.grid_columnconfigure(1, weight=1)
         self.grid_rowconfigure(0, weight=1)
 
+        self.dispatcher = TkDispatcher(self)
+        # Connects in the background; see on_db_ready
         self.db = DatabaseService()
+        metrics.enabled = self.db.config.get("metrics") in ("1", "true")
+        MultilingualEntry.cache = TranslationCache()
+        self.watcher = LinkedFileWatcher(
+            self.db,
+            on_sync=lambda ids: self.dispatcher.call(
+                self.on_linked_files_synced, ids
+            ),
+        )
         self.current_entry = None
         self.current_note_id = None
         self.temp_pwd_hash = None
         self.current_file_path = None
+        self.tracker = DirtyTracker()
+        # Translations stored for the open note; texts load when shown
+        self.stored_languages = []
+        self.shown_language = None
+        self._fetching = set()
+        self._selector_values = []
+        self._search_job = None
+        self._autosave_job = None
+        self._saving = False
+        self._save_again = None  # save to start once the one in flight lands
+        self._performance_panel = None
+        self._bulk_cancel = None  # threading.Event of the running bulk job
 
         # --- Sidebar ---
         self.sidebar = ctk.CTkFrame(self, width=200, corner_radius=0)
@@ -45,6 +97,43 @@ class MainWindow(ctk.CTk):
             fg_color="#27ae60",
             command=self.import_note,
         ).pack(pady=10, padx=20)
+        ctk.CTkButton(
+            self.sidebar,
+            text="📂 Import Folder",
+            fg_color="#1e8449",
+            command=self.import_folder,
+        ).pack(pady=10, padx=20)
+        ctk.CTkButton(
+            self.sidebar,
+            text="🗄️ Back Up Journal",
+            fg_color="#2c3e50",
+            command=self.export_journal,
+        ).pack(pady=10, padx=20)
+        ctk.CTkButton(
+            self.sidebar,
+            text="♻️ Restore Backup",
+            fg_color="#2c3e50",
+            command=self.import_journal,
+        ).pack(pady=10, padx=20)
+        ctk.CTkButton(
+            self.sidebar,
+            text="🌐 Translate Journal",
+            fg_color="#1e3a5f",
+            command=self.translate_journal,
+        ).pack(pady=10, padx=20)
+        ctk.CTkButton(
+            self.sidebar,
+            text="📊 Performance",
+            fg_color="#444444",
+            command=self.show_performance_panel,
+        ).pack(pady=10, padx=20)
+        self.status_label = ctk.CTkLabel(
+            self.sidebar,
+            text="● Connecting...",
+            text_color="#f39c12",
+            font=("Arial", 12),
+        )
+        self.status_label.pack(side="bottom", pady=15)
 
         # --- Main Container ---
         self.container = ctk.CTkFrame(self, fg_color="transparent")
@@ -56,6 +145,37 @@ class MainWindow(ctk.CTk):
         self.create_editor_page()
         self.show_list_page()
 
+        if self.db.ready is not None:
+            self.dispatcher.then(
+                self.db.ready, self.on_db_ready, self.show_db_error
+            )
+        else:
+            self.on_db_ready([])
+
+    def on_db_ready(self, errors):
+        """Runs once the initial connection attempt has finished."""
+        for error in errors:
+            messagebox.showerror("Database Error", error)
+        if errors:
+            self.status_label.configure(
+                text="● Database offline", text_color="#e74c3c"
+            )
+        else:
+            self.status_label.configure(
+                text="● Connected", text_color="#27ae60"
+            )
+
+        MultilingualEntry.cache.mongo = self.db.mongo
+        self.watcher.start()
+        self.dispatcher.then(
+            self.db.submit(self.db.open_search_index),
+            lambda _: None,
+            lambda e: print(f"Search index unavailable: {e}"),
+        )
+        if self.list_page.winfo_manager():
+            self.refresh_language_menu()
+            self.refresh_list_ui()
+
     def create_list_page(self):
         self.list_page = ctk.CTkFrame(
             self.container,
@@ -69,16 +189,56 @@ class MainWindow(ctk.CTk):
 
         self.search_entry = ctk.CTkEntry(
             search_frame,
-            placeholder_text="🔍 Search Title...",
+            placeholder_text="🔍 Search notes...",
             height=45
         )
         self.search_entry.pack(side="left", fill="x", expand=True)
-        self.search_entry.bind("<KeyRelease>", self.refresh_list_ui)
+        self.search_entry.bind("<KeyRelease>", self.schedule_list_refresh)
+        self.sort_menu = ctk.CTkOptionMenu(
+            search_frame, values=list(self.SORT_LABELS),
+            command=self.refresh_list_ui, width=150, height=45
+        )
+        self.sort_menu.pack(side="left", padx=(10, 0))
+        self.language_menu = ctk.CTkOptionMenu(
+            search_frame, values=[self.ALL_LANGUAGES],
+            command=self.refresh_list_ui, width=130, height=45
+        )
+        self.language_menu.pack(side="left", padx=(10, 0))
+
+        # Shown while notes are selected (Ctrl/Shift-click in the list)
+        self.bulk_bar = ctk.CTkFrame(self.list_page, fg_color="transparent")
+        self.bulk_label = ctk.CTkLabel(self.bulk_bar, text="")
+        self.bulk_label.pack(side="left", padx=(0, 10))
+        self.bulk_buttons = [
+            ctk.CTkButton(
+                self.bulk_bar, text=text, fg_color=color, width=90,
+                command=command,
+            )
+            for text, color, command in (
+                ("📤 Export", "#2c3e50", self.bulk_export),
+                ("🌐 Translate", "#1e3a5f", self.bulk_translate),
+                ("🔒 Protect", "#7e1919", self.bulk_protect),
+                ("🗑️ Delete", "#444444", self.bulk_delete),
+            )
+        ]
+        for btn in self.bulk_buttons:
+            btn.pack(side="left", padx=5)
+        self.bulk_progress = ctk.CTkProgressBar(self.bulk_bar, width=160)
+        self.bulk_cancel_btn = ctk.CTkButton(
+            self.bulk_bar, text="Cancel", width=70, fg_color="#7e1919",
+            command=self.cancel_bulk_job,
+        )
+        ctk.CTkButton(
+            self.bulk_bar, text="Clear", width=70, fg_color="transparent",
+            command=lambda: self.note_list.clear_selection(),
+        ).pack(side="right")
 
-        self.scroll_frame = ctk.CTkScrollableFrame(
-            self.list_page, label_text="Notes Collection"
+        self.note_list = VirtualNoteList(
+            self.list_page, self.dispatcher, on_open=self.load_note_to_edit,
+            on_selection_change=self.on_selection_change,
+            on_error=self.show_db_error,
         )
-        self.scroll_frame.pack(fill="both", expand=True)
+        self.note_list.pack(fill="both", expand=True)
 
     # ----------------------
     # Editor Page
@@ -90,12 +250,22 @@ class MainWindow(ctk.CTk):
         self.editor_view.save_btn.configure(
             command=self.save_flow, text="💾 Save & Sync"
         )
+        self.editor_view.title_entry.bind(
+            "<KeyRelease>", self.schedule_autosave
+        )
+        self.editor_view.textbox.bind("<KeyRelease>", self.schedule_autosave)
 
+        trans_header = ctk.CTkFrame(self.editor_page, fg_color="transparent")
+        trans_header.pack(fill="x", pady=(15, 0))
         ctk.CTkLabel(
-            self.editor_page,
+            trans_header,
             text="Stored Translations:",
             font=("Arial", 13, "bold")
-        ).pack(anchor="w", pady=(15, 0))
+        ).pack(side="left")
+        self.language_selector = ctk.CTkSegmentedButton(
+            trans_header, values=[], command=self.select_language
+        )
+        self.language_selector.pack(side="left", padx=10)
         self.trans_box = ctk.CTkTextbox(
             self.editor_page,
             height=130,
@@ -104,6 +274,11 @@ class MainWindow(ctk.CTk):
             font=("Arial", 14)
         )
         self.trans_box.pack(fill="x", pady=(5, 10))
+        self.cache_label = ctk.CTkLabel(
+            self.editor_page, text="", font=("Arial", 11),
+            text_color="#888888"
+        )
+        self.cache_label.pack(anchor="w")
 
         btn_row = ctk.CTkFrame(self.editor_page, fg_color="transparent")
         btn_row.pack(fill="x", pady=5)
@@ -125,6 +300,12 @@ class MainWindow(ctk.CTk):
             width=90,
             command=self.export_note
         ).pack(side="left", padx=5)
+        ctk.CTkButton(
+            btn_row, text="🕘 History",
+            fg_color="#2c3e50",
+            width=90,
+            command=self.show_history
+        ).pack(side="left", padx=5)
         ctk.CTkButton(
             btn_row, text="🗑️ Delete",
             fg_color="#444444",
@@ -136,12 +317,15 @@ class MainWindow(ctk.CTk):
     # Navigation
     # ----------------------
     def show_list_page(self):
+        self.flush_autosave()
         self.current_note_id = None
         self.editor_page.grid_forget()
         self.list_page.grid(row=0, column=0, sticky="nsew")
+        self.refresh_language_menu()
         self.refresh_list_ui()
 
     def show_add_page(self):
+        self.flush_autosave()
         self.current_note_id = None
         self.current_file_path = None
         self.temp_pwd_hash = None
@@ -152,6 +336,7 @@ class MainWindow(ctk.CTk):
                 "body": ""
             }
         )
+        self.tracker = DirtyTracker()
         self.list_page.grid_forget()
         self.editor_page.grid(row=0, column=0, sticky="nsew")
         self.refresh_editor_ui()
@@ -159,37 +344,208 @@ class MainWindow(ctk.CTk):
     # ----------------------
     # List UI
     # ----------------------
+    def schedule_list_refresh(self, event=None):
+        # Debounce typing so a burst of keystrokes costs one query
+        if self._search_job is not None:
+            self.after_cancel(self._search_job)
+        self._search_job = self.after(150, self.refresh_list_ui)
+
+    @instrumented("ui.refresh_list_ui")
     def refresh_list_ui(self, event=None):
-        for widget in self.scroll_frame.winfo_children():
-            widget.destroy()
-        query = self.search_entry.get().lower()
-        notes = self.db.get_all_titles()
-        for note in notes:
-            if query in note["title"].lower():
-                btn = ctk.CTkButton(
-                    self.scroll_frame,
-                    text=f" {note['title']}",
-                    anchor="w",
-                    height=45,
-                    fg_color="#2b2b2b",
-                    command=lambda nid=note["id"]: self.load_note_to_edit(nid),
-                )
-                btn.pack(fill="x", pady=3)
+        self._search_job = None
+        query = self.search_entry.get().strip()
+
+        if not self.db.is_ready():
+            # Filled in by on_db_ready once the stores are up
+            self.note_list.load(lambda last, limit: completed([]))
+            return
+        if query and self.db.index is not None:
+            # Ranked hits come back in one bounded list, queried on the
+            # database pool so a busy index never blocks typing
+            self.dispatcher.then(
+                self.db.submit(self.db.search, query),
+                lambda hits: self.show_search_hits(query, hits),
+                self.show_db_error,
+            )
+            return
+
+        # Ranked search keeps its own order; browsing (and title search
+        # while the index is still being built) is sorted and filtered
+        # by the stores' indexes
+        sort = self.SORT_LABELS[self.sort_menu.get()]
+        lang = self.language_menu.get()
+        lang = None if lang == self.ALL_LANGUAGES else lang
+
+        def request_page(last, limit):
+            return self.db.submit(self.db.list_notes, sort, last, limit,
+                                  query, lang)
+
+        self.note_list.load(request_page)
+
+    def show_search_hits(self, query, hits):
+        if query != self.search_entry.get().strip():
+            return  # typed on since; a newer search is on its way
+        positions = {hit["id"]: i for i, hit in enumerate(hits)}
+
+        def request_page(last, limit):
+            start = positions[last["id"]] + 1 if last else 0
+            return completed(hits[start:start + limit])
+
+        self.note_list.load(request_page)
+
+    def refresh_language_menu(self):
+        if not self.db.is_ready():
+            return
+        self.dispatcher.then(
+            self.db.submit(self.db.get_languages),
+            lambda langs: self.language_menu.configure(
+                values=[self.ALL_LANGUAGES] + langs
+            ),
+            lambda e: print(f"Languages unavailable: {e}"),
+        )
+
+    # ----------------------
+    # Bulk Actions
+    # ----------------------
+    def on_selection_change(self, count):
+        if count:
+            self.bulk_label.configure(text=f"{count} selected")
+            if not self.bulk_bar.winfo_manager():
+                self.bulk_bar.pack(fill="x", pady=(0, 10),
+                                   before=self.note_list)
+        elif self._bulk_cancel is None:
+            self.bulk_bar.pack_forget()
+
+    def bulk_delete(self):
+        count = len(self.note_list.selection)
+        if messagebox.askyesno("Delete", f"Delete {count} notes?"):
+            self.run_bulk_job("Delete", lambda job, progress, cancel:
+                              job.delete(progress, cancel))
+
+    def bulk_export(self):
+        directory = filedialog.askdirectory(title="Export notes to folder")
+        if directory:
+            self.run_bulk_job("Export", lambda job, progress, cancel:
+                              job.export(directory, progress, cancel))
+
+    def bulk_translate(self):
+        answer = simpledialog.askstring(
+            "Translate", "Language Codes (e.g., ar, fr, es):"
+        )
+        langs = [code for code in re.split(r"[\s,;]+", answer or "") if code]
+        if not langs:
+            return
+        rate = float(self.db.config["translate_rate"]) or None
+        self.run_bulk_job("Translate", lambda job, progress, cancel:
+                          job.translate(langs, rate_limit=rate,
+                                        on_progress=progress, cancel=cancel))
+
+    def bulk_protect(self):
+        pwd = simpledialog.askstring("Security", "Password:", show="*")
+        if pwd:
+            pwd_hash = hashlib.sha256(pwd.encode()).hexdigest()
+            self.run_bulk_job("Protect", lambda job, progress, cancel:
+                              job.protect(pwd_hash, progress, cancel))
+
+    def run_bulk_job(self, label, run):
+        """run(BulkActions, on_progress, cancel) on a thread, with the
+        progress bar and Cancel button shown in the bulk bar."""
+        ids = self.note_list.selected_ids()
+        cancel = threading.Event()
+        self._bulk_cancel = cancel
+        for btn in self.bulk_buttons:
+            btn.configure(state="disabled")
+        self.bulk_progress.set(0)
+        self.bulk_progress.pack(side="left", padx=10)
+        self.bulk_cancel_btn.pack(side="left")
+
+        def on_progress(done, failed):
+            self.dispatcher.call(
+                self.show_bulk_progress, label, done, len(ids), failed
+            )
+
+        def work():
+            try:
+                report = run(BulkActions(self.db, ids), on_progress, cancel)
+            except Exception as e:
+                self.dispatcher.call(self.finish_bulk_job, label, ids, None)
+                self.dispatcher.call(messagebox.showerror, label, str(e))
+                return
+            self.dispatcher.call(
+                self.finish_bulk_job, label, ids, report, cancel.is_set()
+            )
+
+        threading.Thread(target=work, daemon=True).start()
+
+    def show_bulk_progress(self, label, done, total, failed):
+        self.bulk_progress.set(done / total if total else 1)
+        text = f"{label}: {done}/{total}"
+        if failed:
+            text += f" ({failed} failed)"
+        self.bulk_label.configure(text=text)
+
+    def cancel_bulk_job(self):
+        if self._bulk_cancel is not None:
+            self._bulk_cancel.set()
+            self.bulk_cancel_btn.configure(state="disabled")
+
+    def finish_bulk_job(self, label, ids, report, cancelled=False):
+        self._bulk_cancel = None
+        self.bulk_progress.pack_forget()
+        self.bulk_cancel_btn.pack_forget()
+        self.bulk_cancel_btn.configure(state="normal")
+        for btn in self.bulk_buttons:
+            btn.configure(state="normal")
+        if report is not None:
+            failed = {note_id for note_id, _ in report["errors"]}
+            if label == "Delete":
+                for note_id in ids[:report["total"]]:
+                    if note_id not in failed:
+                        self.watcher.unwatch(note_id)
+            summary = (
+                f"{label}: {report['updated']} of {len(ids)} notes "
+                f"in {report['seconds']:.1f}s."
+            )
+            if cancelled:
+                summary += f" Cancelled after {report['total']}."
+            self.show_job_summary(label, summary, report["errors"])
+        self.refresh_language_menu()
+        self.refresh_list_ui()
+        self.on_selection_change(len(self.note_list.selection))
+
+    def show_job_summary(self, title, summary, errors):
+        """Summary of a job over notes, with its first (note id, error)s."""
+        if not errors:
+            messagebox.showinfo(title, summary)
+            return
+        details = "\n".join(
+            f"Note {note_id}: {error}" for note_id, error in errors[:10]
+        )
+        more = len(errors) - 10
+        if more > 0:
+            details += f"\n... and {more} more"
+        messagebox.showwarning(title, f"{summary}\n\n{details}")
 
     # ----------------------
     # Load Note
     # ----------------------
+    def shown_languages(self):
+        """Translations fetched along with a note's body."""
+        return [self.shown_language] if self.shown_language else []
+
     def load_note_to_edit(self, note_id):
-        self.db.mysql.ping(reconnect=True)
-        with self.db.mysql.cursor() as cur:
-            cur.execute(
-                "SELECT title, password_hash, file_path "
-                "FROM entries WHERE id = %s",
-                (note_id,),
-            )
-            record = cur.fetchone()
+        note = self.db.peek_note(note_id)
+        if note is not None:
+            self.open_note(note_id, note)
+            return
+        self.dispatcher.then(
+            self.db.submit(self.db.load_note, note_id, self.shown_languages()),
+            lambda loaded: self.open_note(note_id, loaded),
+            self.show_db_error,
+        )
 
-        if record and record["password_hash"]:
+    def open_note(self, note_id, note):
+        if note and note["password_hash"]:
             pwd = simpledialog.askstring(
                 "Security",
                 "Enter password:",
@@ -200,79 +556,203 @@ class MainWindow(ctk.CTk):
                 if pwd
                 else None
             )
-            if not pwd or hashed_pwd != record["password_hash"]:
+            if not pwd or hashed_pwd != note["password_hash"]:
                 messagebox.showerror("Error", "Incorrect Password")
                 return
+        self.show_note(note_id, note)
+        # Opened from search results: scroll to the first match
+        words = self.search_entry.get().split()
+        if note and words:
+            match = re.search(re.escape(words[0]), note["body"], re.I)
+            if match:
+                self.editor_view.goto_offset(match.start())
 
-        data = self.db.get_full_note(note_id)
+    def show_note(self, note_id, note):
         self.current_note_id = note_id
-        self.temp_pwd_hash = record["password_hash"] if record else None
-        self.current_file_path = record["file_path"] if record else None
+        self.temp_pwd_hash = note["password_hash"] if note else None
+        self.current_file_path = note["file_path"] if note else None
 
-        title = record["title"] if record else "Untitled"
-        body = data["body"] if data else ""
+        title = note["title"] if note else "Untitled"
+        body = note["body"] if note else ""
         self.current_entry = StorageFactory.create(
             "TEXT",
             {"title": title, "body": body}
             )
 
-        if data and "translations" in data:
+        self.stored_languages = note["languages"] if note else []
+        self._fetching = set()
+        if note and note["translations"] is not None:
             self.current_entry = MultilingualEntry(self.current_entry)
-            self.current_entry.translations = data["translations"]
+            self.current_entry.translations = note["translations"]
+        self.tracker = DirtyTracker(self.editor_state(title, body)) \
+            if note else DirtyTracker()
 
         self.list_page.grid_forget()
         self.editor_page.grid(row=0, column=0, sticky="nsew")
         self.refresh_editor_ui()
 
+    def show_db_error(self, error):
+        messagebox.showerror("Database Error", str(error))
+
+    def show_performance_panel(self):
+        panel = self._performance_panel
+        if panel is not None and panel.winfo_exists():
+            panel.focus()
+            return
+        self._performance_panel = PerformancePanel(self)
+
+    def show_history(self):
+        if self.current_note_id is None:
+            messagebox.showinfo("History", "Save the note to start its "
+                                           "history.")
+            return
+        self.flush_autosave()
+        HistoryPanel(
+            self, self.db, self.dispatcher, self.current_note_id,
+            self.editor_view.title_entry.get(), self.editor_view.get_body,
+            self.restore_revision,
+        )
+
+    def restore_revision(self, number, text):
+        """Puts an old body back in the editor; saving it (autosave does)
+        adds it to the history as the newest revision."""
+        self.editor_view.set_body(text)
+        self.title(f"Journal - Restored revision #{number}")
+        self.schedule_autosave()
+
     # ----------------------
     # Save Flow
     # ----------------------
+    def editor_state(self, title, body):
+        """What a save would write, in DirtyTracker's state format."""
+        return {
+            "title": title,
+            "body": body,
+            "translations": (
+                dict(self.current_entry.translations)
+                if isinstance(self.current_entry, MultilingualEntry)
+                else {}
+            ),
+            "password_hash": self.temp_pwd_hash,
+            "file_path": self.current_file_path,
+        }
+
+    def schedule_autosave(self, event=None):
+        # Debounce: each keystroke restarts the timer
+        if self._autosave_job is not None:
+            self.after_cancel(self._autosave_job)
+        self._autosave_job = self.after(self.AUTOSAVE_MS, self.autosave)
+
+    def autosave(self):
+        self._autosave_job = None
+        # Only while the editor is on screen
+        if self.editor_page.winfo_manager() and self.current_entry:
+            self.save_flow()
+
+    def flush_autosave(self):
+        if self._autosave_job is not None:
+            self.after_cancel(self._autosave_job)
+            self.autosave()
+
     def save_flow(self):
         ui_title = self.editor_view.title_entry.get()
-        ui_body = self.editor_view.textbox.get("1.0", "end-1c")
-        if not ui_title:
+        ui_body = self.editor_view.get_body()
+        if not ui_title or self.current_entry is None:
             return
+        if self._autosave_job is not None:
+            self.after_cancel(self._autosave_job)
+            self._autosave_job = None
 
-        try:
-            meta = {
-                "id": self.current_note_id,
-                "title": ui_title,
-                "type": "TEXT",
-                "password_hash": self.temp_pwd_hash,
-                "file_path": self.current_file_path,
-            }
-            self.current_note_id = self.db.save_metadata(meta)
+        self.current_entry.base.title = ui_title
+        self.current_entry.edit_content(ui_body)
 
-            if self.current_entry:
-                base_note = (
-                    self.current_entry.entry
-                    if hasattr(self.current_entry, "entry")
-                    else self.current_entry
-                )
-                base_note.title = ui_title
-                self.current_entry.edit_content(ui_body)
+        save = {
+            "entry": self.current_entry,
+            "tracker": self.tracker,
+            "note_id": self.current_note_id,
+            "state": self.editor_state(ui_title, ui_body),
+            "unloaded": self.unloaded_languages(),
+        }
+        if self._saving:
+            # Written once the save in flight has landed, even if the
+            # editor has moved on to another note by then
+            self._save_again = save
+            return
+        self.start_save(save)
 
-                if isinstance(self.current_entry, MultilingualEntry):
-                    for lang in list(self.current_entry.translations.keys()):
-                        self.current_entry.add_language(lang)
+    def start_save(self, save):
+        state, tracker = save["state"], save["tracker"]
+        ui_title, ui_body = state["title"], state["body"]
+        if not tracker.is_dirty(state):
+            self.title(f"Journal - Saved {ui_title}")
+            return
+        changes = tracker.changes(state)
+        meta = {
+            "id": save["note_id"],
+            "title": ui_title,
+            "type": "TEXT",
+            "password_hash": state["password_hash"],
+            "file_path": state["file_path"],
+        }
+        entry = save["entry"]
+        unloaded = save["unloaded"]
 
-            trans = (
-                self.current_entry.translations
-                if isinstance(self.current_entry, MultilingualEntry)
-                else {}
+        def persist():
+            note_id = self.db.save_changes(
+                meta, ui_body, state["translations"], changes
             )
-            self.db.save_content(self.current_note_id, ui_body, trans)
-
-            if self.current_file_path:
+            if meta["file_path"]:
+                # The file holds every language, not just the loaded ones
+                translations = state["translations"]
+                if unloaded:
+                    translations = dict(
+                        self.db.load_translations(note_id, unloaded),
+                        **translations
+                    )
                 FileManager.export_to_txt(
-                    self.current_file_path, ui_title, ui_body, trans
+                    meta["file_path"], ui_title, ui_body, translations
                 )
+                # Our own write is not an external edit
+                self.watcher.watch(note_id, meta["file_path"])
+            return note_id
 
-            self.refresh_editor_ui()
-            self.title(f"Journal - Saved {ui_title}")
+        self._saving = True
+        self.title(f"Journal - Saving {ui_title}...")
+        self.dispatcher.then(
+            self.db.submit(persist),
+            lambda note_id: self.finish_save(
+                entry, tracker, state, changes, note_id
+            ),
+            self.fail_save,
+        )
+
+    def finish_save(self, entry, tracker, state, changes, note_id):
+        self._saving = False
+        tracker.mark_saved(state)
+        pending, self._save_again = self._save_again, None
+        if pending is not None and pending["tracker"] is tracker \
+                and pending["note_id"] is None:
+            # The note got its id from the save that just landed
+            pending["note_id"] = note_id
+
+        if entry is self.current_entry:
+            self.current_note_id = note_id
+            self.refresh_translations_ui()
+            self.title(f"Journal - Saved {state['title']}")
 
-        except Exception as e:
-            messagebox.showerror("Error", f"Save failed: {e}")
+            # A new body makes the stored translations stale; refresh them
+            # off the UI thread and let autosave store the results.
+            languages = self.note_languages()
+            if changes["body"] and languages:
+                self.translate_in_background(languages)
+
+        if pending is not None:
+            self.start_save(pending)
+
+    def fail_save(self, error):
+        self._saving = False
+        self._save_again = None
+        messagebox.showerror("Error", f"Save failed: {error}")
 
     # ----------------------
     # Translation
@@ -282,63 +762,152 @@ class MainWindow(ctk.CTk):
             return
 
         ui_title = self.editor_view.title_entry.get()
-        ui_body = self.editor_view.textbox.get("1.0", "end-1c")
+        ui_body = self.editor_view.get_body()
 
         if not isinstance(self.current_entry, MultilingualEntry):
             self.current_entry = MultilingualEntry(self.current_entry)
 
-        lang = simpledialog.askstring(
-            "Translate", "Language Code (e.g., ar, fr, es):"
+        answer = simpledialog.askstring(
+            "Translate", "Language Codes (e.g., ar, fr, es):"
         )
-        if lang:
-            base_note = (
-                self.current_entry.entry
-                if hasattr(self.current_entry, "entry")
-                else self.current_entry
-            )
-            base_note.title = ui_title
+        langs = [code for code in re.split(r"[\s,;]+", answer or "") if code]
+        if langs:
+            self.current_entry.base.title = ui_title
             self.current_entry.edit_content(ui_body)
+            self.translate_in_background(langs)
+
+    def translate_in_background(self, langs):
+        """Translates on a worker pool, streaming each language to the UI."""
+        entry = self.current_entry
 
-            if self.current_entry.add_language(lang):
-                self.refresh_editor_ui()
+        def on_result(lang, ok):
+            self.dispatcher.call(self.show_translation_result, entry, lang, ok)
+
+        threading.Thread(
+            target=entry.add_languages, args=(langs, on_result), daemon=True
+        ).start()
+
+    def show_translation_result(self, entry, lang, ok):
+        if entry is not self.current_entry:
+            return
+        if ok:
+            self.refresh_translations_ui()
+            self.schedule_autosave()
+        else:
+            self.title(f"Journal - Translation to '{lang}' failed")
 
     # ----------------------
     # Editor UI Refresh
     # ----------------------
+    @instrumented("ui.refresh_editor_ui")
     def refresh_editor_ui(self):
         self.editor_view.title_entry.configure(state="normal")
-        self.editor_view.textbox.configure(state="normal")
-
         self.editor_view.title_entry.delete(0, "end")
-        self.editor_view.textbox.delete("1.0", "end")
-        self.trans_box.configure(state="normal")
-        self.trans_box.delete("1.0", "end")
 
         if self.current_entry:
-            base_note = (
-                self.current_entry.entry
-                if hasattr(self.current_entry, "entry")
-                else self.current_entry
+            self.editor_view.title_entry.insert(
+                0, self.current_entry.base.title
             )
+        # Multi-megabyte bodies load in chunks; see EditorView
+        self.editor_view.set_body(
+            self.current_entry.get_content() if self.current_entry else ""
+        )
 
-            self.editor_view.title_entry.insert(0, base_note.title)
-            self.editor_view.textbox.insert(
-                "1.0",
-                self.current_entry.get_content()
-            )
+        self.refresh_translations_ui()
 
-            if isinstance(self.current_entry, MultilingualEntry):
-                for lang, text in self.current_entry.translations.items():
-                    display_text = text
-                    if lang.lower() == "ar":
-                        reshaped_text = arabic_reshaper.reshape(text)
-                        display_text = get_display(reshaped_text)
+    def note_languages(self):
+        """Every language of the open note, loaded or not."""
+        loaded = (
+            self.current_entry.translations
+            if isinstance(self.current_entry, MultilingualEntry) else {}
+        )
+        return sorted(set(self.stored_languages).union(loaded))
 
-                    self.trans_box.insert(
-                        "end", f"[{lang.upper()}]\n{display_text}\n\n"
-                    )
+    def unloaded_languages(self):
+        loaded = (
+            self.current_entry.translations
+            if isinstance(self.current_entry, MultilingualEntry) else {}
+        )
+        return [lang for lang in self.stored_languages if lang not in loaded]
+
+    def select_language(self, lang):
+        self.shown_language = lang
+        self.refresh_translations_ui()
+
+    def fetch_translations(self, langs):
+        """Loads stored translations off the UI thread, then shows them."""
+        entry = self.current_entry
+        langs = [lang for lang in langs if lang not in self._fetching]
+        if not langs or self.current_note_id is None:
+            return
+        self._fetching.update(langs)
+
+        def failed(error):
+            self._fetching.difference_update(langs)
+            self.show_db_error(error)
+
+        self.dispatcher.then(
+            self.db.submit(
+                self.db.load_translations, self.current_note_id, langs
+            ),
+            lambda found: self.show_fetched_translations(entry, langs, found),
+            failed,
+        )
+
+    def show_fetched_translations(self, entry, langs, found):
+        if entry is not self.current_entry:
+            return
+        self._fetching.difference_update(langs)
+        # A language translated while the fetch ran keeps its new text
+        loaded = {
+            lang: text for lang, text in found.items()
+            if lang not in entry.translations
+        }
+        entry.translations.update(loaded)
+        self.tracker.mark_loaded(loaded)
+        # Asked for but gone: removed in the store meanwhile
+        self.stored_languages = [
+            lang for lang in self.stored_languages
+            if lang in found or lang not in langs
+        ]
+        self.refresh_translations_ui()
+
+    @instrumented("ui.refresh_translations_ui")
+    def refresh_translations_ui(self):
+        languages = self.note_languages()
+        lang = self.shown_language
+        if lang not in languages:
+            lang = languages[0] if languages else None
+        if languages != self._selector_values:
+            # Rebuilding the buttons is slow; only when the list changes
+            self._selector_values = languages
+            self.language_selector.configure(values=languages)
+        self.language_selector.set(lang or "")
+
+        self.trans_box.configure(state="normal")
+        self.trans_box.delete("1.0", "end")
+
+        if lang is not None:
+            text = self.current_entry.translations.get(lang)
+            if text is None:
+                # Only the language on screen is fetched
+                text = "Loading..."
+                self.fetch_translations([lang])
+            elif lang.lower() == "ar":
+                text = rtl_display(text)
+            self.trans_box.insert("end", f"[{lang.upper()}]\n{text}\n")
 
         self.trans_box.configure(state="disabled")
+        self.refresh_cache_stats()
+
+    def refresh_cache_stats(self):
+        cache = MultilingualEntry.cache
+        if cache is not None:
+            stats = cache.stats()
+            self.cache_label.configure(
+                text=f"Translation cache: {stats['hits']} hits / "
+                     f"{stats['misses']} misses"
+            )
 
     # ----------------------
     # Security
@@ -348,6 +917,7 @@ class MainWindow(ctk.CTk):
         self.temp_pwd_hash = (
             hashlib.sha256(pwd.encode()).hexdigest() if pwd else None
         )
+        self.schedule_autosave()
 
     # ----------------------
     # Delete Note
@@ -356,8 +926,53 @@ class MainWindow(ctk.CTk):
         if not self.current_note_id:
             return
         if messagebox.askyesno("Delete", "Delete this note?"):
-            self.db.delete_note(self.current_note_id)
-            self.show_list_page()
+            note_id = self.current_note_id
+            # Nothing may save the note again once it is gone
+            if self._autosave_job is not None:
+                self.after_cancel(self._autosave_job)
+                self._autosave_job = None
+            pending = self._save_again
+            if pending is not None and (
+                pending["entry"] is self.current_entry
+                or pending["note_id"] == note_id
+            ):
+                self._save_again = None
+            self.current_note_id = None
+            self.current_entry = None
+            self.watcher.unwatch(note_id)
+            self.dispatcher.then(
+                self.db.submit(self.db.delete_note, note_id),
+                lambda _: self.show_list_page(),
+                self.show_db_error,
+            )
+
+    # ----------------------
+    # Linked Files
+    # ----------------------
+    def on_linked_files_synced(self, note_ids):
+        """A watched file changed on disk and its note was updated."""
+        if self.list_page.winfo_manager():
+            self.refresh_list_ui()
+        note_id = self.current_note_id
+        if note_id not in note_ids or not self.editor_page.winfo_manager():
+            return
+        state = self.editor_state(
+            self.editor_view.title_entry.get(),
+            self.editor_view.get_body(),
+        )
+        if self.tracker.is_dirty(state):
+            # Keep unsaved typing; the next save overwrites the file
+            self.title("Journal - Linked file changed on disk")
+            return
+        self.dispatcher.then(
+            self.db.submit(self.db.load_note, note_id, self.shown_languages()),
+            lambda note: self.reload_note(note_id, note),
+            self.show_db_error,
+        )
+
+    def reload_note(self, note_id, note):
+        if note is not None and note_id == self.current_note_id:
+            self.show_note(note_id, note)
 
     # ----------------------
     # Export Note
@@ -366,20 +981,38 @@ class MainWindow(ctk.CTk):
         file_path = filedialog.asksaveasfilename(
             defaultextension=".txt", filetypes=[("Text", "*.txt")]
         )
-        if file_path:
-            ui_title = self.editor_view.title_entry.get()
-            ui_body = self.editor_view.textbox.get("1.0", "end-1c")
-            trans = (
-                self.current_entry.translations
-                if isinstance(self.current_entry, MultilingualEntry)
-                else {}
-            )
-            FileManager.export_to_txt(file_path, ui_title, ui_body, trans)
-            if messagebox.askyesno(
-                "Link", "Link to this file for future auto-updates?"
-            ):
-                self.current_file_path = file_path
-                self.save_flow()
+        if not file_path:
+            return
+        ui_title = self.editor_view.title_entry.get()
+        ui_body = self.editor_view.get_body()
+        trans = (
+            dict(self.current_entry.translations)
+            if isinstance(self.current_entry, MultilingualEntry)
+            else {}
+        )
+        entry = self.current_entry
+        unloaded = self.unloaded_languages()
+        if not unloaded:
+            self.finish_export(entry, file_path, ui_title, ui_body, trans)
+            return
+        # Languages never shown were not loaded; the file gets them all
+        self.dispatcher.then(
+            self.db.submit(
+                self.db.load_translations, self.current_note_id, unloaded
+            ),
+            lambda found: self.finish_export(
+                entry, file_path, ui_title, ui_body, dict(found, **trans)
+            ),
+            self.show_db_error,
+        )
+
+    def finish_export(self, entry, file_path, title, body, translations):
+        FileManager.export_to_txt(file_path, title, body, translations)
+        if entry is self.current_entry and messagebox.askyesno(
+            "Link", "Link to this file for future auto-updates?"
+        ):
+            self.current_file_path = file_path
+            self.save_flow()
 
     # ----------------------
     # Import Note
@@ -389,16 +1022,180 @@ class MainWindow(ctk.CTk):
             filetypes=[("Data files", "*.txt *.csv")]
             )
         if file_path:
+            def work():
+                # Stream the body so large files are never read whole
+                with FileManager.open_entry(file_path) as entry:
+                    meta = {
+                        "title": entry.title,
+                        "type": "TEXT",
+                        "password_hash": None,
+                        "file_path": file_path,
+                    }
+                    new_id = self.db.save_metadata(meta)
+                    try:
+                        self.db.save_content_chunks(
+                            new_id, entry.body_chunks(), None
+                        )
+                        if entry.translations:
+                            self.db.update_content(
+                                new_id, translations=entry.translations
+                            )
+                    except Exception:
+                        # Malformed past the body: keep no half-imported note
+                        self.db.delete_note(new_id)
+                        raise
+                self.watcher.watch(new_id, file_path)
+
+            self.dispatcher.then(
+                self.db.submit(work),
+                lambda _: self.show_list_page(),
+                lambda e: messagebox.showerror("Error", str(e)),
+            )
+
+    def import_folder(self):
+        directory = filedialog.askdirectory(title="Folder of .txt/.csv notes")
+        if not directory:
+            return
+
+        def on_progress(done, total, failed):
+            self.dispatcher.call(
+                self.title,
+                f"Journal - Importing {done}/{total} ({failed} failed)"
+            )
+
+        def work():
+            try:
+                report = BulkImporter(self.db).run(directory, on_progress)
+            except Exception as e:
+                self.dispatcher.call(messagebox.showerror, "Import", str(e))
+                return
+            self.dispatcher.call(self.finish_folder_import, report)
+
+        threading.Thread(target=work, daemon=True).start()
+
+    def finish_folder_import(self, report, noun="files"):
+        summary = (
+            f"Imported {report['imported']} of {report['total']} {noun} "
+            f"in {report['seconds']:.1f}s."
+        )
+        if report["errors"]:
+            details = "\n".join(
+                f"{os.path.basename(path)}: {error}"
+                for path, error in report["errors"][:10]
+            )
+            more = len(report["errors"]) - 10
+            if more > 0:
+                details += f"\n... and {more} more"
+            messagebox.showwarning("Import", f"{summary}\n\n{details}")
+        else:
+            messagebox.showinfo("Import", summary)
+        self.title("Journal Project - RTL & Sync Fixed")
+        self.show_list_page()
+
+    # ----------------------
+    # Whole-journal Archives
+    # ----------------------
+    ARCHIVE_TYPES = [
+        ("Compressed CSV", "*.csv.gz"),
+        ("Compressed JSON Lines", "*.jsonl.gz"),
+        ("CSV", "*.csv"),
+        ("JSON Lines", "*.jsonl"),
+    ]
+
+    def export_journal(self):
+        path = filedialog.asksaveasfilename(
+            defaultextension=".csv.gz", filetypes=self.ARCHIVE_TYPES
+        )
+        if not path:
+            return
+
+        def on_progress(count):
+            self.dispatcher.call(
+                self.title, f"Journal - Exported {count} notes..."
+            )
+
+        def work():
+            try:
+                count = JournalArchive(self.db).export_to(path, on_progress)
+            except Exception as e:
+                self.dispatcher.call(messagebox.showerror, "Backup", str(e))
+                return
+            self.dispatcher.call(
+                messagebox.showinfo, "Backup",
+                f"Saved {count} notes to {os.path.basename(path)}."
+            )
+
+        threading.Thread(target=work, daemon=True).start()
+
+    def import_journal(self):
+        path = filedialog.askopenfilename(
+            filetypes=[
+                ("Journal archives", "*.csv *.jsonl *.csv.gz *.jsonl.gz")
+            ]
+        )
+        if not path:
+            return
+
+        def on_progress(done, failed):
+            self.dispatcher.call(
+                self.title, f"Journal - Restored {done} ({failed} failed)"
+            )
+
+        def work():
+            try:
+                report = JournalArchive(self.db).import_from(
+                    path, on_progress
+                )
+            except Exception as e:
+                self.dispatcher.call(messagebox.showerror, "Restore", str(e))
+                return
+            report["errors"] = [
+                (f"line {line}", error) for line, error in report["errors"]
+            ]
+            self.dispatcher.call(self.finish_folder_import, report, "notes")
+
+        threading.Thread(target=work, daemon=True).start()
+
+    def translate_journal(self):
+        answer = simpledialog.askstring(
+            "Translate Journal",
+            "Add these languages to every note (e.g., ar, fr, es):"
+        )
+        langs = [code for code in re.split(r"[\s,;]+", answer or "") if code]
+        if not langs:
+            return
+        rate = float(self.db.config["translate_rate"]) or None
+
+        def on_progress(done, failed):
+            self.dispatcher.call(
+                self.title, f"Journal - Translated {done} ({failed} failed)"
+            )
+
+        def work():
+            # Checkpointed per batch: after a crash or restart, asking
+            # for the same languages again carries on where it stopped
             try:
-                title, body, trans = FileManager.import_from_file(file_path)
-                meta = {
-                    "title": title,
-                    "type": "TEXT",
-                    "password_hash": None,
-                    "file_path": file_path,
-                }
-                new_id = self.db.save_metadata(meta)
-                self.db.save_content(new_id, body, trans)
-                self.show_list_page()
+                report = Retranslator(
+                    self.db, langs, rate_limit=rate,
+                    job_id=Retranslator.job_id_for(langs),
+                ).run(on_progress)
             except Exception as e:
-                messagebox.showerror("Error", str(e))
+                self.dispatcher.call(messagebox.showerror, "Translate", str(e))
+                return
+            self.dispatcher.call(self.finish_journal_translation, report)
+
+        threading.Thread(target=work, daemon=True).start()
+
+    def finish_journal_translation(self, report):
+        summary = (
+            f"Translated {report['updated']} of {report['total']} notes "
+            f"with {report['requests']} requests "
+            f"in {report['seconds']:.1f}s."
+        )
+        if report["resumed_after"]:
+            summary = (
+                f"Resumed after note {report['resumed_after']}. {summary}"
+            )
+        self.show_job_summary("Translate", summary, report["errors"])
+        self.title("Journal Project - RTL & Sync Fixed")
+        self.show_list_page()
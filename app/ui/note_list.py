@@ -0,0 +1,321 @@
+from concurrent.futures import Future
+import customtkinter as ctk
+from app.metrics import instrumented
+from app.models.collection import EntryCollection
+
+
+def completed(rows):
+    """A finished Future holding `rows`, for sources already in memory."""
+    future = Future()
+    future.set_result(rows)
+    return future
+
+
+class PagedTitles:
+    """Rows of the notes list, fetched one keyset page at a time.
+
+    Pages are never waited for: ensure() asks for the next one and
+    returns the rows already known, and on_loaded() runs on the Tk
+    thread once the page has arrived. then(future, on_done, on_error)
+    is how results come back (TkDispatcher.then).
+    """
+
+    def __init__(self, then, page_size=50, on_loaded=None, on_error=None):
+        self.then = then
+        self.page_size = page_size
+        self.on_loaded = on_loaded
+        self.on_error = on_error
+        self.generation = 0
+        self.reset(lambda last, limit: completed([]))
+
+    def reset(self, request_page):
+        # request_page(last_row, limit) -> Future of {"id", "title"} rows;
+        # last_row is the previous page's last row as it came, sort
+        # columns included, or None for the first page
+        self.request_page = request_page
+        # Scrolling through a long journal keeps every fetched row
+        self.rows = EntryCollection()
+        self.last = None
+        self.exhausted = False
+        self.loading = False
+        # Pages of an older source are dropped when they arrive
+        self.generation += 1
+
+    def __len__(self):
+        return len(self.rows)
+
+    def ensure(self, count):
+        """Asks for the next page unless `count` rows are known, the
+        source ended or a page is on its way; returns the rows known."""
+        if len(self.rows) < count and not self.exhausted \
+                and not self.loading:
+            self.loading = True
+            generation = self.generation
+            self.then(
+                self.request_page(self.last, self.page_size),
+                lambda page: self._add_page(generation, page),
+                lambda error: self._fail(generation, error),
+            )
+        return min(count, len(self.rows))
+
+    def _add_page(self, generation, page):
+        if generation != self.generation:
+            return
+        self.loading = False
+        self.rows.extend(page)
+        if page:
+            self.last = page[-1]
+        if len(page) < self.page_size:
+            self.exhausted = True
+        if self.on_loaded is not None:
+            self.on_loaded()
+
+    def _fail(self, generation, error):
+        if generation != self.generation:
+            return
+        # The next ensure() asks for the page again
+        self.loading = False
+        if self.on_error is not None:
+            self.on_error(error)
+
+    def window(self, start, stop):
+        self.ensure(stop)
+        return self.rows[start:stop]
+
+    def estimated_total(self):
+        # While pages remain, leave one page of room so the scrollbar
+        # can reach rows that have not been fetched yet.
+        if self.exhausted:
+            return len(self.rows)
+        return len(self.rows) + self.page_size
+
+
+class RowSelection:
+    """Note ids picked in the list, with Ctrl-click and Shift-click rules.
+
+    Ranges are resolved against the loaded rows (an EntryCollection),
+    from the last clicked row, the anchor, to the clicked one.
+    """
+
+    def __init__(self):
+        self.ids = set()
+        self.anchor = None
+
+    def __len__(self):
+        return len(self.ids)
+
+    def __contains__(self, note_id):
+        return note_id in self.ids
+
+    def clear(self):
+        self.ids.clear()
+        self.anchor = None
+
+    def toggle(self, note_id):
+        if note_id in self.ids:
+            self.ids.discard(note_id)
+        else:
+            self.ids.add(note_id)
+        self.anchor = note_id
+
+    def extend_to(self, rows, note_id):
+        """Adds every row between the anchor and note_id to the selection."""
+        if self.anchor is None:
+            self.toggle(note_id)
+            return
+        try:
+            first = rows.index_of(self.anchor)
+        except ValueError:  # the anchor left the list, e.g. a new search
+            self.toggle(note_id)
+            return
+        last = rows.index_of(note_id)
+        if first > last:
+            first, last = last, first
+        self.ids.update(rows.ids[first:last + 1])
+
+    def ordered(self, rows=None):
+        """Selected ids, in list order for those among `rows`."""
+        if rows is None:
+            return sorted(self.ids)
+        listed = [i for i in rows.ids if i in self.ids]
+        return listed + sorted(self.ids.difference(listed))
+
+
+class VirtualNoteList(ctk.CTkFrame):
+    """Notes list that only creates the buttons that fit on screen.
+
+    The buttons are pooled: scrolling rebinds their text and command to
+    the rows now in view instead of creating new widgets. Ctrl-click
+    picks single rows and Shift-click a range for bulk actions;
+    on_selection_change(count) follows every change. Rows come from
+    load()'s request_page on the database pool through `dispatcher`,
+    and the list renders again as each page arrives.
+    """
+
+    ROW_HEIGHT = 51  # 45px button + 3px padding above and below
+    COLOR = "#2b2b2b"
+    SELECTED_COLOR = "#1f538d"
+
+    def __init__(self, master, dispatcher, on_open, page_size=50,
+                 on_selection_change=None, on_error=None, **kwargs):
+        super().__init__(master, **kwargs)
+        self.on_open = on_open
+        self.on_selection_change = on_selection_change
+        self.model = PagedTitles(dispatcher.then, page_size,
+                                 on_loaded=self.render, on_error=on_error)
+        self.selection = RowSelection()
+        self.first = 0
+        self.pool = []
+        self._bound = []  # note id currently shown by each pooled button
+        self._colored = []  # whether each pooled button shows as selected
+
+        self.grid_columnconfigure(0, weight=1)
+        self.grid_rowconfigure(1, weight=1)
+
+        ctk.CTkLabel(self, text="Notes Collection").grid(
+            row=0, column=0, columnspan=2, pady=(5, 0)
+        )
+        self.body = ctk.CTkFrame(self, fg_color="transparent")
+        self.body.grid(row=1, column=0, sticky="nsew", padx=(5, 0), pady=5)
+        self.scrollbar = ctk.CTkScrollbar(self, command=self._on_scrollbar)
+        self.scrollbar.grid(row=1, column=1, sticky="ns", pady=5)
+
+        self.body.bind("<Configure>", lambda e: self.render())
+        self._bind_wheel(self.body)
+
+    # ----------------------
+    # Data
+    # ----------------------
+    def load(self, request_page):
+        """Points the list at a new row source and scrolls to the top."""
+        self.model.reset(request_page)
+        self.first = 0
+        self.clear_selection()
+        for i, btn in enumerate(self.pool):
+            if self._bound[i] is not None:
+                btn.place_forget()
+                self._bound[i] = None
+        self.render()
+
+    # ----------------------
+    # Selection
+    # ----------------------
+    def clear_selection(self):
+        if self.selection:
+            self.selection.clear()
+            self._selection_changed()
+
+    def selected_ids(self):
+        return self.selection.ordered(self.model.rows)
+
+    def _on_click(self, index, event):
+        note_id = self._bound[index]
+        if note_id is None:
+            return
+        if event.state & 0x0001:  # Shift
+            self.selection.extend_to(self.model.rows, note_id)
+        elif event.state & 0x0004:  # Control
+            self.selection.toggle(note_id)
+        else:
+            self.on_open(note_id)
+            return
+        self._selection_changed()
+
+    def _selection_changed(self):
+        self.render()
+        if self.on_selection_change is not None:
+            self.on_selection_change(len(self.selection))
+
+    # ----------------------
+    # Rendering
+    # ----------------------
+    def _visible_count(self):
+        height = max(self.body.winfo_height(), self.ROW_HEIGHT)
+        return height // self.ROW_HEIGHT + 1
+
+    def _grow_pool(self, size):
+        while len(self.pool) < size:
+            # Clicks are handled by _on_click, which sees the modifier
+            # keys; the text must be non-empty so the label it binds to
+            # exists from the start
+            btn = ctk.CTkButton(
+                self.body,
+                text=" ",
+                anchor="w",
+                height=45,
+                fg_color=self.COLOR,
+            )
+            self._bind_wheel(btn)
+            index = len(self.pool)
+            btn.bind(
+                "<Button-1>", lambda e, i=index: self._on_click(i, e),
+                add="+",
+            )
+            self.pool.append(btn)
+            self._bound.append(None)
+            self._colored.append(False)
+
+    @instrumented("ui.note_list.render")
+    def render(self):
+        visible = self._visible_count()
+        self._grow_pool(visible)
+        self.model.ensure(self.first + visible)
+        # Until the source ends, `first` stays where the user scrolled
+        # and the rows in view catch up as pages arrive
+        last_first = max(0, len(self.model) - visible + 1)
+        if self.model.exhausted:
+            self.first = min(self.first, last_first)
+        first = min(self.first, last_first)
+        rows = self.model.window(first, first + visible)
+
+        for i, btn in enumerate(self.pool):
+            if i >= len(rows):
+                if self._bound[i] is not None:
+                    btn.place_forget()
+                    self._bound[i] = None
+                continue
+            note = rows[i]
+            if self._bound[i] != note["id"]:
+                btn.configure(text=f" {note['title']}")
+                if self._bound[i] is None:
+                    btn.place(x=0, y=i * self.ROW_HEIGHT + 3, relwidth=1)
+                self._bound[i] = note["id"]
+            selected = note["id"] in self.selection
+            if selected != self._colored[i]:
+                btn.configure(
+                    fg_color=self.SELECTED_COLOR if selected else self.COLOR
+                )
+                self._colored[i] = selected
+
+        total = max(self.model.estimated_total(), 1)
+        self.scrollbar.set(
+            first / total, min(1.0, (first + visible) / total)
+        )
+
+    # ----------------------
+    # Scrolling
+    # ----------------------
+    def scroll_to(self, index):
+        self.first = max(0, int(index))
+        self.render()
+
+    def _on_scrollbar(self, action, value, unit=None):
+        if action == "moveto":
+            self.scroll_to(float(value) * self.model.estimated_total())
+        elif action == "scroll":
+            step = self._visible_count() if unit == "pages" else 1
+            self.scroll_to(self.first + int(value) * step)
+
+    def _on_wheel(self, event):
+        if getattr(event, "num", None) == 4:
+            delta = -1
+        elif getattr(event, "num", None) == 5:
+            delta = 1
+        else:
+            delta = -1 if event.delta > 0 else 1
+        self.scroll_to(self.first + delta * 3)
+
+    def _bind_wheel(self, widget):
+        widget.bind("<MouseWheel>", self._on_wheel)
+        widget.bind("<Button-4>", self._on_wheel)
+        widget.bind("<Button-5>", self._on_wheel)
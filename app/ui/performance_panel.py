@@ -0,0 +1,86 @@
+import customtkinter as ctk
+from tkinter import filedialog, messagebox
+from app.metrics import metrics
+
+COLUMNS = (
+    ("name", 30), ("calls", 7), ("errors", 6), ("mean_ms", 9),
+    ("p50_ms", 8), ("p95_ms", 8), ("max_ms", 9), ("bytes", 11),
+)
+
+
+def format_table(snapshot):
+    """Fixed-width text table of a Metrics.snapshot()."""
+    lines = ["".join(
+        f"{name:<{width}}" if i == 0 else f"{name:>{width}}"
+        for i, (name, width) in enumerate(COLUMNS)
+    )]
+    errors = []
+    for name, stat in snapshot["metrics"].items():
+        row = [f"{name[:COLUMNS[0][1] - 1]:<{COLUMNS[0][1]}}"]
+        for column, width in COLUMNS[1:]:
+            value = stat[column]
+            text = f"{value:.1f}" if isinstance(value, float) else str(value)
+            row.append(f"{text:>{width}}")
+        lines.append("".join(row))
+        if stat["last_error"]:
+            errors.append(f"{name}: {stat['last_error']}")
+    if errors:
+        lines += ["", "Last errors:"] + errors
+    return "\n".join(lines)
+
+
+class PerformancePanel(ctk.CTkToplevel):
+    """Live view of the call metrics, with reset and JSON export."""
+
+    REFRESH_MS = 1000
+
+    def __init__(self, master):
+        super().__init__(master)
+        self.title("Performance")
+        self.geometry("900x500")
+
+        bar = ctk.CTkFrame(self, fg_color="transparent")
+        bar.pack(fill="x", padx=10, pady=10)
+        self.record_var = ctk.BooleanVar(value=metrics.enabled)
+        ctk.CTkSwitch(
+            bar, text="Record", variable=self.record_var,
+            command=self.toggle_recording,
+        ).pack(side="left", padx=5)
+        ctk.CTkButton(
+            bar, text="Reset", width=90, command=self.reset
+        ).pack(side="left", padx=5)
+        ctk.CTkButton(
+            bar, text="Export JSON", width=110, command=self.export
+        ).pack(side="left", padx=5)
+
+        self.table = ctk.CTkTextbox(self, font=("Courier", 12), wrap="none")
+        self.table.pack(fill="both", expand=True, padx=10, pady=(0, 10))
+        self.refresh()
+
+    def toggle_recording(self):
+        metrics.enabled = self.record_var.get()
+
+    def reset(self):
+        metrics.reset()
+        self.refresh()
+
+    def export(self):
+        path = filedialog.asksaveasfilename(
+            parent=self, defaultextension=".json",
+            filetypes=[("JSON", "*.json")],
+        )
+        if not path:
+            return
+        try:
+            metrics.export_json(path)
+        except OSError as e:
+            messagebox.showerror("Export", str(e), parent=self)
+
+    def refresh(self):
+        if not self.winfo_exists():
+            return
+        self.table.configure(state="normal")
+        self.table.delete("1.0", "end")
+        self.table.insert("1.0", format_table(metrics.snapshot()))
+        self.table.configure(state="disabled")
+        self.after(self.REFRESH_MS, self.refresh)
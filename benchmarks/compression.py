@@ -0,0 +1,129 @@
+"""Measures body and translation compression on a synthetic journal.
+
+The corpus is --notes notes from benchmarks/synthetic.py (every
+--large-every-th one 256 KB, with its translations) plus --logs
+log-file bodies like those imported through FileEntry. For every codec
+and threshold it reports, over all body and translation fields:
+
+    compressed   fields at or over the threshold that were worth it
+    stored_mb    what MongoDB would hold, against raw_mb of plain text
+    ratio        raw / stored
+    encode_mbs   MB of text compressed a second (TextCodec.encode)
+    decode_mbs   MB of text restored a second (TextCodec.decode)
+
+Usage:
+    python benchmarks/compression.py [--notes 2000] [--logs 20]
+        [--thresholds 4096,16384,65536] [--json out.json]
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.synthetic import generate_notes  # noqa: E402
+
+LEVELS = ("INFO", "INFO", "INFO", "DEBUG", "WARN", "ERROR")
+PATHS = ("/api/notes", "/api/search", "/api/translate", "/login", "/sync")
+
+
+def generate_log(rng, size):
+    """A web-server style log of about `size` characters."""
+    lines = []
+    length = 0
+    second = rng.randrange(86400)
+    while length < size:
+        second += rng.randint(0, 3)
+        line = (
+            f"2026-03-{1 + second // 86400 % 28:02d} "
+            f"{second // 3600 % 24:02d}:{second // 60 % 60:02d}:"
+            f"{second % 60:02d} {rng.choice(LEVELS):<5} "
+            f"GET {rng.choice(PATHS)}?id={rng.randrange(100000)} "
+            f"{rng.choice((200, 200, 200, 304, 404, 500))} "
+            f"{rng.randint(1, 900)}ms"
+        )
+        lines.append(line)
+        length += len(line) + 1
+    return "\n".join(lines)
+
+
+def corpus(notes, logs, seed=0, large_every=100):
+    """Every body and translation text of the synthetic journal."""
+    texts = []
+    for note in generate_notes(notes, seed=seed, large_every=large_every):
+        texts.append(note["body"])
+        texts.extend(note["translations"].values())
+    rng = random.Random(seed)
+    texts.extend(generate_log(rng, rng.randint(256, 4096) * 1024)
+                 for _ in range(logs))
+    return texts
+
+
+def measure(texts, codec, threshold):
+    from app.services.compression import TextCodec
+    text_codec = TextCodec(codec, threshold)
+    raw = sum(len(t.encode("utf-8")) for t in texts)
+
+    start = time.perf_counter()
+    encoded = [text_codec.encode(t) for t in texts]
+    encode_s = time.perf_counter() - start
+    packed = [value for value in encoded if isinstance(value, dict)]
+    packed_raw = sum(
+        len(t.encode("utf-8"))
+        for t, value in zip(texts, encoded) if isinstance(value, dict)
+    )
+    stored = raw - packed_raw + sum(len(value["data"]) for value in packed)
+
+    start = time.perf_counter()
+    decoded = [TextCodec.decode(value) for value in encoded]
+    decode_s = time.perf_counter() - start
+    assert decoded == texts
+
+    return {
+        "fields": len(texts),
+        "compressed": len(packed),
+        "raw_mb": round(raw / 2 ** 20, 2),
+        "stored_mb": round(stored / 2 ** 20, 2),
+        "ratio": round(raw / stored, 2),
+        "encode_mbs": round(packed_raw / 2 ** 20 / encode_s, 1)
+        if packed and encode_s else None,
+        "decode_mbs": round(packed_raw / 2 ** 20 / decode_s, 1)
+        if packed and decode_s else None,
+    }
+
+
+def main(argv=None):
+    from app.services.compression import CODECS
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--notes", type=int, default=2000)
+    parser.add_argument("--logs", type=int, default=20)
+    parser.add_argument("--large-every", type=int, default=100)
+    parser.add_argument("--thresholds", default="4096,16384,65536")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="save the results to this file")
+    args = parser.parse_args(argv)
+
+    texts = corpus(args.notes, args.logs, args.seed, args.large_every)
+    results = {}
+    for codec in sorted(CODECS):
+        for threshold in map(int, args.thresholds.split(",")):
+            name = f"{codec}@{threshold}"
+            results[name] = result = measure(texts, codec, threshold)
+            print(f"{name:<12} {result['compressed']:>6}/{result['fields']}"
+                  f" fields  {result['raw_mb']:>8.2f} -> "
+                  f"{result['stored_mb']:>8.2f} MB  x{result['ratio']:<5}"
+                  f"  encode {result['encode_mbs']} MB/s"
+                  f"  decode {result['decode_mbs']} MB/s")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,466 @@
+"""Times the journal's hot paths on a synthetic journal.
+
+A journal of --notes notes (see benchmarks/synthetic.py) is written
+through DatabaseService into in-process stand-ins for MySQL and MongoDB
+(--store standin, the default) or into the SQLite backend (--store
+sqlite), so no server is needed. Then each operation is run --repeat
+times and its median, min and max are reported in milliseconds:
+
+    populate              save_batch of the whole journal, 500 at a time
+    search_index_build    building the full-text index from scratch
+    get_all_titles        every (id, title) row
+    list_refresh          first screen of the notes list
+    list_scroll_all       paging through the whole list
+    list_filter           first screen of a title-filtered list
+    list_recent_scroll    paging through the list by last edit
+    list_language         first screen of notes translated into French
+    search                ranked full-text queries
+    load_note_cold/warm   load_note_to_edit's fetch (body and language
+                          list), uncached and cached
+    load_note_all_langs   uncached load with every translation's text
+    load_translation      one language fetched when it is shown
+    save_flow_*           the editor's partial save: body edit, added
+                          translation, brand-new note
+    export/import_txt/csv single-note files, including a large one
+    folder_import         BulkImporter over the exported TXT files
+    archive_export        whole-journal backup to .jsonl.gz
+    translate_cold/cached four languages through a stand-in translator
+
+Results can be saved as a JSON baseline and later runs compared with
+it; a comparison exits with status 1 when any median is more than
+--tolerance slower than the baseline's.
+
+Usage:
+    python benchmarks/journal_suite.py [--notes 100000] [--repeat 5]
+        [--store standin|sqlite] [--latency-ms 0]
+        [--json baselines/main.json] [--compare baselines/main.json]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.standins import StandInMongo, StandInMySQL  # noqa: E402
+from benchmarks.synthetic import batches, generate_notes  # noqa: E402
+
+SCREEN_ROWS = 60
+SAMPLE_SIZE = 200
+FILE_SAMPLE = 50
+SEARCH_QUERIES = ("river coffee", "jardin", "المدينة", "Fenster Zug")
+TRANSLATE_LANGS = ("ar", "fr", "es", "de")
+
+
+class StandInTranslator:
+    """Replaces GoogleTranslator; `latency` models the web request."""
+
+    latency = 0.02
+
+    def __init__(self, source="auto", target="en"):
+        self.target = target
+
+    def translate(self, text):
+        time.sleep(self.latency)
+        return f"[{self.target}] {text}"
+
+
+def timed(fn, repeat, ops=1):
+    """Runs fn `repeat` times; returns its timings in milliseconds."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - start) * 1000)
+    median = statistics.median(times)
+    return {
+        "runs": repeat,
+        "ops": ops,
+        "median_ms": round(median, 3),
+        "min_ms": round(min(times), 3),
+        "max_ms": round(max(times), 3),
+        "per_op_ms": round(median / ops, 4),
+    }
+
+
+def make_backend(store, workdir, latency=0.0):
+    from app.services.backends import SQLiteBackend
+    from app.services.backends.mysql_mongo import MySQLMongoBackend
+    if store == "sqlite":
+        backend = SQLiteBackend(os.path.join(workdir, "journal.db"))
+        backend.connect(print)
+        return backend
+    backend = MySQLMongoBackend(
+        mysql=StandInMySQL(os.path.join(workdir, "mysql.db"), latency),
+        mongo=StandInMongo(latency),
+    )
+    backend.migrate()
+    return backend
+
+
+def run_suite(db, notes=1000, store="standin", repeat=5, latency=0.0,
+              seed=0, workdir=None):
+    """Runs every benchmark against `db` (a DatabaseService).
+
+    The service is pointed at a fresh backend for the run and restored
+    afterwards. Returns {name: timings} in the order listed above.
+    """
+    from app.models.concrete import TextEntry
+    from app.models.dirty import DirtyTracker
+    from app.models import features
+    from app.models.features import MultilingualEntry
+    from app.services.bulk_import import BulkImporter
+    from app.services.file_manager import FileManager
+    from app.services.journal_archive import JournalArchive
+    from app.services.translation_cache import TranslationCache
+    from app.ui.note_list import PagedTitles
+
+    own_workdir = workdir is None
+    if own_workdir:
+        workdir = tempfile.mkdtemp(prefix="journal-bench-")
+    backend = make_backend(store, workdir, latency)
+    previous = (db.backend, db.index)
+    previous_translator = (features.GoogleTranslator, MultilingualEntry.cache)
+    db.use_backend(backend)
+    db.index = None
+    rng = random.Random(seed)
+    results = {}
+    try:
+        # ----------------------
+        # Writing the journal
+        # ----------------------
+        ids = []
+
+        def populate():
+            for batch in batches(generate_notes(notes, seed), 500):
+                ids.extend(db.save_batch(batch))
+
+        results["populate"] = timed(populate, 1, notes)
+        results["search_index_build"] = timed(
+            lambda: db.open_search_index(os.path.join(workdir, "search.db")),
+            1, notes,
+        )
+
+        # ----------------------
+        # Notes list and search
+        # ----------------------
+        def page_source(query="", sort="id", lang=None):
+            def request_page(last, limit):
+                return db.submit(db.list_notes, sort, last, limit, query,
+                                 lang)
+            return request_page
+
+        def fill_list(request_page, count):
+            # Pages are handed over as soon as they are done, instead of
+            # on the Tk queue, and asked for until `count` rows are known
+            model = PagedTitles(
+                lambda future, on_done, on_error: on_done(future.result())
+            )
+            model.reset(request_page)
+            while model.ensure(count) < count and not model.exhausted:
+                pass
+            return model
+
+        results["get_all_titles"] = timed(db.get_all_titles, repeat, notes)
+        results["list_refresh"] = timed(
+            lambda: fill_list(page_source(), SCREEN_ROWS), repeat
+        )
+        results["list_scroll_all"] = timed(
+            lambda: fill_list(page_source(), notes), repeat, notes
+        )
+        results["list_filter"] = timed(
+            lambda: fill_list(page_source("river"), SCREEN_ROWS), repeat,
+        )
+        results["list_recent_scroll"] = timed(
+            lambda: fill_list(page_source(sort="recent"), notes),
+            repeat, notes,
+        )
+        results["list_language"] = timed(
+            lambda: fill_list(page_source(lang="fr"), SCREEN_ROWS), repeat,
+        )
+        results["search"] = timed(
+            lambda: [db.search(q) for q in SEARCH_QUERIES],
+            repeat, len(SEARCH_QUERIES),
+        )
+
+        # ----------------------
+        # Loading and saving notes
+        # ----------------------
+        sample = rng.sample(ids, min(SAMPLE_SIZE, len(ids)))
+
+        def load_cold():
+            db.note_cache.clear()
+            for note_id in sample:
+                db.load_note(note_id)
+
+        results["load_note_cold"] = timed(load_cold, repeat, len(sample))
+        results["load_note_warm"] = timed(
+            lambda: [db.load_note(note_id) for note_id in sample],
+            repeat, len(sample),
+        )
+
+        def load_all_langs(note_id):
+            note = db.load_note(note_id)
+            if note and note["languages"]:
+                note["translations"].update(
+                    db.load_translations(note_id, note["languages"])
+                )
+            return note
+
+        def load_all_cold():
+            db.note_cache.clear()
+            for note_id in sample:
+                load_all_langs(note_id)
+
+        def load_one_language():
+            for note_id in sample:
+                languages = db.load_note(note_id)["languages"]
+                if languages:
+                    db.backend.get_translations(note_id, languages[:1])
+
+        results["load_note_all_langs"] = timed(
+            load_all_cold, repeat, len(sample)
+        )
+        results["load_translation"] = timed(
+            load_one_language, repeat, len(sample)
+        )
+
+        loaded = [load_all_langs(note_id) for note_id in sample[:FILE_SAMPLE]]
+
+        def save_edits(edit):
+            def run():
+                for note in loaded:
+                    state = {
+                        "title": note["title"],
+                        "body": note["body"],
+                        "translations": note["translations"] or {},
+                        "password_hash": note["password_hash"],
+                        "file_path": note["file_path"],
+                    }
+                    edited = edit(dict(state))
+                    changes = DirtyTracker(state).changes(edited)
+                    meta = dict(edited, id=note["id"], type="TEXT")
+                    db.save_changes(
+                        meta, edited["body"], edited["translations"], changes
+                    )
+            return run
+
+        results["save_flow_body"] = timed(save_edits(
+            lambda s: dict(s, body=s["body"] + " Edited.")
+        ), repeat, len(loaded))
+        results["save_flow_translation"] = timed(save_edits(
+            lambda s: dict(s, translations=dict(
+                s["translations"], it="[it] " + s["body"][:200]
+            ))
+        ), repeat, len(loaded))
+
+        def save_new():
+            for note in loaded:
+                state = {
+                    "title": note["title"],
+                    "body": note["body"],
+                    "translations": {},
+                    "password_hash": None,
+                    "file_path": None,
+                }
+                meta = dict(state, id=None, type="TEXT")
+                db.save_changes(
+                    meta, state["body"], {}, DirtyTracker().changes(state)
+                )
+
+        results["save_flow_new"] = timed(save_new, repeat, len(loaded))
+
+        # ----------------------
+        # Files
+        # ----------------------
+        large = [load_all_langs(note_id) for note_id in ids[499:500]]
+        file_notes = loaded + large
+        for ext, export in (("txt", FileManager.export_to_txt),
+                            ("csv", FileManager.export_to_csv)):
+            folder = os.path.join(workdir, ext)
+            os.makedirs(folder, exist_ok=True)
+            paths = [
+                os.path.join(folder, f"note_{n['id']}.{ext}")
+                for n in file_notes
+            ]
+
+            def export_all(export=export, paths=paths):
+                for path, n in zip(paths, file_notes):
+                    export(path, n["title"], n["body"], n["translations"])
+
+            def import_all(paths=paths):
+                for path in paths:
+                    FileManager.import_from_file(path)
+
+            results[f"export_{ext}"] = timed(
+                export_all, repeat, len(file_notes)
+            )
+            results[f"import_{ext}"] = timed(
+                import_all, repeat, len(file_notes)
+            )
+
+        importer = BulkImporter(db)
+        results["folder_import"] = timed(
+            lambda: importer.run(os.path.join(workdir, "txt")),
+            1, len(file_notes),
+        )
+        archive = JournalArchive(db)
+        results["archive_export"] = timed(
+            lambda: archive.export_to(
+                os.path.join(workdir, "journal.jsonl.gz")
+            ),
+            1, notes,
+        )
+
+        # ----------------------
+        # Translation
+        # ----------------------
+        features.GoogleTranslator = StandInTranslator
+        MultilingualEntry.cache = TranslationCache(
+            mongo=getattr(backend, "mongo", None),
+            path=os.path.join(workdir, "translation_cache.db"),
+        )
+        body = loaded[0]["body"] if loaded else "Hello"
+        counter = iter(range(sys.maxsize))
+
+        def translate(text_for_run):
+            def run():
+                entry = MultilingualEntry(TextEntry("T", text_for_run()))
+                entry.add_languages(TRANSLATE_LANGS)
+            return run
+
+        results["translate_cold"] = timed(
+            translate(lambda: f"{body} ({next(counter)})"),
+            repeat, len(TRANSLATE_LANGS),
+        )
+        translate(lambda: body)()
+        results["translate_cached"] = timed(
+            translate(lambda: body), repeat, len(TRANSLATE_LANGS)
+        )
+    finally:
+        features.GoogleTranslator, MultilingualEntry.cache = \
+            previous_translator
+        db.use_backend(previous[0])
+        db.index = previous[1]
+        backend.close()
+        if own_workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def _commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, baseline, tolerance=0.25):
+    """[(name, baseline ms, current ms, ratio, regressed)] by median."""
+    rows = []
+    for name, timing in current["results"].items():
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        ratio = (
+            timing["median_ms"] / base["median_ms"]
+            if base["median_ms"] else 1.0
+        )
+        rows.append((
+            name, base["median_ms"], timing["median_ms"], ratio,
+            ratio > 1 + tolerance,
+        ))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--notes", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--store", choices=("standin", "sqlite"),
+                        default="standin")
+    parser.add_argument("--latency-ms", type=float, default=0.0,
+                        help="simulated round trip per stand-in call")
+    parser.add_argument("--translate-latency-ms", type=float, default=20.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="save the results to this file")
+    parser.add_argument("--compare", help="baseline file to compare with")
+    parser.add_argument("--tolerance", type=float, default=0.25,
+                        help="allowed slowdown before failing (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    workdir = tempfile.mkdtemp(prefix="journal-bench-")
+    # The service starts on a throwaway SQLite file, never on servers
+    os.environ["JOURNAL_BACKEND"] = "sqlite"
+    os.environ["JOURNAL_SQLITE_PATH"] = os.path.join(workdir, "boot.db")
+    from app.services.database import DatabaseService
+    db = DatabaseService()
+    db.wait_ready()
+    StandInTranslator.latency = args.translate_latency_ms / 1000
+
+    try:
+        results = run_suite(
+            db, args.notes, args.store, args.repeat,
+            args.latency_ms / 1000, args.seed, workdir,
+        )
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    report = {
+        "meta": {
+            "commit": _commit(),
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "machine": platform.platform(),
+            "notes": args.notes,
+            "store": args.store,
+            "repeat": args.repeat,
+            "latency_ms": args.latency_ms,
+            "translate_latency_ms": args.translate_latency_ms,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+
+    width = max(len(name) for name in results)
+    for name, timing in results.items():
+        print(f"{name:<{width}}  {timing['median_ms']:>11.2f} ms"
+              f"  ({timing['per_op_ms']:.4f} ms/op)")
+    if args.json:
+        directory = os.path.dirname(args.json)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+    if not args.compare:
+        return 0
+    with open(args.compare, encoding="utf-8") as f:
+        baseline = json.load(f)
+    for key in ("notes", "store", "latency_ms"):
+        if baseline["meta"].get(key) != report["meta"][key]:
+            print(f"Warning: baseline {key} is "
+                  f"{baseline['meta'].get(key)!r}, "
+                  f"not {report['meta'][key]!r}")
+    rows = compare(report, baseline, args.tolerance)
+    print(f"\nCompared with {baseline['meta'].get('commit')}:")
+    for name, before, after, ratio, regressed in rows:
+        flag = "  REGRESSION" if regressed else ""
+        print(f"{name:<{width}}  {before:>11.2f} -> {after:>11.2f} ms"
+              f"  x{ratio:.2f}{flag}")
+    return 1 if any(row[4] for row in rows) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
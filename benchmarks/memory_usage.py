@@ -0,0 +1,120 @@
+"""Measures the memory held by many entries in each representation.
+
+For --entries synthetic titles (benchmarks/synthetic.py) it reports
+the bytes still allocated, per tracemalloc, after building:
+
+    dict_rows          list of {"id", "title"} dicts (get_all_titles)
+    entry_collection   app.models.collection.EntryCollection
+    plain_entries      TextEntry-like objects with a __dict__ (the old
+                       model classes)
+    slotted_entries    TextEntry objects (__slots__)
+    wrapped_entries    MultilingualEntry(SecretEntry(TextEntry))
+
+Usage:
+    python benchmarks/memory_usage.py [--entries 100000] [--json out.json]
+"""
+import argparse
+import gc
+import json
+import os
+import sys
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from app.models.collection import EntryCollection  # noqa: E402
+from app.models.concrete import TextEntry  # noqa: E402
+from app.models.features import MultilingualEntry, SecretEntry  # noqa: E402
+from benchmarks.synthetic import generate_titles  # noqa: E402
+
+
+class PlainEntry:
+    """TextEntry as it was before it had __slots__."""
+
+    def __init__(self, title, body):
+        self.title = title
+        self.body = body
+
+
+def measure(build):
+    """Bytes still allocated once build() returns, with its result held."""
+    gc.collect()
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = build()
+        gc.collect()
+        after = tracemalloc.get_traced_memory()[0]
+    finally:
+        tracemalloc.stop()
+    del result
+    return after - before
+
+
+def run(count, seed=0):
+    titles = list(generate_titles(count, seed))
+
+    def fresh():
+        # New string objects, as a database driver would return them
+        for i, title in enumerate(titles, 1):
+            yield i, title.encode("utf-8").decode("utf-8")
+
+    def wrapped():
+        entries = []
+        for _, title in fresh():
+            entry = MultilingualEntry(SecretEntry(TextEntry(title, ""), "pw"))
+            entries.append(entry)
+        return entries
+
+    return {
+        "dict_rows": measure(
+            lambda: [{"id": i, "title": t} for i, t in fresh()]
+        ),
+        "entry_collection": measure(
+            lambda: EntryCollection(
+                {"id": i, "title": t} for i, t in fresh()
+            )
+        ),
+        "plain_entries": measure(
+            lambda: [PlainEntry(t, "") for _, t in fresh()]
+        ),
+        "slotted_entries": measure(
+            lambda: [TextEntry(t, "") for _, t in fresh()]
+        ),
+        "wrapped_entries": measure(wrapped),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--entries", type=int, default=100000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the result to this file")
+    args = parser.parse_args(argv)
+
+    sizes = run(args.entries, args.seed)
+    summary = {
+        "entries": args.entries,
+        "bytes": sizes,
+        "bytes_per_entry": {
+            name: round(size / args.entries, 1)
+            for name, size in sizes.items()
+        },
+        "collection_saving": round(
+            1 - sizes["entry_collection"] / sizes["dict_rows"], 3
+        ),
+        "slots_saving": round(
+            1 - sizes["slotted_entries"] / sizes["plain_entries"], 3
+        ),
+    }
+    print(json.dumps(summary, indent=2))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
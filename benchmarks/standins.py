@@ -0,0 +1,418 @@
+"""In-process stand-ins for the MySQL pool and the MongoDB database.
+
+They implement just the driver surface MySQLMongoBackend and
+TranslationCache use, so the real backend code runs without servers:
+
+    StandInMySQL   a MySQLPool look-alike over a SQLite file; `%s`
+                   placeholders, dict rows, and lastrowid of a multi-row
+                   INSERT pointing at its first row, as with InnoDB
+    StandInMongo   a database of in-memory collections with find,
+                   update_one ($set/$unset on dotted paths, upsert),
+                   bulk_write and friends
+
+`latency` (seconds) is added to every statement or collection call to
+model the network round trip a real server costs.
+"""
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+MYSQL_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    title TEXT NOT NULL,
+    type TEXT NOT NULL DEFAULT 'TEXT',
+    password_hash TEXT,
+    file_path TEXT
+);
+"""
+
+
+# ----------------------
+# MySQL
+# ----------------------
+class StandInMySQL:
+    """MySQLPool over a SQLite file, one connection per thread."""
+
+    def __init__(self, path, latency=0.0):
+        self.path = path
+        self.latency = latency
+        self._local = threading.local()
+        self._conn().executescript(MYSQL_SCHEMA)
+
+    def _conn(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30,
+                                   isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def connection(self):
+        yield _Connection(self._conn(), self.latency)
+
+    @contextmanager
+    def cursor(self):
+        with self.connection() as conn:
+            with conn.cursor() as cur:
+                yield cur
+
+    @contextmanager
+    def transaction(self):
+        with self.connection() as conn:
+            conn.begin()
+            try:
+                with conn.cursor() as cur:
+                    yield cur
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+
+    def prefill(self, count=1):
+        pass
+
+    def close(self):
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class _Connection:
+    def __init__(self, conn, latency):
+        self._conn = conn
+        self._latency = latency
+
+    def cursor(self, cursorclass=None):
+        # Every cursor class returns dict rows here
+        return _Cursor(self._conn, self._latency)
+
+    def ping(self, reconnect=False):
+        pass
+
+    def begin(self):
+        self._conn.execute("BEGIN")
+
+    def commit(self):
+        self._conn.execute("COMMIT")
+
+    def rollback(self):
+        self._conn.execute("ROLLBACK")
+
+
+class _Cursor:
+    def __init__(self, conn, latency):
+        self._conn = conn
+        self._latency = latency
+        self._cur = None
+        self.lastrowid = None
+        self.rowcount = -1
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        if self._cur is not None:
+            self._cur.close()
+            self._cur = None
+
+    @staticmethod
+    def _sql(query):
+        # MySQL escapes LIKE patterns with a backslash by default
+        return query.replace("%s", "?").replace(
+            "LIKE ?", "LIKE ? ESCAPE '\\'"
+        ).replace("INSERT IGNORE", "INSERT OR IGNORE")
+
+    def _wait(self):
+        if self._latency:
+            time.sleep(self._latency)
+
+    def execute(self, query, args=None):
+        self._wait()
+        self._cur = self._conn.execute(self._sql(query), args or ())
+        self.lastrowid = self._cur.lastrowid
+        self.rowcount = self._cur.rowcount
+        return self.rowcount
+
+    def executemany(self, query, args):
+        # pymysql sends one multi-row statement, so one round trip
+        args = list(args)
+        if not args:
+            return 0
+        self._wait()
+        # Inside a transaction() the caller commits
+        own = not self._conn.in_transaction
+        if own:
+            self._conn.execute("BEGIN")
+        try:
+            self._cur = self._conn.executemany(self._sql(query), args)
+            last = self._conn.execute("SELECT last_insert_rowid()").fetchone()
+            if own:
+                self._conn.execute("COMMIT")
+        except BaseException:
+            if own:
+                self._conn.execute("ROLLBACK")
+            raise
+        self.rowcount = self._cur.rowcount
+        if query.lstrip().upper().startswith("INSERT"):
+            self.lastrowid = last[0] - len(args) + 1
+        return self.rowcount
+
+    def fetchone(self):
+        row = self._cur.fetchone()
+        return dict(row) if row is not None else None
+
+    def fetchmany(self, size=1):
+        return [dict(row) for row in self._cur.fetchmany(size)]
+
+    def fetchall(self):
+        return [dict(row) for row in self._cur.fetchall()]
+
+
+# ----------------------
+# MongoDB
+# ----------------------
+class StandInMongo:
+    """A MongoDB database; collections are created on first access."""
+
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self.client = self
+        self._collections = {}
+        self._lock = threading.Lock()
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    def __getitem__(self, name):
+        with self._lock:
+            if name not in self._collections:
+                self._collections[name] = StandInCollection(self.latency)
+            return self._collections[name]
+
+    def close(self):
+        pass
+
+
+def _copy(doc):
+    # Values are strings, numbers or one level of dicts (translations)
+    return {
+        key: dict(value) if isinstance(value, dict) else value
+        for key, value in doc.items()
+    }
+
+
+def _matches(doc, query):
+    for field, expected in query.items():
+        value = doc.get(field)
+        if not isinstance(expected, dict):
+            if value != expected:
+                return False
+            continue
+        if "$in" in expected and value not in expected["$in"]:
+            return False
+        if "$gte" in expected and not (
+                value is not None and value >= expected["$gte"]):
+            return False
+        if "$lte" in expected and not (
+                value is not None and value <= expected["$lte"]):
+            return False
+    return True
+
+
+def _path(value, path):
+    for key in path:
+        value = value.get(key) if isinstance(value, dict) else None
+    return value
+
+
+def _evaluate(expr, doc, variables=None):
+    # The few aggregation operators DatabaseService's projections use
+    if isinstance(expr, str) and expr.startswith("$$"):
+        name, *path = expr[2:].split(".")
+        return _path((variables or {}).get(name), path)
+    if isinstance(expr, str) and expr.startswith("$"):
+        return _path(doc, expr[1:].split("."))
+    if not isinstance(expr, dict) or len(expr) != 1:
+        return expr
+    op, arg = next(iter(expr.items()))
+    if op == "$ifNull":
+        value = _evaluate(arg[0], doc, variables)
+        return value if value is not None else _evaluate(arg[1], doc)
+    if op == "$objectToArray":
+        value = _evaluate(arg, doc, variables)
+        return [{"k": k, "v": v} for k, v in value.items()]
+    if op == "$map":
+        items = _evaluate(arg["input"], doc, variables) or []
+        return [
+            _evaluate(arg["in"], doc, dict(variables or {}, **{arg["as"]: i}))
+            for i in items
+        ]
+    raise NotImplementedError(op)
+
+
+def _project(doc, projection):
+    if not projection:
+        return _copy(doc)
+    result = {"_id": doc["_id"]}
+    for field, spec in projection.items():
+        if spec is True or spec == 1:
+            *parents, last = field.split(".")
+            source = _path(doc, parents)
+            if isinstance(source, dict) and last in source:
+                target = result
+                for key in parents:
+                    target = target.setdefault(key, {})
+                target[last] = source[last]
+        elif spec:
+            result[field] = _evaluate(spec, doc)
+    return _copy(result)
+
+
+def _apply(doc, update):
+    for path, value in update.get("$set", {}).items():
+        *parents, last = path.split(".")
+        target = doc
+        for key in parents:
+            target = target.setdefault(key, {})
+        target[last] = value
+    for path in update.get("$unset", {}):
+        *parents, last = path.split(".")
+        target = doc
+        for key in parents:
+            target = target.get(key)
+            if not isinstance(target, dict):
+                break
+        else:
+            target.pop(last, None)
+
+
+class StandInCollection:
+    def __init__(self, latency=0.0):
+        self.latency = latency
+        self._docs = {}
+        self._lock = threading.Lock()
+
+    def _wait(self):
+        if self.latency:
+            time.sleep(self.latency)
+
+    def _select(self, query):
+        query = query or {}
+        doc_id = query.get("_id")
+        if doc_id is not None and not isinstance(doc_id, dict):
+            doc = self._docs.get(doc_id)
+            return [doc] if doc is not None and _matches(doc, query) else []
+        if isinstance(doc_id, dict) and len(query) == 1:
+            found = (self._docs.get(i) for i in doc_id.get("$in", ()))
+            return [doc for doc in found if doc is not None]
+        return [doc for doc in self._docs.values() if _matches(doc, query)]
+
+    def _update(self, query, update, upsert):
+        docs = self._select(query)
+        if docs:
+            _apply(docs[0], update)
+            return docs[0]
+        if upsert:
+            doc = {"_id": query["_id"]}
+            _apply(doc, update)
+            self._docs[doc["_id"]] = doc
+        return None
+
+    def find_one(self, query=None, projection=None):
+        self._wait()
+        with self._lock:
+            docs = self._select(query)
+            return _project(docs[0], projection) if docs else None
+
+    def find(self, query=None, projection=None, batch_size=None):
+        self._wait()
+        with self._lock:
+            docs = self._select(query)
+            return _StandInCursor(
+                [_project(doc, projection) for doc in docs], docs
+            )
+
+    def update_one(self, query, update, upsert=False):
+        self._wait()
+        with self._lock:
+            self._update(query, update, upsert)
+
+    def find_one_and_update(self, query, update, upsert=False):
+        self._wait()
+        with self._lock:
+            docs = self._select(query)
+            before = _copy(docs[0]) if docs else None
+            self._update(query, update, upsert)
+            return before
+
+    def bulk_write(self, requests, ordered=True):
+        # pymongo.UpdateOne keeps its arguments in these attributes
+        self._wait()
+        with self._lock:
+            for request in requests:
+                self._update(request._filter, request._doc, request._upsert)
+
+    def insert_one(self, doc):
+        self._wait()
+        with self._lock:
+            self._docs[doc["_id"]] = _copy(doc)
+
+    def delete_one(self, query):
+        self._wait()
+        with self._lock:
+            for doc in self._select(query)[:1]:
+                del self._docs[doc["_id"]]
+
+    def delete_many(self, query):
+        self._wait()
+        with self._lock:
+            for doc in self._select(query):
+                del self._docs[doc["_id"]]
+
+    def create_index(self, keys, **kwargs):
+        return keys
+
+    def estimated_document_count(self):
+        return len(self._docs)
+
+    def count_documents(self, query):
+        with self._lock:
+            return len(self._select(query))
+
+
+class _StandInCursor:
+    def __init__(self, docs, sort_keys):
+        self._docs = docs
+        # Full documents, so sort() can use fields left out by projection
+        self._sort_keys = sort_keys
+
+    def sort(self, key, direction=1):
+        order = sorted(
+            range(len(self._docs)),
+            key=lambda i: self._sort_keys[i].get(key),
+            reverse=direction < 0,
+        )
+        self._docs = [self._docs[i] for i in order]
+        self._sort_keys = [self._sort_keys[i] for i in order]
+        return self
+
+    def limit(self, count):
+        if count:
+            self._docs = self._docs[:count]
+            self._sort_keys = self._sort_keys[:count]
+        return self
+
+    def __iter__(self):
+        return iter(self._docs)
@@ -0,0 +1,92 @@
+"""Measures how long the app takes to start.
+
+Each run uses a fresh interpreter, so module caches do not hide import
+costs. Reports the median of --runs runs, in milliseconds:
+
+    import_ms   importing app.ui.main_window
+    db_ms       constructing DatabaseService (should not wait on servers)
+    window_ms   building MainWindow and drawing it (needs a display)
+
+Usage:
+    python benchmarks/startup_time.py [--runs 5] [--json out.json]
+                                      [--max-import-ms 400]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must not be imported with the main window
+LAZY_MODULES = ("deep_translator", "arabic_reshaper", "bidi", "pymongo")
+
+PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import app.ui.main_window as mw
+imported = time.perf_counter()
+eager = [m for m in %r if m in sys.modules]
+from app.services.database import DatabaseService
+DatabaseService()
+connected = time.perf_counter()
+result = {
+    "import_ms": (imported - start) * 1000,
+    "db_ms": (connected - imported) * 1000,
+    "window_ms": None,
+    "eager": eager,
+}
+try:
+    t = time.perf_counter()
+    window = mw.MainWindow()
+    window.update()
+    result["window_ms"] = (time.perf_counter() - t) * 1000
+    window.destroy()
+except Exception as e:
+    result["window_error"] = str(e).splitlines()[0]
+print(json.dumps(result))
+""" % (LAZY_MODULES,)
+
+
+def run_once():
+    out = subprocess.run(
+        [sys.executable, "-c", PROBE],
+        cwd=ROOT, capture_output=True, text=True, check=True,
+    ).stdout
+    return json.loads(out.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--json", help="also write the result to this file")
+    parser.add_argument(
+        "--max-import-ms", type=float,
+        help="exit with status 1 when the median import time exceeds it",
+    )
+    args = parser.parse_args(argv)
+
+    runs = [run_once() for _ in range(args.runs)]
+    summary = {"runs": args.runs}
+    for key in ("import_ms", "db_ms", "window_ms"):
+        values = [r[key] for r in runs if r[key] is not None]
+        summary[key] = round(statistics.median(values), 1) if values else None
+    summary["eager_imports"] = sorted({m for r in runs for m in r["eager"]})
+    if runs[0].get("window_error"):
+        summary["window_error"] = runs[0]["window_error"]
+
+    print(json.dumps(summary, indent=2))
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(summary, f, indent=2)
+
+    failed = bool(summary["eager_imports"])
+    if args.max_import_ms is not None:
+        failed = failed or summary["import_ms"] > args.max_import_ms
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
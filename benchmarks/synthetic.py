@@ -0,0 +1,112 @@
+"""Synthetic journals for the benchmarks.
+
+Notes are written in a mix of languages, including right-to-left
+Arabic, carry several translations each, and every `large_every`-th note
+has a body of `large_size` characters. The same seed always produces
+the same journal, so runs on different commits compare like with like.
+"""
+import hashlib
+import random
+
+WORDS = {
+    "en": (
+        "the morning was quiet and I walked along the river thinking "
+        "about work family travel books music coffee rain city garden "
+        "friends dinner project meeting letter window evening train"
+    ).split(),
+    "fr": (
+        "le matin était calme et je marchais le long de la rivière en "
+        "pensant au travail famille voyage livres musique café pluie "
+        "ville jardin amis dîner projet réunion lettre fenêtre soir"
+    ).split(),
+    "es": (
+        "la mañana estaba tranquila y caminé por el río pensando en el "
+        "trabajo familia viaje libros música café lluvia ciudad jardín "
+        "amigos cena proyecto reunión carta ventana tarde tren"
+    ).split(),
+    "de": (
+        "der Morgen war ruhig und ich ging am Fluss entlang und dachte "
+        "an Arbeit Familie Reise Bücher Musik Kaffee Regen Stadt Garten "
+        "Freunde Abendessen Projekt Treffen Brief Fenster Abend Zug"
+    ).split(),
+    "ar": (
+        "كان الصباح هادئا ومشيت على طول النهر أفكر في العمل العائلة "
+        "السفر الكتب الموسيقى القهوة المطر المدينة الحديقة الأصدقاء "
+        "العشاء المشروع الاجتماع الرسالة النافذة المساء القطار"
+    ).split(),
+}
+LANGUAGES = tuple(WORDS)
+
+
+def _text(rng, lang, words):
+    sentences = []
+    while words > 0:
+        n = min(words, rng.randint(6, 18))
+        sentence = " ".join(rng.choices(WORDS[lang], k=n))
+        sentences.append(sentence[0].upper() + sentence[1:] + ".")
+        words -= n
+    return " ".join(sentences)
+
+
+def _large_text(rng, lang, size):
+    # Repeating a few generated paragraphs keeps 100k-note journals
+    # quick to generate while staying realistic for the parsers
+    paragraphs = [_text(rng, lang, 120) for _ in range(8)]
+    parts = []
+    length = 0
+    while length < size:
+        paragraph = rng.choice(paragraphs)
+        parts.append(paragraph)
+        length += len(paragraph) + 2
+    return "\n\n".join(parts)[:size]
+
+
+def generate_notes(count, seed=0, large_every=500, large_size=256 * 1024,
+                   body_words=(40, 400), max_translations=4,
+                   locked_every=50):
+    """Yields `count` notes in DatabaseService.save_batch's format."""
+    rng = random.Random(seed)
+    for i in range(count):
+        lang = rng.choice(LANGUAGES)
+        title = f"{_text(rng, lang, rng.randint(2, 6))[:-1]} #{i + 1}"
+        if large_every and i % large_every == large_every - 1:
+            body = _large_text(rng, lang, large_size)
+        else:
+            body = _text(rng, lang, rng.randint(*body_words))
+        others = [code for code in LANGUAGES if code != lang]
+        targets = rng.sample(others, rng.randint(0, max_translations))
+        translations = {
+            code: _text(rng, code, max(1, len(body) // 6))
+            if len(body) < 10000 else _large_text(rng, code, len(body))
+            for code in targets
+        }
+        password_hash = None
+        if locked_every and i % locked_every == 0:
+            password_hash = hashlib.sha256(str(i).encode()).hexdigest()
+        yield {
+            "title": title,
+            "type": "TEXT",
+            "password_hash": password_hash,
+            "file_path": None,
+            "body": body,
+            "translations": translations,
+        }
+
+
+def batches(notes, size):
+    batch = []
+    for note in notes:
+        batch.append(note)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def generate_titles(count, seed=0):
+    """Titles like generate_notes' ones, without generating bodies."""
+    rng = random.Random(seed)
+    for i in range(count):
+        lang = rng.choice(LANGUAGES)
+        yield f"{_text(rng, lang, rng.randint(2, 6))[:-1]} #{i + 1}"
@@ -0,0 +1,223 @@
+"""Batch journal operations without the GUI.
+
+Uses the same storage settings as the app (JOURNAL_* environment
+variables, see app/config.py). Progress and throughput go to stderr.
+
+    python cli.py export backup.jsonl.gz     whole journal to an archive
+    python cli.py import backup.csv          archive, or a folder of exports
+    python cli.py reindex                    rebuild the full-text index
+    python cli.py retranslate ar fr          add missing translations;
+                                             rerun to resume if interrupted
+    python cli.py resync                     pull in edited linked files
+"""
+import argparse
+import os
+import sys
+import time
+from app.models.features import MultilingualEntry
+from app.services.batch_jobs import LinkedFileResync, Retranslator
+from app.services.bulk_import import BulkImporter
+from app.services.database import DatabaseService
+from app.services.journal_archive import JournalArchive
+from app.services.search_index import DEFAULT_INDEX_PATH, SearchIndex
+from app.services.translation_cache import TranslationCache
+
+
+class Progress:
+    """One self-updating status line: count, failures and rate."""
+
+    def __init__(self, label, total=None, stream=None, interval=0.5):
+        self.label = label
+        self.total = total
+        self.stream = stream or sys.stderr
+        self.interval = interval
+        self.start = time.perf_counter()
+        self._last = 0.0
+
+    def line(self, done, failed=0):
+        elapsed = time.perf_counter() - self.start
+        rate = done / elapsed if elapsed > 0 else 0.0
+        count = f"{done}/{self.total}" if self.total else str(done)
+        text = f"{self.label}: {count} notes, {rate:.0f}/s"
+        if failed:
+            text += f", {failed} failed"
+        return text
+
+    def update(self, done, failed=0):
+        now = time.perf_counter()
+        if now - self._last >= self.interval:
+            self._last = now
+            self.stream.write("\r" + self.line(done, failed))
+            self.stream.flush()
+
+    def finish(self, done, failed=0):
+        elapsed = time.perf_counter() - self.start
+        self.stream.write(
+            "\r" + self.line(done, failed) + f" in {elapsed:.1f}s\n"
+        )
+        self.stream.flush()
+
+
+def connect():
+    db = DatabaseService()
+    db.wait_ready()
+    if db.connect_errors:
+        for error in db.connect_errors:
+            print(error, file=sys.stderr)
+        return None
+    return db
+
+
+def print_errors(errors, limit=20):
+    for where, message in errors[:limit]:
+        print(f"  {where}: {message}", file=sys.stderr)
+    if len(errors) > limit:
+        print(f"  ... and {len(errors) - limit} more", file=sys.stderr)
+
+
+# ----------------------
+# Commands
+# ----------------------
+def cmd_export(db, args):
+    progress = Progress("export", len(db.get_all_titles()))
+    count = JournalArchive(db, args.batch_size).export_to(
+        args.path, progress.update
+    )
+    progress.finish(count)
+    return 0
+
+
+def cmd_import(db, args):
+    progress = Progress("import")
+    if os.path.isdir(args.path):
+        report = BulkImporter(db, args.batch_size).run(
+            args.path,
+            lambda done, total, failed: progress.update(done, failed),
+        )
+    else:
+        report = JournalArchive(db, args.batch_size).import_from(
+            args.path, progress.update
+        )
+    progress.finish(report["total"], len(report["errors"]))
+    print_errors(report["errors"])
+    return 1 if report["errors"] else 0
+
+
+def cmd_reindex(db, args):
+    progress = Progress("reindex")
+    db.index = SearchIndex(args.index)
+    db.rebuild_search_index()
+    progress.finish(len(db.get_all_titles()))
+    return 0
+
+
+def parse_ids(spec):
+    """Note ids from "3,7,10-20"."""
+    ids = []
+    for part in spec.split(","):
+        first, _, last = part.strip().partition("-")
+        ids.extend(range(int(first), int(last or first) + 1))
+    return ids
+
+
+def cmd_retranslate(db, args):
+    MultilingualEntry.cache = TranslationCache(db.mongo)
+    ids = parse_ids(args.ids) if args.ids else None
+    # Same languages and options, same job: a rerun resumes it
+    job_id = Retranslator.job_id_for(
+        args.langs, args.ids or "all", not args.all, args.include_locked
+    )
+    if args.restart:
+        db.delete_checkpoint(job_id)
+    progress = Progress(
+        "retranslate", len(ids) if ids else len(db.get_all_titles())
+    )
+    report = Retranslator(
+        db, args.langs, args.batch_size, args.workers,
+        only_missing=not args.all, include_locked=args.include_locked,
+        ids=ids, job_id=job_id,
+        rate_limit=args.rate or float(db.config["translate_rate"]) or None,
+    ).run(progress.update)
+    if report["resumed_after"]:
+        print(f"Resumed after note {report['resumed_after']}",
+              file=sys.stderr)
+    progress.finish(report["total"], len(report["errors"]))
+    print(f"{report['updated']} notes updated "
+          f"in {report['requests']} requests")
+    print_errors(report["errors"])
+    return 1 if report["errors"] else 0
+
+
+def cmd_resync(db, args):
+    progress = Progress("resync")
+    report = LinkedFileResync(db, args.batch_size, args.workers).run(
+        progress.update
+    )
+    progress.finish(report["total"], len(report["errors"]))
+    print(f"{report['updated']} notes updated")
+    print_errors(report["errors"])
+    return 1 if report["errors"] else 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=500,
+                        help="notes per database round trip")
+    parser.add_argument("--index", default=DEFAULT_INDEX_PATH,
+                        help="search index kept up to date by writes")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser(
+        "export", help="write every note to a .csv/.jsonl(.gz) archive"
+    )
+    export.add_argument("path")
+    export.set_defaults(run=cmd_export)
+
+    restore = commands.add_parser(
+        "import", help="add the notes of an archive or export folder"
+    )
+    restore.add_argument("path")
+    restore.set_defaults(run=cmd_import)
+
+    reindex = commands.add_parser("reindex", help="rebuild the search index")
+    reindex.set_defaults(run=cmd_reindex)
+
+    retranslate = commands.add_parser(
+        "retranslate", help="translate notes into the given languages"
+    )
+    retranslate.add_argument("langs", nargs="+", metavar="LANG")
+    retranslate.add_argument("--all", action="store_true",
+                             help="also redo languages a note already has")
+    retranslate.add_argument("--include-locked", action="store_true",
+                             help="also send password-protected notes")
+    retranslate.add_argument("--workers", type=int, default=8)
+    retranslate.add_argument("--ids",
+                             help="only these notes, e.g. 3,7,10-20")
+    retranslate.add_argument("--rate", type=float,
+                             help="at most this many requests a second "
+                                  "(default: JOURNAL_TRANSLATE_RATE)")
+    retranslate.add_argument("--restart", action="store_true",
+                             help="ignore the progress of an earlier run")
+    retranslate.set_defaults(run=cmd_retranslate)
+
+    resync = commands.add_parser(
+        "resync", help="re-import linked files that changed on disk"
+    )
+    resync.add_argument("--workers", type=int)
+    resync.set_defaults(run=cmd_resync)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    db = connect()
+    if db is None:
+        return 2
+    if args.command in ("import", "retranslate", "resync"):
+        # Writes made here must show up in the app's search results
+        db.open_search_index(args.index)
+    return args.run(db, args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,10 @@
+import os
+import tempfile
+
+# Run the suite on the embedded SQLite backend so no MySQL or MongoDB
+# server is needed; export JOURNAL_BACKEND=mysql to test against servers.
+os.environ.setdefault("JOURNAL_BACKEND", "sqlite")
+os.environ.setdefault(
+    "JOURNAL_SQLITE_PATH",
+    os.path.join(tempfile.mkdtemp(prefix="journal-tests-"), "journal.db"),
+)
@@ -0,0 +1,208 @@
+from benchmarks.journal_suite import compare, run_suite
+from benchmarks.standins import StandInMongo, StandInMySQL
+from benchmarks.synthetic import generate_notes
+
+
+class TestStandIns:
+    @staticmethod
+    def make_backend(tmp_path):
+        from app.services.backends.mysql_mongo import MySQLMongoBackend
+        backend = MySQLMongoBackend(
+            mysql=StandInMySQL(str(tmp_path / "mysql.db")),
+            mongo=StandInMongo(),
+        )
+        backend.migrate()
+        return backend
+
+    def test_server_backend_round_trip(self, tmp_path):
+        """Test MySQLMongoBackend runs unchanged on the stand-ins."""
+        backend = self.make_backend(tmp_path)
+        notes = list(generate_notes(5, seed=1, large_every=0))
+        notes[2]["title"] = "100%_done"
+
+        ids = backend.save_batch(notes)
+        backend.update_content(ids[0], translations={"it": "Ciao"},
+                               removed=list(notes[0]["translations"]))
+
+        assert ids == [1, 2, 3, 4, 5]
+        assert backend.get_titles_page(0, 10, "%_") == [
+            {"id": 3, "title": "100%_done"}
+        ]
+        assert backend.get_full_note(ids[0])["translations"] == {
+            "it": "Ciao"
+        }
+        assert backend.get_content(ids[0], ["it", "xx"]) == {
+            "body": notes[0]["body"], "languages": ["it"],
+            "translations": {"it": "Ciao"},
+        }
+        assert backend.get_content(ids[1])["languages"] == sorted(
+            notes[1]["translations"]
+        )
+        assert backend.get_translations(ids[1], ["xx"]) == {}
+        streamed = list(backend.iter_notes(batch_size=2))
+        assert [n["body"] for n in streamed] == [n["body"] for n in notes]
+        assert backend.list_notes("recent", limit=1)[0]["id"] == ids[0]
+        assert [r["id"] for r in backend.list_notes(lang="it")] == [ids[0]]
+        assert backend.list_notes("title", query="100%_")[0]["word_count"] \
+            == len(notes[2]["body"].split())
+
+    def test_server_backend_bulk_operations(self, tmp_path):
+        """Test selections are handled with one statement per store."""
+        backend = self.make_backend(tmp_path)
+        ids = backend.save_batch([
+            {"title": f"N{i}", "body": f"b{i}"} for i in range(4)
+        ])
+
+        backend.update_translations({ids[0]: {"fr": "x"}, ids[1]: {"ar": "y"}})
+        backend.set_password_hash(ids[:2], "ab" * 32)
+        backend.delete_notes(ids[2:])
+
+        notes = backend.get_notes(ids)
+        assert [n["translations"] for n in notes] == [{"fr": "x"},
+                                                      {"ar": "y"}]
+        assert {n["password_hash"] for n in notes} == {"ab" * 32}
+        assert backend.get_languages() == ["ar", "fr"]
+        assert backend.mongo.entries.find_one({"_id": str(ids[3])}) is None
+
+    def test_batch_ids_survive_interleaved_inserts(self, tmp_path,
+                                                   mocker):
+        """Test each note's content lands on the id its row was given."""
+        from benchmarks.standins import _Cursor
+        backend = self.make_backend(tmp_path)
+        execute = _Cursor.execute
+
+        def interleaved(cur, query, args=None):
+            if query.startswith("INSERT INTO entries"):
+                # Another client takes the next id first
+                execute(cur, "INSERT INTO entries (title) VALUES ('x')")
+            return execute(cur, query, args)
+
+        mocker.patch.object(_Cursor, "execute", interleaved)
+        ids = backend.save_batch([{"title": f"N{i}", "body": f"b{i}"}
+                                  for i in range(3)])
+
+        assert ids == [2, 4, 6]
+        assert [backend.get_full_note(i)["body"] for i in ids] == [
+            "b0", "b1", "b2"
+        ]
+
+    def test_job_checkpoints_live_in_mongo(self, tmp_path):
+        """Test job progress is saved in MongoDB and can be dropped."""
+        backend = self.make_backend(tmp_path)
+
+        backend.save_checkpoint("job", {"last_id": 7})
+        backend.save_checkpoint("job", {"last_id": 9})
+
+        assert backend.get_checkpoint("job") == {"last_id": 9}
+        assert backend.mongo.job_checkpoints.count_documents({}) == 1
+        backend.delete_checkpoint("job")
+        assert backend.get_checkpoint("job") is None
+
+    def test_large_texts_are_compressed_in_mongo(self, tmp_path):
+        """Test long bodies are stored compressed and read back as text."""
+        from app.services.backends.mysql_mongo import MySQLMongoBackend
+        backend = MySQLMongoBackend(
+            config={"compression": "zlib", "compression_threshold": "100"},
+            mysql=StandInMySQL(str(tmp_path / "mysql.db")),
+            mongo=StandInMongo(),
+        )
+        backend.migrate()
+        body, french = "line of a log\n" * 50, "une ligne\n" * 50
+        backend.mongo.entries.insert_one({"_id": "9", "body": body})
+
+        [note_id] = backend.save_batch(
+            [{"title": "Log", "body": body, "translations": {"fr": "court"}}]
+        )
+        backend.update_translations({note_id: {"fr": french}})
+
+        stored = backend.mongo.entries.find_one({"_id": str(note_id)})
+        assert stored["body"]["codec"] == "zlib"
+        assert len(stored["body"]["data"]) < len(body)
+        assert backend.get_full_note(note_id)["body"] == body
+        assert backend.get_content(note_id, ["fr"])["translations"] == {
+            "fr": french
+        }
+        assert backend.get_translations(note_id, ["fr"]) == {"fr": french}
+        assert [n["body"] for n in backend.iter_notes()] == [body]
+        assert backend.get_full_note(9)["body"] == body
+
+    def test_revisions_live_in_mongo(self, tmp_path):
+        """Test revision chains are read from MongoDB's revisions."""
+        from app.services.revisions import RevisionLog
+        backend = self.make_backend(tmp_path)
+        log = RevisionLog(backend, snapshot_every=2)
+        bodies = ["first draft\n" * 20, "first draft\n" * 20 + "more\n",
+                  "second draft\n" * 20]
+
+        for body in bodies:
+            log.record(4, body)
+
+        assert [r["snapshot"] for r in backend.get_revisions(4)] == [
+            True, False, True
+        ]
+        assert [log.get(4, n) for n in (1, 2, 3)] == bodies
+        backend.delete_note(4)
+        assert backend.mongo.revisions.count_documents({}) == 0
+
+    def test_migration_backfills_listing_columns(self, tmp_path):
+        """Test old rows get word counts and languages from MongoDB."""
+        from app.services.backends.mysql_mongo import MySQLMongoBackend
+        mysql, mongo = StandInMySQL(str(tmp_path / "old.db")), StandInMongo()
+        with mysql.cursor() as cur:
+            cur.execute("INSERT INTO entries (title) VALUES (%s)", ("Old",))
+        mongo.entries.insert_one(
+            {"_id": "1", "body": "two words", "translations": {"fr": "x"}}
+        )
+        backend = MySQLMongoBackend(mysql=mysql, mongo=mongo)
+
+        backend.migrate()
+        backend.migrate()
+
+        [row] = backend.list_notes(lang="fr")
+        assert (row["title"], row["word_count"]) == ("Old", 2)
+        assert backend.get_languages() == ["fr"]
+
+    def test_synthetic_journal_is_reproducible(self):
+        """Test a seed always yields the same mixed-language journal."""
+        first = list(generate_notes(30, seed=4, large_every=10,
+                                    large_size=5000))
+        again = list(generate_notes(30, seed=4, large_every=10,
+                                    large_size=5000))
+
+        assert first == again
+        assert len(first[9]["body"]) == 5000
+        assert any(
+            "؀" <= ch <= "ۿ"
+            for n in first for ch in n["title"] + n["body"]
+        )
+
+
+class TestJournalSuite:
+    def test_runs_every_benchmark_and_restores_service(self, mocker):
+        """Test a tiny run times every operation and leaves db intact."""
+        from app.services.database import DatabaseService
+        mocker.patch.object(DatabaseService, "_init_connections")
+        db = DatabaseService()
+        backend, index = db.backend, db.index
+
+        results = run_suite(db, notes=60, repeat=1)
+
+        assert db.backend is backend and db.index is index
+        for name in ("get_all_titles", "list_refresh", "search",
+                     "load_note_cold", "save_flow_body", "import_csv",
+                     "export_txt", "translate_cached"):
+            assert results[name]["median_ms"] >= 0
+
+    def test_compare_flags_slow_medians(self):
+        """Test only medians beyond the tolerance count as regressions."""
+        def report(**medians):
+            return {"results": {
+                name: {"median_ms": ms} for name, ms in medians.items()
+            }}
+
+        rows = compare(report(a=12.0, b=20.0, c=1.0),
+                       report(a=10.0, b=10.0), tolerance=0.25)
+
+        assert [(name, regressed) for name, *_, regressed in rows] == [
+            ("a", False), ("b", True)
+        ]
@@ -0,0 +1,246 @@
+import json
+import os
+import subprocess
+import sys
+import pytest
+from app.services.backends import SQLiteBackend
+from app.services.batch_jobs import (
+    BulkActions, LinkedFileResync, Retranslator,
+)
+from app.services.file_manager import FileManager
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class FakeTranslator:
+    """Tags each line with the language; markup lines come back as is."""
+    calls = []
+
+    def __init__(self, source="auto", target="en"):
+        self.target = target
+
+    def translate(self, text):
+        FakeTranslator.calls.append(text)
+        if "fail" in text:
+            raise ConnectionError("offline")
+        return "\n".join(
+            line if line.startswith("[[") else f"[{self.target}] {line}"
+            for line in text.split("\n")
+        )
+
+
+@pytest.fixture
+def backend():
+    backend = SQLiteBackend(":memory:")
+    backend.connect(pytest.fail)
+    return backend
+
+
+@pytest.fixture
+def translator(mocker):
+    from app.models.features import MultilingualEntry
+    FakeTranslator.calls = []
+    mocker.patch("app.models.features.GoogleTranslator", FakeTranslator)
+    mocker.patch.object(MultilingualEntry, "cache", None)
+
+
+class TestRetranslator:
+    def test_adds_only_missing_languages(self, backend, translator):
+        """Test missing languages are added; locked notes are skipped."""
+        ids = backend.save_batch([
+            {"title": "A", "body": "Hello"},
+            {"title": "B", "body": "Salut", "translations": {"fr": "Salut"}},
+            {"title": "C", "body": "Secret", "password_hash": "ab" * 32},
+            {"title": "D", "body": "please fail"},
+        ])
+
+        report = Retranslator(backend, ["fr", "es"], batch_size=2,
+                              workers=2).run()
+
+        assert report["total"] == 4 and report["updated"] == 2
+        assert backend.get_full_note(ids[0])["translations"] == {
+            "fr": "[fr] Hello", "es": "[es] Hello"
+        }
+        assert backend.get_full_note(ids[1])["translations"] == {
+            "fr": "Salut", "es": "[es] Salut"
+        }
+        assert backend.get_full_note(ids[2])["translations"] == {}
+        assert sorted(report["errors"]) == [
+            (ids[3], "translation to 'es' failed"),
+            (ids[3], "translation to 'fr' failed"),
+        ]
+
+    def test_batches_requests_and_resumes(self, backend, translator):
+        """Test a cancelled job resumes from its checkpoint."""
+        import threading
+        ids = backend.save_batch(
+            [{"title": f"N{i}", "body": f"Note {i}"} for i in range(6)]
+        )
+        cancel = threading.Event()
+        job = Retranslator(backend, ["fr"], batch_size=2, workers=2,
+                           job_id="fr-job")
+
+        first = job.run(lambda done, failed: cancel.set(), cancel)
+        checkpoint = backend.get_checkpoint("fr-job")
+        second = job.run()
+
+        assert (first["total"], first["requests"]) == (2, 1)
+        assert checkpoint["last_id"] == ids[1] and checkpoint["done"] == 2
+        assert second["resumed_after"] == ids[1]
+        assert (second["total"], second["updated"]) == (4, 4)
+        assert len(FakeTranslator.calls) == 3
+        assert backend.get_checkpoint("fr-job") is None
+        assert backend.get_full_note(ids[5])["translations"] == {
+            "fr": "[fr] Note 5"
+        }
+
+    def test_rate_limit_spaces_requests(self):
+        """Test requests are spread out to the configured rate."""
+        import time
+        from app.services.batch_translation import RateLimiter
+        limiter = RateLimiter(per_second=50)
+
+        start = time.monotonic()
+        for _ in range(6):
+            limiter.wait()
+
+        assert time.monotonic() - start >= 0.09
+
+
+class TestLinkedFileResync:
+    def test_updates_changed_files_only(self, backend, tmp_path):
+        """Test edited files are pulled in and missing ones reported."""
+        paths = [str(tmp_path / f"n{i}.txt") for i in range(3)]
+        for path in paths:
+            FileManager.export_to_txt(path, "Same", "Body", {})
+        ids = backend.save_batch([
+            {"title": "Same", "body": "Body", "file_path": path}
+            for path in paths
+        ])
+        FileManager.export_to_txt(paths[1], "Edited", "New body", {"fr": "x"})
+        os.unlink(paths[2])
+
+        report = LinkedFileResync(backend, batch_size=2, workers=2).run()
+
+        assert report["total"] == 3 and report["updated"] == 1
+        assert backend.get_metadata(ids[1])["title"] == "Edited"
+        assert backend.get_full_note(ids[1])["translations"] == {"fr": "x"}
+        assert [path for path, _ in report["errors"]] == [paths[2]]
+
+
+class TestBulkActions:
+    def test_skips_locked_notes_and_stops_on_cancel(self, backend, tmp_path):
+        """Test selections run in batches and locked notes are reported."""
+        import threading
+        ids = backend.save_batch(
+            [{"title": f"N/{i}", "body": "Hi"} for i in range(5)]
+            + [{"title": "Locked", "body": "x", "password_hash": "ab" * 32}]
+        )
+        progress = []
+
+        exported = BulkActions(backend, ids, batch_size=2).export(
+            str(tmp_path), lambda done, failed: progress.append(done)
+        )
+        cancel = threading.Event()
+        cancel.set()
+        deleted = BulkActions(backend, ids, batch_size=2).delete(
+            cancel=cancel
+        )
+
+        assert progress == [2, 4, 6]
+        assert exported["updated"] == 5
+        assert exported["errors"] == [
+            (ids[5], "Password-protected; left as is")
+        ]
+        assert sorted(os.listdir(tmp_path))[0] == f"{ids[0]}-N_0.txt"
+        assert FileManager.import_from_file(
+            str(tmp_path / f"{ids[0]}-N_0.txt")
+        ) == ("N/0", "Hi", {})
+        assert deleted["total"] == 2
+        assert len(backend.get_all_titles()) == 4
+
+    def test_failed_exports_are_reported(self, backend, tmp_path, mocker):
+        """Test a file export_to_txt could not write is not counted."""
+        ids = backend.save_batch([{"title": "A", "body": "x"},
+                                  {"title": "B", "body": "y"}])
+        mocker.patch.object(FileManager, "export_to_txt",
+                            side_effect=[True, False])
+
+        report = BulkActions(backend, ids).export(str(tmp_path))
+
+        assert report["updated"] == 1
+        assert report["errors"] == [
+            (ids[1], f"Could not write {ids[1]}-B.txt")
+        ]
+
+    def test_translates_only_the_selection(self, backend, translator):
+        """Test translations are added to the picked notes alone."""
+        ids = backend.save_batch([{"title": "A", "body": "Hello"},
+                                  {"title": "B", "body": "Other"}])
+
+        report = BulkActions(backend, ids[:1]).translate(["fr"], workers=2)
+
+        assert report["updated"] == 1
+        assert backend.get_full_note(ids[0])["translations"] == {
+            "fr": "[fr] Hello"
+        }
+        assert backend.get_full_note(ids[1])["translations"] == {}
+
+    def test_translation_keeps_the_rate_limit(self, backend, translator,
+                                              monkeypatch):
+        """Test a selection is translated through the same RateLimiter."""
+        from app.services import batch_jobs
+        rates = []
+
+        class Limiter(batch_jobs.RateLimiter):
+            def __init__(self, per_second):
+                rates.append(per_second)
+                super().__init__(per_second)
+
+        monkeypatch.setattr(batch_jobs, "RateLimiter", Limiter)
+        ids = backend.save_batch([{"title": "A", "body": "Hello"}])
+
+        BulkActions(backend, ids).translate(["fr"], workers=2,
+                                            rate_limit=500)
+
+        assert rates == [500]
+
+
+class TestCli:
+    @pytest.fixture
+    def db(self, backend):
+        from app.services.database import DatabaseService
+        db = DatabaseService()
+        previous = db.backend, db.index
+        db.use_backend(backend)
+        yield db
+        db.use_backend(previous[0])
+        db.index = previous[1]
+
+    def test_export_and_retranslate(self, db, tmp_path, translator, capsys):
+        """Test commands run headless and report throughput."""
+        import cli
+        db.save_batch([{"title": f"N{i}", "body": "Hi"} for i in range(5)])
+        index = str(tmp_path / "index.db")
+        archive = tmp_path / "all.jsonl"
+
+        assert cli.main(["--index", index, "export", str(archive)]) == 0
+        assert cli.main(["--index", index, "retranslate", "ar"]) == 0
+
+        rows = [json.loads(line) for line in archive.read_text().split("\n")
+                if line]
+        assert [r["title"] for r in rows] == [f"N{i}" for i in range(5)]
+        out, err = capsys.readouterr()
+        assert "5 notes updated" in out
+        assert "retranslate: 5/5 notes" in err and "/s in " in err
+        # The new translations ("[ar] Hi") reached the search index
+        assert len(db.search("ar")) == 5
+
+    def test_does_not_load_the_gui(self):
+        """Test importing the CLI pulls in no Tk module."""
+        out = subprocess.run(
+            [sys.executable, "-c",
+             "import sys, cli; print('tkinter' in sys.modules)"],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        ).stdout
+        assert out.strip() == "False"
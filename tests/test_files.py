@@ -1,6 +1,8 @@
 import pytest
 import tempfile
 import os
+import threading
+import time
 from app.services.file_manager import FileManager
 
 
@@ -104,6 +106,57 @@ class TestFileManager:
         with pytest.raises(Exception):
             FileManager.import_from_file("/nonexistent/file.txt")
 
+    def test_streams_body_in_bounded_chunks(self, tmp_path):
+        """Test a large body is read back in chunks of about chunk_size."""
+        body = "\n".join(f"Line {i} " + "x" * (i % 300) for i in range(3000))
+        body += "\n" + "-" * 20 + "\nnot the end"
+        for name, export in (("big.txt", FileManager.export_to_txt),
+                             ("big.csv", FileManager.export_to_csv)):
+            path = str(tmp_path / name)
+            export(path, "Big", body, {"fr": "Grand"})
+
+            with FileManager.open_entry(path, chunk_size=1000) as entry:
+                assert entry.title == "Big"
+                chunks = list(entry.body_chunks())
+                assert entry.translations == {"fr": "Grand"}
+
+            assert "".join(chunks) == body
+            assert len(chunks) > 100
+            assert max(len(c) for c in chunks) < 2000
+
+    @pytest.mark.parametrize("content, line, message", [
+        ("--- JOURNAL ENTRY ---\nTITLE: T\n----\n", 3, "expected"),
+        ("--- JOURNAL ENTRY ---\nTITLE: T\n" + "-" * 20 +
+         "\nCONTENT:\nBody\nmore\n", 6, "missing"),
+        ("--- JOURNAL ENTRY ---\nTITLE: T\n" + "-" * 20 +
+         "\nCONTENT:\nBody\n" + "-" * 20 +
+         "\nMETADATA_TRANSLATIONS:\n{\n\"fr\": oops}", 9, "JSON"),
+    ])
+    def test_malformed_txt_reports_line(self, tmp_path, content, line,
+                                        message):
+        """Test parse errors point at the offending line."""
+        from app.services.file_manager import FileParseError
+        path = tmp_path / "bad.txt"
+        path.write_text(content, encoding="utf-8")
+
+        with pytest.raises(FileParseError) as info:
+            FileManager.import_from_file(str(path))
+        assert info.value.line == line
+        assert message in str(info.value)
+
+    def test_malformed_csv_reports_line(self, tmp_path):
+        """Test an unterminated quote is reported where it starts."""
+        from app.services.file_manager import FileParseError
+        path = tmp_path / "bad.csv"
+        path.write_text(
+            'Title,Main_Body,Translations_JSON\r\nT,"open\nquote',
+            encoding="utf-8",
+        )
+
+        with pytest.raises(FileParseError, match="unterminated") as info:
+            FileManager.import_from_file(str(path))
+        assert info.value.line == 2
+
 
 class TestDatabaseIntegration:
     """Tests that integrate database and file operations."""
@@ -133,6 +186,1028 @@ class TestDatabaseIntegration:
 
         mock_mongo.entries.update_one.assert_called_once()
 
+    def test_titles_page_uses_keyset(self, mocker):
+        """Test list pages seek past the last id instead of offsetting."""
+        from app.services.database import DatabaseService
+        mocker.patch.object(DatabaseService, "_init_connections")
+        db = DatabaseService()
+        db.mysql = mocker.MagicMock()
+        cursor = db.mysql.cursor.return_value.__enter__.return_value
+        cursor.fetchall.return_value = [{"id": 51, "title": "Next"}]
+
+        rows = db.get_titles_page(after_id=50, limit=25, query="50%")
+
+        sql, params = cursor.execute.call_args[0]
+        assert "id > %s" in sql and "LIMIT %s" in sql
+        assert "OFFSET" not in sql
+        assert params == (50, "%50\\%%", 25)
+        assert rows == [{"id": 51, "title": "Next"}]
+
+    def test_saves_keep_search_index_current(self, mocker):
+        """Test save and delete hooks update the full-text index."""
+        from app.services.database import DatabaseService
+        from app.services.search_index import SearchIndex
+        mocker.patch.object(DatabaseService, "_init_connections")
+        db = DatabaseService()
+        db.mysql = mocker.MagicMock()
+        db.mongo = mocker.Mock()
+        cursor = db.mysql.cursor.return_value.__enter__.return_value
+        cursor.lastrowid = 7
+        db.index = SearchIndex(":memory:")
+        try:
+            note_id = db.save_metadata({
+                "title": "Holiday plans",
+                "type": "TEXT",
+                "password_hash": None,
+                "file_path": None,
+            })
+            db.save_content(note_id, "Pack sunscreen", {"fr": "Vacances"})
+
+            assert [h["id"] for h in db.search("sunscreen")] == [7]
+            assert [h["id"] for h in db.search("vacan")] == [7]
+
+            db.delete_note(note_id)
+            assert db.search("holiday") == []
+        finally:
+            db.index = None
+
+    def test_index_build_is_detached_and_catches_up(self, mocker,
+                                                    tmp_path):
+        """Test a first build leaves search free and replays saves."""
+        from app.services.backends import SQLiteBackend
+        from app.services.database import DatabaseService
+        mocker.patch.object(DatabaseService, "_init_connections")
+        db = DatabaseService()
+        previous = db.backend
+        backend = SQLiteBackend(":memory:")
+        backend.connect(pytest.fail)
+        db.use_backend(backend)
+        [old, gone] = backend.save_batch([
+            {"title": "Harbour", "body": "boats"},
+            {"title": "Gone", "body": "soon"},
+        ])
+        iter_contents = backend.iter_contents
+
+        def save_during_build(batch_size=500):
+            assert db.index is None and db.search("boats") == []
+            new = db.save_metadata({"title": "Dock", "type": "TEXT",
+                                    "password_hash": None,
+                                    "file_path": None})
+            db.save_content(new, "ropes")
+            db.delete_note(gone)
+            return iter_contents(batch_size)
+
+        mocker.patch.object(backend, "iter_contents", save_during_build)
+        try:
+            db.open_search_index(str(tmp_path / "index.db"))
+
+            assert [h["id"] for h in db.search("boats")] == [old]
+            assert [h["title"] for h in db.search("ropes")] == ["Dock"]
+            assert db.search("gone") == [] and db.search("soon") == []
+        finally:
+            db.index = None
+            db.use_backend(previous)
+
+    def test_rebuild_keeps_writes_made_as_it_detaches(self, mocker,
+                                                      tmp_path):
+        """Test a save landing right after the index is detached is
+        reindexed once the rebuild ends."""
+        from app.services.backends import SQLiteBackend
+        from app.services.database import DatabaseService
+        mocker.patch.object(DatabaseService, "_init_connections")
+        db = DatabaseService()
+        previous = db.backend
+        backend = SQLiteBackend(":memory:")
+        backend.connect(pytest.fail)
+        db.use_backend(backend)
+        build = db._build_index
+
+        def save_then_build(index):
+            new = db.save_metadata({"title": "Dock", "type": "TEXT",
+                                    "password_hash": None,
+                                    "file_path": None})
+            db.save_content(new, "ropes")
+            mocker.patch.object(backend, "iter_contents", lambda **k: [])
+            build(index)
+
+        try:
+            db.open_search_index(str(tmp_path / "index.db"))
+            mocker.patch.object(db, "_build_index", save_then_build)
+            db.rebuild_search_index()
+
+            assert [h["title"] for h in db.search("ropes")] == ["Dock"]
+        finally:
+            db.index = None
+            db.use_backend(previous)
+
+    def test_submit_runs_off_the_calling_thread(self, mocker):
+        """Test the async API returns a future resolved by a DB worker."""
+        import threading
+        from app.services.database import DatabaseService
+        mocker.patch.object(DatabaseService, "_init_connections")
+        db = DatabaseService()
+        db.mongo = mocker.Mock()
+        db.mongo.entries.find_one.side_effect = lambda query: {
+            "_id": query["_id"], "thread": threading.current_thread().name
+        }
+
+        doc = db.submit(db.get_full_note, 5).result(timeout=5)
+
+        assert doc["_id"] == "5"
+        assert doc["thread"].startswith("db")
+
+    def test_connects_in_background(self, mocker):
+        """Test both stores connect in parallel and queued work waits."""
+        from app.services.backends.mysql_mongo import MySQLMongoBackend
+        from app.services.database import DatabaseService
+
+        def slow(result):
+            def connect(self):
+                time.sleep(0.3)
+                return result
+            return connect
+
+        mocker.patch.object(MySQLMongoBackend, "_connect_mongo", slow(None))
+        mocker.patch.object(
+            MySQLMongoBackend, "_connect_mysql", slow("MySQL is down")
+        )
+        mocker.patch.object(DatabaseService, "_init_connections")
+        db = DatabaseService()
+        previous = db.backend
+        db.use_backend(MySQLMongoBackend())
+        try:
+            start = time.monotonic()
+            db.ready = db.fanout.submit(db._connect)
+            queued = db.submit(db.is_ready)
+
+            assert not db.is_ready()
+            assert db.ready.result(timeout=5) == ["MySQL is down"]
+            assert time.monotonic() - start < 0.55
+            assert queued.result(timeout=5) is True
+        finally:
+            db.ready = None
+            db.use_backend(previous)
+
+    def test_load_note_fetches_both_stores_and_caches(self, mocker):
+        """Test one load_note call combines stores and repeats cost no I/O."""
+        import threading
+        import time
+        from app.services.database import DatabaseService
+        mocker.patch.object(DatabaseService, "_init_connections")
+        db = DatabaseService()
+        db.note_cache.clear()
+        db.mysql = mocker.MagicMock()
+        db.mongo = mocker.Mock()
+        cursor = db.mysql.cursor.return_value.__enter__.return_value
+        both_running = threading.Barrier(2, timeout=2)
+
+        def fetch_meta():
+            both_running.wait()
+            return {"title": "T", "password_hash": None, "file_path": None}
+
+        def fetch_doc(query, projection):
+            both_running.wait()
+            assert "translations.es" in projection
+            assert "translations" not in projection
+            return {"body": "B", "languages": ["fr", "es"],
+                    "translations": {"es": "E"}}
+
+        cursor.fetchone.side_effect = fetch_meta
+        db.mongo.entries.find_one.side_effect = fetch_doc
+
+        start = time.monotonic()
+        note = db.load_note(9, ["es"])
+        assert time.monotonic() - start < 2
+        assert (note["title"], note["body"]) == ("T", "B")
+        assert note["languages"] == ["es", "fr"]
+
+        note["translations"]["fr"] = "mutated by the editor"
+        again = db.load_note(9, ["es"])
+        assert again["translations"] == {"es": "E"}
+        assert db.mongo.entries.find_one.call_count == 1
+        assert cursor.fetchone.call_count == 1
+
+        db.save_content(9, "New body", {})
+        cursor.fetchone.side_effect = None
+        cursor.fetchone.return_value = {
+            "title": "T", "password_hash": None, "file_path": None
+        }
+        db.mongo.entries.find_one.side_effect = None
+        db.mongo.entries.find_one.return_value = {"body": "New body"}
+        assert db.load_note(9)["body"] == "New body"
+        db.note_cache.clear()
+
+
+class TestPartialSave:
+    def test_mongo_sets_only_changed_keys(self, mocker):
+        """Test a partial save is one $set/$unset on the changed keys."""
+        from app.services.backends.mysql_mongo import MySQLMongoBackend
+        mongo = mocker.MagicMock()
+        backend = MySQLMongoBackend(mongo=mongo)
+
+        backend.update_content(7, translations={"fr": "Salut"},
+                               removed=["es"])
+
+        mongo.entries.update_one.assert_called_once_with(
+            {"_id": "7"},
+            {"$set": {"translations.fr": "Salut"},
+             "$unset": {"translations.es": ""}},
+            upsert=True,
+        )
+
+    def test_service_skips_empty_updates(self, mocker):
+        """Test nothing is written or invalidated when nothing changed."""
+        from app.services.database import DatabaseService
+        mocker.patch.object(DatabaseService, "_init_connections")
+        db = DatabaseService()
+        backend = mocker.Mock()
+        previous = db.backend
+        db.use_backend(backend)
+        try:
+            db.update_content(3, None, {}, [])
+            backend.update_content.assert_not_called()
+
+            db.update_content(3, "New body")
+            backend.update_content.assert_called_once_with(
+                3, "New body", None, ()
+            )
+        finally:
+            db.use_backend(previous)
+
+
+class TestNoteCache:
+    def test_evicts_by_bytes(self):
+        """Test the LRU drops the oldest notes once over its byte budget."""
+        from app.services.note_cache import NoteCache
+        cache = NoteCache(max_bytes=4000)
+        for i in range(3):
+            cache.put(i, {"body": "x" * 900})
+        cache.get(0)
+        cache.put(3, {"body": "x" * 900})
+
+        assert cache.get(1) is None
+        assert cache.get(0) is not None
+        assert cache.size <= 4000
+
+    def test_stale_load_is_not_cached(self):
+        """Test a load that raced an invalidation is discarded."""
+        from app.services.note_cache import NoteCache
+        cache = NoteCache()
+        generation = cache.generation(1)
+        cache.invalidate(1)
+        cache.put(1, {"body": "old"}, generation)
+        assert cache.get(1) is None
+
+
+class TestMySQLPool:
+    @staticmethod
+    def make_pool(mocker, **kwargs):
+        from app.services.pool import MySQLPool
+        created = []
+
+        def connect():
+            conn = mocker.MagicMock()
+            created.append(conn)
+            return conn
+        return MySQLPool(connect, **kwargs), created
+
+    def test_reuses_and_bounds_connections(self, mocker):
+        """Test borrowers share at most max_size connections."""
+        import threading
+        import time
+        pool, created = self.make_pool(mocker, max_size=2)
+        active = []
+        peak = []
+
+        def borrow():
+            with pool.connection():
+                active.append(1)
+                peak.append(len(active))
+                time.sleep(0.05)
+                active.pop()
+
+        threads = [threading.Thread(target=borrow) for _ in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        assert max(peak) <= 2
+        assert len(created) == 2
+        for conn in created:
+            conn.ping.assert_not_called()
+
+    def test_discards_broken_connections(self, mocker):
+        """Test a connection that failed at the socket level is dropped."""
+        import pymysql
+        pool, created = self.make_pool(mocker, max_size=1)
+
+        with pytest.raises(pymysql.err.OperationalError):
+            with pool.cursor():
+                raise pymysql.err.OperationalError(2013, "Lost connection")
+        with pool.cursor():
+            pass
+
+        assert len(created) == 2
+        created[0].close.assert_called_once()
+
+    def test_pings_only_stale_connections(self, mocker):
+        """Test idle connections are revalidated after ping_after."""
+        pool, created = self.make_pool(mocker, ping_after=0.0)
+        with pool.connection():
+            pass
+        with pool.connection():
+            pass
+        created[0].ping.assert_called_once_with(reconnect=True)
+
+
+class TestTextCodec:
+    @pytest.mark.parametrize("codec", ["zlib", "lzma"])
+    def test_round_trips_long_text(self, codec):
+        """Test long texts are compressed and decode to the same text."""
+        from app.services.compression import TextCodec
+        text = "Ligne de journal — ١٢٣ 😀\n" * 200
+
+        value = TextCodec(codec, threshold=1000).encode(text)
+
+        assert value["codec"] == codec and value["v"] == 1
+        assert TextCodec.decode(value) == text
+
+    def test_leaves_short_incompressible_and_plain_text(self):
+        """Test short or unshrinkable texts stay strings, as do old ones."""
+        from app.services.compression import TextCodec
+        codec = TextCodec("zlib", threshold=10)
+
+        assert codec.encode("short") == "short"
+        assert codec.encode("no repeats here") == "no repeats here"
+        assert TextCodec(None).encode("x" * 50000) == "x" * 50000
+        assert TextCodec.decode("plain") == "plain"
+        assert TextCodec.decode_all(None) == {}
+
+    def test_rejects_unknown_codecs(self):
+        """Test unknown settings and stored formats raise ValueError."""
+        from app.services.compression import TextCodec
+        with pytest.raises(ValueError):
+            TextCodec("brotli")
+        with pytest.raises(ValueError):
+            TextCodec.decode({"codec": "zlib", "v": 2, "data": b""})
+
+
+class TestSQLiteBackend:
+    @staticmethod
+    def make_backend(path=":memory:"):
+        from app.services.backends import SQLiteBackend
+        backend = SQLiteBackend(path)
+        backend.connect(pytest.fail)
+        return backend
+
+    def test_round_trips_metadata_and_content(self):
+        """Test one note's metadata, body and translations are stored."""
+        backend = self.make_backend()
+        note_id = backend.save_metadata({
+            "title": "Trip", "type": "TEXT",
+            "password_hash": None, "file_path": None,
+        })
+        backend.save_content(note_id, "Body", {"fr": "Corps"})
+        backend.save_content(note_id, "Body 2", {"es": "Cuerpo"})
+
+        assert backend.get_metadata(note_id)["title"] == "Trip"
+        assert backend.get_full_note(note_id) == {
+            "_id": str(note_id), "body": "Body 2",
+            "translations": {"es": "Cuerpo"},
+        }
+        backend.delete_note(note_id)
+        assert backend.get_metadata(note_id) is None
+        assert backend.get_full_note(note_id) is None
+
+    def test_batch_ids_and_pages(self):
+        """Test save_batch returns consecutive ids usable as a cursor."""
+        backend = self.make_backend()
+        backend.save_batch([{"title": "first", "body": "x"}])
+        backend.delete_note(1)
+        notes = [
+            {"title": f"Note {i}", "body": f"Body {i}",
+             "translations": {"fr": f"Corps {i}"}}
+            for i in range(5)
+        ]
+        notes.append({"title": "100%_done", "body": ""})
+
+        ids = backend.save_batch(notes)
+
+        assert ids == [2, 3, 4, 5, 6, 7]
+        page = backend.get_titles_page(after_id=3, limit=2)
+        assert [row["id"] for row in page] == [4, 5]
+        assert [r["title"] for r in backend.get_titles_page(query="%_")] \
+            == ["100%_done"]
+        docs = list(backend.iter_contents(batch_size=4))
+        assert [d["_id"] for d in docs] == [str(i) for i in ids]
+        assert docs[0]["translations"] == {"fr": "Corps 0"}
+
+    def test_partial_content_update(self):
+        """Test update_content leaves untouched fields as they were."""
+        backend = self.make_backend()
+        backend.save_content(1, "Body", {"fr": "Corps", "es": "Cuerpo"})
+
+        backend.update_content(1, translations={"ar": "نص"}, removed=["es"])
+
+        assert backend.get_full_note(1) == {
+            "_id": "1", "body": "Body",
+            "translations": {"fr": "Corps", "ar": "نص"},
+        }
+
+    def test_projected_loading(self, mocker):
+        """Test a note opens with its body and fetches languages on demand."""
+        from app.services.database import DatabaseService
+        mocker.patch.object(DatabaseService, "_init_connections")
+        db = DatabaseService()
+        previous = db.backend
+        db.use_backend(self.make_backend())
+        db.note_cache.clear()
+        try:
+            note_id = db.save_metadata({
+                "title": "Trip", "type": "TEXT",
+                "password_hash": None, "file_path": None,
+            })
+            db.save_content(note_id, "Body", {"fr": "Corps", "es": "Cuerpo"})
+            get_translations = mocker.spy(db.backend, "get_translations")
+
+            note = db.load_note(note_id)
+            assert (note["body"], note["languages"]) == ("Body", ["es", "fr"])
+            assert note["translations"] == {}
+            assert db.load_translations(note_id, ["fr"]) == {"fr": "Corps"}
+            assert db.load_note(note_id, ["fr"])["translations"] == {
+                "fr": "Corps"
+            }
+            assert db.load_note(note_id, ["es"])["translations"] == {
+                "fr": "Corps", "es": "Cuerpo"
+            }
+            assert get_translations.call_count == 2
+        finally:
+            db.note_cache.clear()
+            db.use_backend(previous)
+
+    def test_sorted_filtered_keyset_listing(self):
+        """Test list_notes pages by recency, title and language."""
+        backend = self.make_backend()
+        ids = backend.save_batch([
+            {"title": "Beta", "body": "one two three",
+             "translations": {"fr": "un"}},
+            {"title": "Alpha", "body": "one"},
+            {"title": "Gamma", "body": "", "translations": {"fr": "x"}},
+        ])
+        backend.update_content(ids[1], body="one two")
+        backend.update_content(ids[2], translations={"es": "y"})
+
+        def titles(**kwargs):
+            return [r["title"] for r in backend.list_notes(**kwargs)]
+
+        first = backend.list_notes("recent", limit=2)
+        assert [r["title"] for r in first] == ["Gamma", "Alpha"]
+        assert first[1]["word_count"] == 2
+        assert titles(sort="recent", after=first[-1]) == ["Beta"]
+        assert titles(sort="title", after=first[-1]) == ["Beta", "Gamma"]
+        assert titles(sort="id", query="mm") == ["Gamma"]
+        assert titles(sort="title", lang="fr") == ["Beta", "Gamma"]
+        assert backend.get_languages() == ["es", "fr"]
+
+    def test_pages_continue_after_an_edited_or_deleted_row(self):
+        """Test the next page follows the last row as it was listed."""
+        backend = self.make_backend()
+        ids = backend.save_batch([
+            {"title": f"Note {i}", "body": ""} for i in range(6)
+        ])
+        by_title = backend.list_notes("title", limit=3)
+        recent = backend.list_notes("recent", limit=2)
+
+        backend.update_content(recent[-1]["id"], body="moved to the top")
+        backend.delete_note(by_title[-1]["id"])
+
+        assert [r["title"] for r in backend.list_notes(
+            "title", after=by_title[-1], limit=3
+        )] == ["Note 3", "Note 4", "Note 5"]
+        assert [r["id"] for r in backend.list_notes(
+            "recent", after=recent[-1], limit=3
+        )] == [ids[3], ids[1], ids[0]]
+
+    def test_migrates_an_old_file(self, tmp_path):
+        """Test a journal from before the listing columns is upgraded."""
+        import sqlite3
+        from app.services.backends.sqlite import SCHEMA
+        path = str(tmp_path / "old.db")
+        conn = sqlite3.connect(path)
+        conn.executescript(SCHEMA)
+        conn.execute("INSERT INTO entries (title) VALUES ('Old')")
+        conn.execute("INSERT INTO contents VALUES (1, 'three old words')")
+        conn.commit()
+        conn.close()
+
+        backend = self.make_backend(path)
+        backend.migrate()
+
+        [row] = backend.list_notes()
+        assert row["word_count"] == 3 and row["created_at"]
+        version = backend._conn().execute("PRAGMA user_version")
+        assert version.fetchone()[0] == 1
+
+    def test_body_saved_from_chunks(self, mocker):
+        """Test a streamed body is stored and indexed as one text."""
+        from app.services.database import DatabaseService
+        from app.services.search_index import SearchIndex
+        mocker.patch.object(DatabaseService, "_init_connections")
+        db = DatabaseService()
+        previous = db.backend
+        db.use_backend(self.make_backend())
+        db.index = SearchIndex(":memory:")
+        try:
+            db.save_metadata({"title": "Dusk", "type": "TEXT",
+                              "password_hash": None, "file_path": None})
+            db.save_content_chunks(1, iter(["Light", "house at", " dusk"]))
+
+            assert db.get_full_note(1)["body"] == "Lighthouse at dusk"
+            assert db.list_notes()[0]["word_count"] == 3
+            assert [h["id"] for h in db.search("lighthouse")] == [1]
+        finally:
+            db.index = None
+            db.use_backend(previous)
+
+    def test_streamed_body_is_stored_as_chunk_rows(self):
+        """Test chunks are written once each and read back as one body."""
+        backend = self.make_backend()
+        [note_id] = backend.save_batch([{"title": "Log", "body": "old"}])
+
+        backend.save_content_chunks(note_id, iter(["a" * 10, "b", "c\n"]))
+
+        conn = backend._conn()
+        assert conn.execute(
+            "SELECT body FROM contents WHERE entry_id = ?", (note_id,)
+        ).fetchone()[0] == ""
+        body = "a" * 10 + "bc\n"
+        assert backend.get_full_note(note_id)["body"] == body
+        assert backend.get_content(note_id)["body"] == body
+        assert [n["body"] for n in backend.iter_notes()] == [body]
+        assert backend.get_notes([note_id])[0]["body"] == body
+        backend.update_content(note_id, body="edited")
+        assert backend.get_full_note(note_id)["body"] == "edited"
+        assert conn.execute(
+            "SELECT COUNT(*) FROM content_chunks"
+        ).fetchone()[0] == 0
+
+    def test_linked_files_and_batch_updates(self):
+        """Test linked notes are listed and rewritten in one batch."""
+        backend = self.make_backend()
+        ids = backend.save_batch([
+            {"title": "Plain", "body": "a"},
+            {"title": "Linked", "body": "b", "file_path": "/tmp/b.txt"},
+        ])
+
+        assert backend.get_linked_files() == [
+            {"id": ids[1], "file_path": "/tmp/b.txt"}
+        ]
+        backend.update_batch([{
+            "id": ids[1], "title": "Edited", "body": "c",
+            "translations": {"fr": "c"},
+        }])
+        assert backend.get_metadata(ids[1])["title"] == "Edited"
+        assert backend.get_full_note(ids[1])["translations"] == {"fr": "c"}
+
+    def test_bulk_operations(self):
+        """Test selections are read, translated, locked and deleted at once."""
+        backend = self.make_backend()
+        ids = backend.save_batch([
+            {"title": f"N{i}", "body": f"b{i}", "translations": {"fr": "x"}}
+            for i in range(4)
+        ])
+
+        assert [n["body"] for n in backend.get_notes([ids[2], ids[0], 99])] \
+            == ["b0", "b2"]
+        assert "body" not in backend.get_notes(ids[:1], content=False)[0]
+        backend.update_translations({ids[0]: {"ar": "y"}, ids[1]: {}})
+        backend.set_password_hash(ids[1:3], "ab" * 32)
+        backend.delete_notes([ids[2], ids[3]])
+
+        assert backend.get_full_note(ids[0])["translations"] == {
+            "fr": "x", "ar": "y"
+        }
+        assert backend.get_languages() == ["ar", "fr"]
+        assert backend.get_metadata(ids[1])["password_hash"] == "ab" * 32
+        assert [n["id"] for n in backend.get_notes(ids)] == ids[:2]
+        assert backend.get_full_note(ids[3]) is None
+
+    def test_threads_share_one_file(self, tmp_path):
+        """Test writes from a worker thread are visible to the caller."""
+        from concurrent.futures import ThreadPoolExecutor
+        backend = self.make_backend(str(tmp_path / "journal.db"))
+        meta = {"title": "t", "type": "TEXT",
+                "password_hash": None, "file_path": None}
+        with ThreadPoolExecutor(max_workers=4) as pool:
+            ids = list(pool.map(
+                lambda _: backend.save_metadata(dict(meta)), range(20)
+            ))
+
+        assert sorted(ids) == list(range(1, 21))
+        assert len(backend.get_all_titles()) == 20
+
+    def test_service_uses_configured_backend(self, mocker):
+        """Test DatabaseService keeps cache and index on top of SQLite."""
+        from app.services.database import DatabaseService
+        from app.services.search_index import SearchIndex
+        mocker.patch.object(DatabaseService, "_init_connections")
+        db = DatabaseService()
+        previous = db.backend
+        db.use_backend(self.make_backend())
+        db.index = SearchIndex(":memory:")
+        try:
+            note_id = db.save_metadata({
+                "title": "Harbour", "type": "TEXT",
+                "password_hash": None, "file_path": None,
+            })
+            db.save_content(note_id, "Boats at dawn", {})
+
+            assert db.mysql is None and db.mongo is None
+            assert db.load_note(note_id)["body"] == "Boats at dawn"
+            assert [hit["id"] for hit in db.search("boats")] == [note_id]
+        finally:
+            db.index = None
+            db.use_backend(previous)
+
+
+class TestRevisions:
+    @staticmethod
+    def make_log(snapshot_every=3):
+        from app.services.backends import SQLiteBackend
+        from app.services.revisions import RevisionLog
+        backend = SQLiteBackend(":memory:")
+        backend.connect(pytest.fail)
+        return RevisionLog(backend, snapshot_every), backend
+
+    def test_deltas_between_periodic_snapshots(self):
+        """Test saves store deltas and any revision rebuilds in bounds."""
+        log, backend = self.make_log(snapshot_every=3)
+        base = "".join(f"entry line {i}\n" for i in range(2000))
+        bodies = [base + "".join(f"edit {j}\n" for j in range(i))
+                  for i in range(7)]
+
+        numbers = [log.record(1, body) for body in bodies]
+        assert log.record(1, bodies[-1]) is None
+
+        history = backend.get_revisions(1)
+        assert numbers == [1, 2, 3, 4, 5, 6, 7]
+        assert [r["snapshot"] for r in history] == [
+            True, False, False, True, False, False, True
+        ]
+        assert all(r["size"] < 50 for r in history if not r["snapshot"])
+        assert all(len(backend.get_revision_chain(1, n)) <= 3
+                   for n in numbers)
+        assert [log.get(1, n) for n in numbers] == bodies
+        assert log.get(1) == bodies[-1] and log.get(1, 99) is None
+
+    def test_autosaves_diff_against_the_cached_text(self, mocker):
+        """Test later records skip the chain read but keep its cadence."""
+        log, backend = self.make_log(snapshot_every=3)
+        reads = mocker.spy(backend, "get_revision_chain")
+        bodies = ["Day one\n" * 40 + f"Day {i}\n" for i in range(5)]
+
+        numbers = [log.record(1, body) for body in bodies]
+        assert log.record(1, bodies[-1]) is None
+
+        assert numbers == [1, 2, 3, 4, 5]
+        assert reads.call_count == 1
+        assert [r["snapshot"] for r in backend.get_revisions(1)] == [
+            True, False, False, True, False
+        ]
+        log.invalidate(1)
+        assert log.record(1, "Day 5") == 6
+        assert reads.call_count == 2
+        assert [log.get(1, n) for n in numbers] == bodies
+
+    def test_service_keeps_history_of_saved_bodies(self, mocker):
+        """Test save_changes records revisions, the old body first."""
+        from app.services.database import DatabaseService
+        mocker.patch.object(DatabaseService, "_init_connections")
+        db = DatabaseService()
+        previous = db.backend
+        log, backend = self.make_log()
+        db.use_backend(backend)
+        try:
+            [note_id] = db.save_batch([{"title": "Diary", "body": "Day one"}])
+            meta = {"id": note_id, "title": "Diary", "type": "TEXT",
+                    "password_hash": None, "file_path": None}
+            changes = {"new": False, "metadata": False, "body": True,
+                       "translations": {}, "removed": []}
+
+            db.save_changes(meta, "Day one, then two", {}, changes)
+            db.save_changes(meta, "Day two", {}, changes)
+
+            assert [r["number"] for r in db.get_revisions(note_id)] \
+                == [1, 2, 3]
+            assert db.get_revision(note_id, 1) == "Day one"
+            assert db.get_revision(note_id, 2) == "Day one, then two"
+            db.delete_notes([note_id])
+            assert db.get_revisions(note_id) == []
+        finally:
+            db.use_backend(previous)
+
+    def test_service_records_only_saved_bodies(self, mocker):
+        """Test a body whose write failed is not added to the history."""
+        from app.services.database import DatabaseService
+        mocker.patch.object(DatabaseService, "_init_connections")
+        db = DatabaseService()
+        previous = db.backend
+        log, backend = self.make_log()
+        db.use_backend(backend)
+        try:
+            [note_id] = db.save_batch([{"title": "Diary", "body": "Day one"}])
+            meta = {"id": note_id, "title": "Diary", "type": "TEXT",
+                    "password_hash": None, "file_path": None}
+            changes = {"new": False, "metadata": False, "body": True,
+                       "translations": {}, "removed": []}
+            db.save_changes(meta, "Day two", {}, changes)
+            failing = mocker.patch.object(backend, "update_content",
+                                          side_effect=OSError("disk full"))
+
+            with pytest.raises(OSError):
+                db.save_changes(meta, "Day three", {}, changes)
+            mocker.stop(failing)
+            db.save_changes(meta, "Day four", {}, changes)
+
+            assert [db.get_revision(note_id, r["number"])
+                    for r in db.get_revisions(note_id)] == [
+                "Day one", "Day two", "Day four"
+            ]
+        finally:
+            db.use_backend(previous)
+
+    def test_service_refuses_to_save_a_deleted_note(self, mocker):
+        """Test a late autosave cannot bring a deleted note's body back."""
+        from app.services.database import DatabaseService
+        mocker.patch.object(DatabaseService, "_init_connections")
+        db = DatabaseService()
+        previous = db.backend
+        log, backend = self.make_log()
+        db.use_backend(backend)
+        try:
+            [note_id] = db.save_batch([{"title": "Diary", "body": "Day one"}])
+            db.delete_note(note_id)
+            meta = {"id": note_id, "title": "Diary", "type": "TEXT",
+                    "password_hash": None, "file_path": None}
+            changes = {"new": False, "metadata": True, "body": True,
+                       "translations": {}, "removed": []}
+
+            with pytest.raises(LookupError):
+                db.save_changes(meta, "Day two", {}, changes)
+
+            assert backend.get_content(note_id) is None
+            assert db.get_revisions(note_id) == []
+        finally:
+            db.use_backend(previous)
+
+
+class TestLinkedFileWatcher:
+    @staticmethod
+    def make_watcher(mocker, tmp_path, **kwargs):
+        from app.services.file_watcher import LinkedFileWatcher
+        paths = []
+        for i in range(2):
+            path = str(tmp_path / f"linked_{i}.txt")
+            FileManager.export_to_txt(path, f"Note {i}", f"Body {i}", {})
+            paths.append(path)
+        db = mocker.Mock()
+        db.get_linked_files.return_value = [
+            {"id": i + 1, "file_path": path} for i, path in enumerate(paths)
+        ]
+        synced = []
+        done = threading.Event()
+
+        def on_sync(ids):
+            synced.append(ids)
+            done.set()
+
+        watcher = LinkedFileWatcher(db, on_sync=on_sync, **kwargs)
+        return watcher, db, paths, synced, done
+
+    def test_index_skips_unchanged_content(self, tmp_path):
+        """Test a rewrite with identical bytes is not a change."""
+        from app.services.file_watcher import FileIndex
+        path = str(tmp_path / "note.txt")
+        FileManager.export_to_txt(path, "T", "Body", {})
+        index = FileIndex()
+        index.record(path)
+
+        os.utime(path, ns=(1, 1))
+        assert index.stat_changed(path)
+        assert not index.changed(path)
+        FileManager.export_to_txt(path, "T", "Edited", {})
+        assert index.changed(path)
+        assert not index.changed(path)
+
+    def test_sync_writes_changed_files_in_one_batch(self, mocker, tmp_path):
+        """Test only edited files are re-parsed and written together."""
+        watcher, db, paths, synced, _ = self.make_watcher(
+            mocker, tmp_path, use_inotify=False
+        )
+        for row in db.get_linked_files():
+            watcher.watch(row["id"], row["file_path"])
+        FileManager.export_to_txt(paths[1], "Renamed", "New body",
+                                  {"fr": "Nouveau"})
+
+        assert watcher.sync(watcher.watched()) == [2]
+        db.update_batch.assert_called_once_with([{
+            "id": 2, "title": "Renamed", "body": "New body",
+            "translations": {"fr": "Nouveau"},
+        }])
+        assert synced == [[2]]
+
+    def test_relinking_forgets_the_old_file(self, mocker, tmp_path):
+        """Test a note moved to another file drops the old one's entry."""
+        watcher, db, paths, _, _ = self.make_watcher(
+            mocker, tmp_path, use_inotify=False
+        )
+        watcher.watch(1, paths[0])
+        watcher.watch(1, paths[1])
+
+        assert watcher.watched() == {paths[1]}
+        assert watcher.index._entries.keys() == {paths[1]}
+
+    @pytest.mark.parametrize("use_inotify", [True, False])
+    def test_picks_up_external_edits(self, mocker, tmp_path, use_inotify):
+        """Test the background thread notices an edit and syncs it."""
+        watcher, db, paths, synced, done = self.make_watcher(
+            mocker, tmp_path, use_inotify=use_inotify,
+            poll_interval=0.05, settle=0.05,
+        )
+        if use_inotify and watcher._source is None:
+            pytest.skip("inotify not available")
+        watcher.start()
+        try:
+            deadline = time.monotonic() + 5
+            while len(watcher.watched()) < 2 and time.monotonic() < deadline:
+                time.sleep(0.01)
+            # Replace the file the way editors do: write, then rename
+            tmp = paths[0] + ".swp"
+            FileManager.export_to_txt(tmp, "Note 0", "Edited outside", {})
+            os.replace(tmp, paths[0])
+
+            assert done.wait(5)
+        finally:
+            watcher.stop()
+        assert synced == [[1]]
+        saved = db.update_batch.call_args[0][0]
+        assert saved[0]["body"] == "Edited outside"
+
+
+class TestJournalArchive:
+    NOTES = [
+        {"title": "Plain", "body": "Line 1\nLine, \"2\""},
+        {"title": "Secret", "body": "", "password_hash": "ab" * 32,
+         "translations": {"ar": "سر", "fr": "Secret"}},
+        {"title": "Linked", "body": "x" * 200000, "file_path": "/tmp/l.txt"},
+    ]
+
+    @staticmethod
+    def make_backend():
+        from app.services.backends import SQLiteBackend
+        backend = SQLiteBackend(":memory:")
+        backend.connect(pytest.fail)
+        return backend
+
+    @pytest.mark.parametrize(
+        "name", ["all.csv", "all.jsonl", "all.csv.gz", "all.jsonl.gz"]
+    )
+    def test_round_trip(self, tmp_path, name):
+        """Test every note survives an export and re-import."""
+        from app.services.journal_archive import JournalArchive
+        source, target = self.make_backend(), self.make_backend()
+        source.save_batch(self.NOTES)
+        path = str(tmp_path / name)
+
+        assert JournalArchive(source, batch_size=2).export_to(path) == 3
+        report = JournalArchive(target, batch_size=2).import_from(path)
+
+        assert report["imported"] == 3 and report["errors"] == []
+        strip = ("id",)
+        exported = [
+            {k: v for k, v in n.items() if k not in strip}
+            for n in source.iter_notes()
+        ]
+        restored = [
+            {k: v for k, v in n.items() if k not in strip}
+            for n in target.iter_notes()
+        ]
+        assert restored == exported
+        assert restored[1]["translations"]["ar"] == "سر"
+
+    def test_reports_bad_rows(self, tmp_path):
+        """Test malformed lines are skipped and reported by number."""
+        from app.services.journal_archive import JournalArchive
+        path = tmp_path / "bad.jsonl"
+        path.write_text(
+            '{"title": "Good", "body": "ok"}\n'
+            '{"title": "Broken"\n'
+            '{"body": "no title"}\n'
+            '{"title": "Odd", "translations": []}\n',
+            encoding="utf-8",
+        )
+        target = self.make_backend()
+
+        report = JournalArchive(target).import_from(str(path))
+
+        assert report["imported"] == 1
+        assert [line for line, _ in report["errors"]] == [2, 3, 4]
+
+    def test_streams_from_both_stores(self, mocker):
+        """Test MySQL rows come in keyset pages, one query per batch."""
+        from app.services.backends.mysql_mongo import MySQLMongoBackend
+        pool = mocker.MagicMock()
+        cur = pool.cursor.return_value.__enter__.return_value
+        rows = [{"id": i, "title": f"N{i}", "type": "TEXT",
+                 "password_hash": None, "file_path": None}
+                for i in range(1, 6)]
+        cur.fetchall.side_effect = [rows[:3], rows[3:], []]
+        mongo = mocker.MagicMock()
+        mongo.entries.find.side_effect = lambda query, **kw: [
+            {"_id": _id, "body": f"Body {_id}"}
+            for _id in query["_id"]["$in"]
+        ]
+        backend = MySQLMongoBackend(mysql=pool, mongo=mongo)
+
+        notes = list(backend.iter_notes(batch_size=3))
+
+        assert [c[0][1] for c in cur.execute.call_args_list] == [
+            (0, 3), (3, 3), (5, 3)
+        ]
+        assert mongo.entries.find.call_count == 2
+        assert [n["body"] for n in notes] == [
+            f"Body {i}" for i in range(1, 6)
+        ]
+
+
+class TestBulkImport:
+    @staticmethod
+    def make_archive(directory, count):
+        for i in range(count):
+            path = os.path.join(directory, f"note_{i:03}.txt")
+            FileManager.export_to_txt(path, f"Note {i}", f"Body {i}", {})
+        nested = os.path.join(directory, "csv")
+        os.mkdir(nested)
+        FileManager.export_to_csv(
+            os.path.join(nested, "extra.csv"), "Extra", "CSV body",
+            {"fr": "Corps"}
+        )
+        with open(os.path.join(nested, "broken.csv"), "w") as f:
+            f.write("Wrong,Header\nx,y\n")
+        with open(os.path.join(directory, "skip.bin"), "w") as f:
+            f.write("ignored")
+
+    def test_batches_writes_and_reports_errors(self, mocker, tmp_path):
+        """Test each batch costs one transaction and one bulk_write."""
+        from app.services.bulk_import import BulkImporter
+        from app.services.database import DatabaseService
+        mocker.patch.object(DatabaseService, "_init_connections")
+        db = DatabaseService()
+        db.mysql = mocker.MagicMock()
+        db.mongo = mocker.MagicMock()
+        cursor = db.mysql.transaction.return_value.__enter__.return_value
+        cursor.lastrowid = 100
+        self.make_archive(str(tmp_path), 9)
+
+        progress = []
+        report = BulkImporter(db, batch_size=4, use_processes=False).run(
+            str(tmp_path), on_progress=lambda *p: progress.append(p)
+        )
+
+        assert report["total"] == 11
+        assert report["imported"] == 10
+        assert [os.path.basename(p) for p, _ in report["errors"]] == [
+            "broken.csv"
+        ]
+        inserts = [
+            c[0][1] for c in cursor.execute.call_args_list
+            if c[0][0].startswith("INSERT INTO entries")
+        ]
+        assert db.mysql.transaction.call_count == 3
+        assert db.mongo.entries.bulk_write.call_count == 3
+        assert [row[0] for row in inserts[:3]] == [
+            "Extra", "Note 0", "Note 1"
+        ]
+        assert len(inserts) == 10
+        assert progress[-1] == (11, 11, 1)
+
+    def test_parses_in_worker_processes(self, mocker, tmp_path):
+        """Test the process pool returns the same parsed notes."""
+        from app.services.bulk_import import BulkImporter
+        db = mocker.Mock()
+        db.save_batch.side_effect = lambda notes: list(range(len(notes)))
+        self.make_archive(str(tmp_path), 3)
+
+        report = BulkImporter(db, workers=2).run(str(tmp_path))
+
+        saved = [n for c in db.save_batch.call_args_list for n in c[0][0]]
+        assert report["imported"] == 4
+        assert {n["title"] for n in saved} == {
+            "Extra", "Note 0", "Note 1", "Note 2"
+        }
+        assert saved[0]["translations"] == {"fr": "Corps"}
+
 
 def run_all_tests():
     import sys
@@ -2,6 +2,12 @@ import pytest
 from app.models.concrete import TextEntry, FileEntry
 from app.models.features import SecretEntry, MultilingualEntry
 from app.services.storage import StorageFactory
+from app.models.dirty import DirtyTracker
+from app.models.collection import EntryCollection
+from app.models.document import LargeDocument
+from app.models.delta import apply_delta, dump_delta, load_delta, make_delta
+from app.ui.note_list import PagedTitles, RowSelection, completed
+from app.metrics import Metrics, instrumented, metrics
 import tempfile
 import os
 
@@ -108,6 +114,154 @@ class TestMultilingualEntry:
         assert "fr" in multi.translations
 
 
+class TestCompactModels:
+    def test_entries_have_no_instance_dict(self):
+        """Test every model class is slotted."""
+        entry = MultilingualEntry(SecretEntry(TextEntry("T", "B"), "pw"))
+
+        for layer in (entry, entry.entry, entry.base):
+            assert not hasattr(layer, "__dict__")
+        with pytest.raises(AttributeError):
+            entry.base.tags = []
+
+    def test_base_and_forwarding_skip_layers(self):
+        """Test base is reached in one step and locks still apply."""
+        text = TextEntry("Title", "Body")
+        secret = SecretEntry(text, "pw")
+        entry = MultilingualEntry(MultilingualEntry(secret))
+
+        assert entry.base is text
+        assert entry._reader is secret
+        assert entry.get_content() == "******** [LOCKED] ********"
+        assert entry.metadata()["encrypted"] is True
+
+        secret.verify("pw")
+        entry.edit_content("New body")
+        assert entry.get_content() == "New body"
+        assert text.body == "New body"
+
+
+class TestEntryCollection:
+    ROWS = [
+        {"id": 3, "title": "Morning"},
+        {"id": 8, "title": "صباح الخير", "password_hash": "ab" * 32},
+        {"id": 9, "title": "", "type": "FILE", "file_path": "/tmp/n.txt"},
+    ]
+
+    def test_rows_round_trip(self):
+        """Test rows come back as they went in, by index and slice."""
+        rows = EntryCollection(self.ROWS)
+
+        assert len(rows) == 3
+        assert rows[1] == {"id": 8, "title": "صباح الخير"}
+        assert rows[-1]["id"] == 9
+        assert rows[0:2] == [{"id": 3, "title": "Morning"},
+                             {"id": 8, "title": "صباح الخير"}]
+        assert rows.metadata(2) == {
+            "id": 9, "title": "", "type": "FILE", "password_hash": None,
+            "file_path": "/tmp/n.txt",
+        }
+        assert rows.metadata(1)["password_hash"] == "ab" * 32
+        assert rows.index_of(8) == 1
+        rows.append(12, "Later")
+        assert rows.index_of(12) == 3
+        with pytest.raises(IndexError):
+            rows[4]
+
+    def test_smaller_than_dict_rows(self):
+        """Test 10k titles take well under half the memory of dicts."""
+        import tracemalloc
+
+        def retained(build):
+            tracemalloc.start()
+            try:
+                result = build()
+                return tracemalloc.get_traced_memory()[0], result
+            finally:
+                tracemalloc.stop()
+
+        def rows():
+            return ({"id": i, "title": f"Note number {i}"}
+                    for i in range(10000))
+
+        dicts, _ = retained(lambda: list(rows()))
+        compact, _ = retained(lambda: EntryCollection(rows()))
+        assert compact < dicts / 2
+
+
+class TestLargeDocument:
+    def test_index_and_chunks(self):
+        """Test line lookups and chunked loading cover the text exactly."""
+        text = "".join(f"line {i}\n" for i in range(1000)) + "tail"
+        doc = LargeDocument(text)
+
+        assert doc.line_count == 1001
+        assert doc.line_of(text.index("line 500")) == (500, 0)
+        assert doc.line_of(len(text) - 1) == (1000, 3)
+        chunks = list(doc.chunks(1000))
+        assert "".join(chunks) == text
+        assert all(chunk.endswith("\n") for chunk in chunks[:-1])
+        assert doc.body(pytest.fail) is text
+
+    def test_reads_back_only_edited_lines(self):
+        """Test the body is rebuilt from the text plus edited lines."""
+        text = "".join(f"line {i}\n" for i in range(1000)) + "tail"
+        doc = LargeDocument(text)
+        widget = text.split("\n")  # what the editor shows, line by line
+        reads = []
+
+        def read(line, count, last):
+            reads.append(count)
+            lines = "\n".join(widget[line:line + count])
+            return lines if last else lines + "\n"
+
+        widget[10] = "X" + widget[10]
+        doc.edit(10, 1, 1)
+        widget[500:501] = ["pasted", "text " + widget[500]]
+        doc.edit(500, 1, 2)
+        widget[700:703] = [widget[700][:2] + widget[702][3:]]
+        doc.edit(700, 3, 1)
+        widget[-1] += "!"
+        doc.edit(len(widget) - 1, 1, 1)
+
+        assert doc.body(read) == "\n".join(widget)
+        assert reads == [1, 2, 1, 1]
+        assert doc.current_line(900) == 899
+        assert doc.current_line(701) is None
+
+
+class TestDeltas:
+    def test_rebuilds_edited_texts(self):
+        """Test a delta turns the old text into the new one exactly."""
+        import random
+        rng = random.Random(3)
+        for _ in range(500):
+            old = "".join(rng.choice("ab c\n")
+                          for _ in range(rng.randint(0, 40)))
+            new = list(old)
+            for _ in range(rng.randint(0, 4)):
+                at = rng.randint(0, len(new))
+                if new and rng.random() < 0.5:
+                    del new[min(at, len(new) - 1)]
+                else:
+                    new.insert(at, rng.choice("ab\nxé"))
+            new = "".join(new)
+
+            delta = load_delta(dump_delta(make_delta(old, new)))
+
+            assert apply_delta(old, delta) == new
+
+    def test_size_follows_the_edit(self):
+        """Test a one-word edit in a long text stores only that word."""
+        old = "".join(f"line {i} of the log\n" for i in range(20000))
+        new = old.replace("line 5000 of", "line 5000 (checked) of")
+
+        delta = make_delta(old, new)
+
+        assert len(dump_delta(delta)) < 50
+        assert [len(op) for op in delta if isinstance(op, str)] == [10]
+
+
 class TestStorageFactory:
     def test_factory_text_entry(self):
         """Test factory creates TextEntry."""
@@ -124,5 +278,220 @@ class TestStorageFactory:
         assert isinstance(secure, SecretEntry)
 
 
+class TestPagedTitles:
+    @staticmethod
+    def make_source(total, calls):
+        def request_page(last, limit):
+            calls.append(last)
+            start = last["id"] if last else 0
+            stop = min(start + limit, total)
+            return completed([
+                {"id": i, "title": f"Note {i}"}
+                for i in range(start + 1, stop + 1)
+            ])
+        return request_page
+
+    @staticmethod
+    def make_model(page_size=50):
+        """A model whose pages wait in `queued` like on the Tk queue."""
+        queued = []
+
+        def then(future, on_done, on_error):
+            queued.append(lambda: on_done(future.result()))
+
+        def deliver():
+            while queued:
+                queued.pop(0)()
+
+        model = PagedTitles(then, page_size)
+        return model, deliver
+
+    def test_loads_only_requested_pages(self):
+        """Test the list fetches just enough pages for the view."""
+        calls = []
+        model, deliver = self.make_model()
+        model.reset(self.make_source(100000, calls))
+
+        assert model.ensure(20) == 0
+        deliver()
+        assert model.ensure(20) == 20
+        assert len(model) == 50
+        assert calls == [None]
+
+        assert model.window(60, 70) == []
+        deliver()
+        rows = model.window(60, 70)
+        assert [r["id"] for r in rows] == list(range(61, 71))
+        assert calls[-1] == {"id": 50, "title": "Note 50"}
+
+    def test_asks_for_one_page_at_a_time(self):
+        """Test pages are not requested again while one is on its way and
+        are re-rendered through on_loaded."""
+        calls, loaded = [], []
+        model, deliver = self.make_model()
+        model.on_loaded = lambda: loaded.append(len(model))
+        model.reset(self.make_source(100000, calls))
+
+        model.ensure(500)
+        model.ensure(500)
+        assert len(calls) == 1 and loaded == []
+        deliver()
+        assert loaded == [50]
+
+    def test_drops_pages_of_an_old_source(self):
+        """Test a page arriving after reset() is not mixed in."""
+        calls = []
+        model, deliver = self.make_model()
+        model.reset(self.make_source(100000, calls))
+        model.ensure(10)
+        model.reset(self.make_source(3, calls))
+        model.ensure(10)
+        deliver()
+
+        assert [r["id"] for r in model.rows] == [1, 2, 3]
+        assert model.exhausted
+
+    def test_stops_at_end_of_source(self):
+        """Test a short final page marks the list as exhausted."""
+        calls = []
+        model, deliver = self.make_model()
+        model.reset(self.make_source(70, calls))
+
+        for _ in range(3):
+            model.ensure(500)
+            deliver()
+        assert model.ensure(500) == 70
+        assert model.exhausted
+        assert model.estimated_total() == 70
+        model.ensure(600)
+        assert len(calls) == 2
+
+
+class TestRowSelection:
+    def test_toggle_and_range(self):
+        """Test Ctrl-click toggles rows and Shift-click adds a range."""
+        rows = EntryCollection(
+            {"id": i, "title": f"Note {i}"} for i in (10, 20, 30, 40, 50)
+        )
+        selection = RowSelection()
+
+        selection.toggle(40)
+        selection.extend_to(rows, 20)
+        selection.toggle(30)
+        selection.toggle(99)
+
+        assert selection.ordered(rows) == [20, 40, 99]
+        assert 30 not in selection and len(selection) == 3
+        selection.clear()
+        selection.extend_to(rows, 50)
+        assert selection.ordered() == [50]
+
+
+class TestDirtyTracker:
+    @staticmethod
+    def state(**changes):
+        state = {
+            "title": "Trip", "body": "Day one", "password_hash": None,
+            "file_path": None, "translations": {"fr": "Jour", "es": "Dia"},
+        }
+        state.update(changes)
+        return state
+
+    def test_unsaved_note_is_all_dirty(self):
+        """Test a note that was never saved writes every field."""
+        changes = DirtyTracker().changes(self.state())
+        assert changes["new"] and changes["metadata"] and changes["body"]
+        assert changes["translations"] == {"fr": "Jour", "es": "Dia"}
+
+    def test_reports_only_changed_parts(self):
+        """Test unchanged fields and translations are left out."""
+        tracker = DirtyTracker(self.state())
+        assert not tracker.is_dirty(self.state())
+
+        changes = tracker.changes(self.state(
+            body="Day two", translations={"fr": "Jour deux", "ar": "يوم"}
+        ))
+        assert not changes["metadata"]
+        assert changes["body"]
+        assert changes["translations"] == {"fr": "Jour deux", "ar": "يوم"}
+        assert changes["removed"] == ["es"]
+
+        tracker.mark_saved(self.state(password_hash="abc"))
+        assert tracker.changes(self.state())["metadata"]
+
+    def test_translations_loaded_later_are_clean(self):
+        """Test a language fetched on demand is not written back."""
+        tracker = DirtyTracker(self.state(translations={"fr": "Jour"}))
+        tracker.mark_loaded({"es": "Dia"})
+
+        assert not tracker.is_dirty(self.state())
+
+
+class TestMetrics:
+    @pytest.fixture
+    def recording(self):
+        metrics.reset()
+        metrics.enabled = True
+        yield metrics
+        metrics.enabled = False
+        metrics.reset()
+
+    def test_disabled_records_nothing(self):
+        """Test instrumented calls leave no trace while recording is off."""
+        @instrumented("test.noop")
+        def noop():
+            return 1
+
+        assert noop() == 1
+        assert "test.noop" not in metrics.snapshot()["metrics"]
+
+    def test_counts_calls_bytes_and_errors(self, recording):
+        """Test calls, bytes, histogram and raised errors are recorded."""
+        @instrumented("test.echo", size=lambda result, text: len(result))
+        def echo(text):
+            if not text:
+                raise ValueError("empty")
+            return text
+
+        echo("abc")
+        echo("de")
+        with pytest.raises(ValueError):
+            echo("")
+
+        stat = recording.snapshot()["metrics"]["test.echo"]
+        assert stat["calls"] == 3 and stat["errors"] == 1
+        assert stat["bytes"] == 5
+        assert stat["last_error"] == "empty"
+        assert sum(stat["histogram"].values()) == 3
+        assert stat["p50_ms"] <= stat["p95_ms"]
+
+    def test_swallowed_translation_failure_is_counted(self, recording,
+                                                      mocker):
+        """Test add_language's False return still shows up as an error."""
+        mocker.patch.object(MultilingualEntry, "cache", None)
+        mocker.patch(
+            "app.models.features.GoogleTranslator",
+            side_effect=ConnectionError("offline"),
+        )
+        entry = MultilingualEntry(TextEntry("T", "Hello"))
+
+        assert entry.add_language("fr") is False
+        stats = recording.snapshot()["metrics"]
+        assert stats["translate.add_language"]["errors"] == 1
+        assert stats["translate.translate"]["last_error"] == "offline"
+
+    def test_export_json(self, tmp_path):
+        """Test the snapshot is written as JSON."""
+        import json
+        registry = Metrics(enabled=True)
+        registry.record("db.load_note", 0.003, nbytes=42)
+        path = tmp_path / "metrics.json"
+
+        registry.export_json(str(path))
+
+        data = json.loads(path.read_text(encoding="utf-8"))
+        assert data["metrics"]["db.load_note"]["histogram"]["<=5ms"] == 1
+
+
 if __name__ == "__main__":
     pytest.main([__file__, "-v"])
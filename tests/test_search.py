@@ -0,0 +1,80 @@
+import pytest
+from app.services.search_index import SearchIndex
+
+
+@pytest.fixture
+def index():
+    idx = SearchIndex(":memory:")
+    idx.index_title(1, "Trip to Paris")
+    idx.index_content(1, "We walked along the river.", {"fr": "Le fleuve."})
+    idx.index_title(2, "Groceries")
+    idx.index_content(2, "Milk, bread and a river map.", {})
+    idx.index_title(3, "Journal")
+    idx.index_content(3, "Nothing about rivers here.", {"es": "Viaje a Paris"})
+    return idx
+
+
+class TestSearchIndex:
+    def test_ranked_results(self, index):
+        """Test title matches outrank body and translation matches."""
+        ids = [hit["id"] for hit in index.search("paris ")]
+        assert ids == [1, 3]
+
+    def test_prefix_and_and_semantics(self, index):
+        """Test the last word is a prefix and all words must match."""
+        assert {h["id"] for h in index.search("riv")} == {1, 2, 3}
+        assert [h["id"] for h in index.search("river map")] == [2]
+        assert index.search("river ") and not index.search("rive ")
+
+    def test_translations_are_searchable(self, index):
+        """Test stored translations are indexed per language."""
+        assert [h["id"] for h in index.search("fleuve")] == [1]
+        index.index_content(1, "We walked along the river.", {})
+        assert index.search("fleuve") == []
+
+    def test_partial_update_keeps_other_fields(self, index):
+        """Test a partial save reindexes only the fields it names."""
+        index.update_content(1, translations={"ar": "النهر"}, removed=["fr"])
+        assert index.search("fleuve") == []
+        assert [h["id"] for h in index.search("النهر")] == [1]
+        assert 1 in {h["id"] for h in index.search("walked")}
+
+    def test_incremental_update_and_remove(self, index):
+        """Test saves replace old postings and deletes drop the note."""
+        index.index_title(2, "Shopping list")
+        assert index.search("groceries") == []
+        assert index.search("shopping")[0]["title"] == "Shopping list"
+
+        index.remove(1)
+        assert [h["id"] for h in index.search("paris")] == [3]
+        assert index.conn.execute(
+            "SELECT COUNT(*) FROM postings WHERE doc_id = 1"
+        ).fetchone()[0] == 0
+
+    def test_document_frequency_counts_documents(self, index):
+        """Test df counts a note once however many fields hold a term."""
+        def df(term):
+            row = index.conn.execute(
+                "SELECT df FROM terms WHERE term = ?", (term,)
+            ).fetchone()
+            return row[0] if row else 0
+
+        index.index_content(3, "Paris, again.", {"es": "Paris"})
+        assert df("paris") == 2
+        index.index_title(3, "Journal")
+        index.update_content(3, body="Nowhere", removed=["es"])
+        assert df("paris") == 1 and df("again") == 0
+
+    def test_common_words_still_filter(self):
+        """Test a word in most notes still narrows a multi-word query."""
+        idx = SearchIndex(":memory:")
+        with idx.batch():
+            for doc_id in range(1, 1201):
+                # "walk" is in 90% of notes, "harbour" in one in ten
+                words = ["walk"] if doc_id % 10 != 5 else []
+                if doc_id % 10 in (0, 5):
+                    words.append("harbour")
+                idx.index_content(doc_id, " ".join(words))
+
+        hits = {h["id"] for h in idx.search("harbour walk", 2000)}
+        assert hits == set(range(10, 1201, 10))
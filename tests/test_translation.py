@@ -0,0 +1,219 @@
+import time
+import pytest
+from app.models.concrete import TextEntry
+from app.models.features import MultilingualEntry
+from app.services.translation_cache import TranslationCache
+
+
+class FakeTranslator:
+    """Local stand-in for GoogleTranslator that counts network calls."""
+    calls = []
+
+    def __init__(self, source="auto", target="en"):
+        self.target = target
+
+    def translate(self, text):
+        FakeTranslator.calls.append((text, self.target))
+        return f"[{self.target}] {text}"
+
+
+@pytest.fixture
+def translator(monkeypatch):
+    FakeTranslator.calls = []
+    monkeypatch.setattr(
+        "app.models.features.GoogleTranslator", FakeTranslator
+    )
+    return FakeTranslator
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    cache = TranslationCache(path=str(tmp_path / "cache.db"))
+    monkeypatch.setattr(MultilingualEntry, "cache", cache)
+    return cache
+
+
+class TestTranslationCache:
+    def test_repeat_translation_skips_network(self, translator, cache):
+        """Test unchanged text is served from the cache on re-save."""
+        entry = MultilingualEntry(TextEntry("Title", "Hello"))
+        assert entry.add_language("es")
+        assert entry.add_language("es")
+        assert entry.translations["es"] == "[es] Hello"
+        assert len(translator.calls) == 1
+        assert cache.stats()["hits"] == 1
+        assert cache.stats()["misses"] == 1
+
+        entry.edit_content("Hello again")
+        entry.add_language("es")
+        assert len(translator.calls) == 2
+
+    def test_translators_are_reused(self, translator, cache):
+        """Test one translator per language pair serves repeated calls."""
+        from app.models.features import translator_for
+        assert translator_for("auto", "fr") is translator_for("auto", "fr")
+        assert translator_for("auto", "es").target == "es"
+
+    def test_key_includes_languages(self, cache):
+        """Test the same text cached for another pair is a miss."""
+        cache.put("Hello", "auto", "fr", "Bonjour")
+        assert cache.get("Hello", "auto", "fr") == "Bonjour"
+        assert cache.get("Hello", "auto", "de") is None
+        assert cache.get("Hello", "en", "fr") is None
+
+    def test_lru_eviction(self, cache):
+        """Test eviction keeps only the most recently used entries."""
+        cache.max_entries = 2
+        for word in ("one", "two", "three"):
+            cache.put(word, "auto", "es", word.upper())
+        cache.get("one", "auto", "es")
+        cache.evict()
+
+        assert cache.get("two", "auto", "es") is None
+        assert cache.get("one", "auto", "es") == "ONE"
+        assert cache.get("three", "auto", "es") == "THREE"
+
+    def test_prefers_mongo_store(self, mocker, tmp_path):
+        """Test MongoDB holds entries when it is reachable."""
+        mongo = mocker.MagicMock()
+        mongo.translation_cache.find_one_and_update.return_value = {
+            "translation": "Hola"
+        }
+        cache = TranslationCache(mongo, path=str(tmp_path / "cache.db"))
+
+        cache.put("Hello", "auto", "es", "Hola")
+        assert cache.get("Hello", "auto", "es") == "Hola"
+        mongo.translation_cache.update_one.assert_called_once()
+        assert cache._disk is None
+
+
+class SlowTranslator:
+    """Stand-in that sleeps, fails or hangs depending on the language."""
+    delay = 0.2
+    failures = {}
+
+    def __init__(self, source="auto", target="en"):
+        self.target = target
+
+    def translate(self, text):
+        if self.target == "hang":
+            time.sleep(1.5)
+        if SlowTranslator.failures.get(self.target, 0) > 0:
+            SlowTranslator.failures[self.target] -= 1
+            raise ConnectionError("flaky network")
+        time.sleep(self.delay)
+        return f"[{self.target}] {text}"
+
+
+@pytest.fixture
+def slow_translator(monkeypatch):
+    SlowTranslator.failures = {}
+    monkeypatch.setattr(
+        "app.models.features.GoogleTranslator", SlowTranslator
+    )
+    monkeypatch.setattr(MultilingualEntry, "cache", None)
+    return SlowTranslator
+
+
+class TestConcurrentTranslation:
+    def test_languages_translate_in_parallel(self, slow_translator):
+        """Test five languages take about one round trip, not five."""
+        entry = MultilingualEntry(TextEntry("Title", "Hello"))
+        streamed = []
+
+        start = time.monotonic()
+        results = entry.add_languages(
+            ["ar", "fr", "es", "de", "it"],
+            on_result=lambda lang, ok: streamed.append(
+                (lang, ok, lang in entry.translations)
+            ),
+            max_workers=5,
+        )
+        elapsed = time.monotonic() - start
+
+        assert elapsed < 2 * slow_translator.delay
+        assert all(results.values()) and len(results) == 5
+        assert entry.translations["fr"] == "[fr] Hello"
+        assert sorted(s[0] for s in streamed) == ["ar", "de", "es", "fr", "it"]
+        assert all(ok and stored for _, ok, stored in streamed)
+
+    def test_retries_transient_failures(self, slow_translator):
+        """Test a failing call is retried before giving up."""
+        slow_translator.failures = {"fr": 2, "es": 5}
+        entry = MultilingualEntry(TextEntry("Title", "Hello"))
+
+        results = entry.add_languages(["fr", "es"], retries=2, backoff=0)
+
+        assert results == {"fr": True, "es": False}
+        assert "es" not in entry.translations
+
+    def test_timeout_abandons_slow_calls(self, slow_translator):
+        """Test a hung call times out without holding up other languages."""
+        entry = MultilingualEntry(TextEntry("Title", "Hello"))
+
+        start = time.monotonic()
+        results = entry.add_languages(
+            ["hang", "fr"], timeout=0.4, retries=0, max_workers=2
+        )
+
+        assert time.monotonic() - start < 1.2
+        assert results == {"hang": False, "fr": True}
+
+
+class TestChunkedTranslation:
+    @staticmethod
+    def long_body(paragraphs=40):
+        return "\n\n".join(
+            f"Paragraph {i}. " + "Some words here. " * 30
+            for i in range(paragraphs)
+        )
+
+    def test_splits_at_paragraphs_and_sentences(self):
+        """Test pieces stay under the limit and join back to the text."""
+        from app.models.chunks import split_text
+        body = self.long_body() + "\n\n" + "One long sentence. " * 400
+
+        pieces = split_text(body, limit=1000)
+
+        assert "".join(pieces) == body
+        assert max(len(p) for p in pieces) <= 1000
+        assert all(p.endswith(("\n\n", ". ", ".")) for p in pieces)
+        assert split_text("Short") == ["Short"] and split_text("") == []
+
+    def test_only_changed_pieces_are_resent(self, translator, cache):
+        """Test long bodies go out in pieces and edits resend one piece."""
+        body = self.long_body()
+        entry = MultilingualEntry(TextEntry("Title", body))
+
+        assert entry.add_language("fr")
+        first = len(translator.calls)
+        entry.edit_content(body.replace("Paragraph 7.", "Paragraph seven."))
+        assert entry.add_language("fr")
+
+        assert first > 1
+        assert max(len(text) for text, _ in translator.calls) <= 4500
+        # The edited piece, and its neighbour if the edit moved a cut
+        assert len(translator.calls) - first <= 2
+        translated = entry.translations["fr"]
+        assert translated.count("\n\n") == body.count("\n\n")
+        assert translated.startswith("[fr] Paragraph 0.")
+        assert translated.index("Paragraph 6.") \
+            < translated.index("Paragraph seven.") \
+            < translated.index("Paragraph 8.")
+
+
+class TestLazyImports:
+    def test_libraries_load_on_first_use(self):
+        """Test importing the UI leaves translation, RTL and Mongo libs out."""
+        import subprocess
+        import sys
+        code = (
+            "import sys, app.models.features, app.ui.main_window; "
+            "print(sorted(m for m in ('deep_translator', 'arabic_reshaper', "
+            "'pymongo') if m in sys.modules))"
+        )
+        out = subprocess.run(
+            [sys.executable, "-c", code], capture_output=True, text=True,
+            check=True,
+        ).stdout
+        assert out.strip() == "[]"